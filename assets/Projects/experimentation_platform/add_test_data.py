@@ -1,8 +1,8 @@
-from core.data_manager import ExperimentDataManager
+from core.data_manager import open_data_manager
 from datetime import date
 from random import randint
 
-dm = ExperimentDataManager()
+dm = open_data_manager()
 
 # Add data to experiment 1
 print("Adding test data...")
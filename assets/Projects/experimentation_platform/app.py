@@ -4,7 +4,17 @@ from datetime import date, datetime
 import pandas as pd
 from random import randint
 
-from core.data_manager import ExperimentDataManager
+from core.change_feed import REFRESH_SECONDS, ChangeFeed
+from core.chart_data import (PANELS_PER_FIGURE, ChartCache, RenderLog, RenderTracker, dashboard_charts,
+                             experiment_chart)
+from core.data_manager import ALLOCATION_MODES, open_data_manager
+from core.data_quality import srm_checks
+from core.experiment_summary import get_current_summaries
+from core.heterogeneous_effects import heterogeneous_effects, top_segments
+from core.metric_evaluation import PRESET_METRICS, evaluate_metrics, guardrail_regressions
+from core.power_simulation import SimulationConfig, simulate_power, weekly_pattern
+from core.scheduler import read_job_status
+from core.significance_cache import CACHE_PATH, SignificanceCache
 from core.statistical_engine import ABTestCalculator
 
 # Page config
@@ -15,8 +25,44 @@ st.set_page_config(
 )
 
 # Initialize
-dm = ExperimentDataManager()
-calc = ABTestCalculator()
+@st.cache_resource
+def get_data_manager():
+    """
+    One data manager per server process; in single-file mode its reads
+    come from an in-memory snapshot so the app never blocks the writers
+    """
+    return open_data_manager(read_snapshot=True)
+
+
+dm = get_data_manager()
+
+
+@st.cache_resource
+def get_significance_cache() -> SignificanceCache:
+    """One result cache per server process, shared with the checker scripts through its file"""
+    return SignificanceCache(path=CACHE_PATH)
+
+
+calc = ABTestCalculator(cache=get_significance_cache())
+
+
+@st.cache_resource
+def get_chart_cache() -> ChartCache:
+    """Downsampled series and serialized figures, shared by every session"""
+    return ChartCache()
+
+
+@st.cache_resource
+def get_render_log() -> RenderLog:
+    """Chart render time and payload per page, shared by every session"""
+    return RenderLog()
+
+
+@st.cache_resource
+def get_change_feed() -> ChangeFeed:
+    """One change feed per server process, shared by every session"""
+    return ChangeFeed(open_data_manager())
+
 
 # Custom CSS
 st.markdown("""
@@ -41,105 +87,170 @@ if page == "📊 Dashboard":
     st.title("📊 Experimentation Dashboard")
     st.markdown("Welcome to your A/B testing platform!")
     
-    # Metrics
-    col1, col2, col3, col4 = st.columns(4)
-    
-    active_exps = dm.get_active_experiments()
-    
-    with col1:
-        st.metric("Active Experiments", len(active_exps))
-    
-    with col2:
-        st.metric("Tests This Month", 12)
-    
-    with col3:
-        st.metric("Win Rate", "42%", delta="5%")
-    
-    with col4:
-        st.metric("Time to Insight", "3.2 days", delta="-4.8 days")
-    
-    st.markdown("---")
+    intervals = [0, 5, 10, 30, 60]
+    refresh = st.sidebar.selectbox(
+        "Auto-refresh",
+        intervals,
+        index=intervals.index(REFRESH_SECONDS),
+        format_func=lambda s: "Off" if s == 0 else f"Every {s}s"
+    )
     
-    # Active experiments
-    st.subheader("🟢 Active Experiments")
-    
-    if len(active_exps) > 0:
-        for idx, exp in active_exps.iterrows():
-            days_running = (datetime.now().date() - pd.to_datetime(exp['start_date']).date()).days
-            
-            with st.expander(f"**{exp['experiment_name']}** - Day {days_running}"):
-                st.write(f"**Description:** {exp['description']}")
-                st.write(f"**Started:** {exp['start_date']}")
-                
-                # Get results
-                results_df = dm.get_experiment_results(exp['experiment_id'])
+    # Re-runs on its own every `refresh` seconds. Each run polls the change
+    # feed (no table reads when nothing changed) and only recomputes the
+    # experiments whose data moved; everything else comes from session state.
+    @st.fragment(run_every=refresh or None)
+    def live_dashboard():
+        live = st.session_state.setdefault('dashboard', {'state': None, 'experiments': None, 'summaries': {}, 'srm': {}})
+        state = get_change_feed().current()
+        changes = ChangeFeed.changes(live['state'], state)
+        if changes:
+            # Read what the feed just saw, not a snapshot up to a second old
+            dm.refresh()
+        
+        if changes.catalog_changed:
+            live['experiments'] = dm.get_active_experiments()
+        active_exps = live['experiments']
+        
+        ids = [int(i) for i in active_exps['experiment_id']]
+        stale = [i for i in ids if i in changes.experiments or i not in live['summaries']]
+        if stale:
+            # Snapshots written by the checker; only changed experiments are recomputed
+            fresh = get_current_summaries(dm, calc, stale)
+            for experiment_id in stale:
+                live['summaries'][experiment_id] = fresh.get(experiment_id)
+        if stale or changes.catalog_changed:
+            # Reads the trigger-maintained variant totals, not the metric rows
+            live['srm'] = srm_checks(dm, ids)
+            if live['state'] is not None:
+                st.toast(f"🔄 {len(stale)} experiment(s) updated")
+        live['state'] = state
+        
+        # Metrics
+        col1, col2, col3, col4 = st.columns(4)
+        
+        with col1:
+            st.metric("Active Experiments", len(active_exps))
+        
+        with col2:
+            st.metric("Tests This Month", 12)
+        
+        with col3:
+            st.metric("Win Rate", "42%", delta="5%")
+        
+        with col4:
+            st.metric("Time to Insight", "3.2 days", delta="-4.8 days")
+        
+        st.caption(f"Last checked {datetime.fromtimestamp(state.checked_at).strftime('%H:%M:%S')}")
+        mismatched = [i for i in ids if live['srm'].get(i) is not None and live['srm'][i].is_mismatch]
+        if mismatched:
+            st.error(f"⚠️ {len(mismatched)} experiment(s) with a sample ratio mismatch - "
+                     "their traffic split does not match the configured allocation.")
+        st.markdown("---")
+        
+        # All experiments with data share small-multiples figures; unchanged
+        # experiments come from the chart cache, so a rerun queries nothing
+        charted = [(i, name, live['summaries'][i].data_version)
+                   for i, name in zip(ids, active_exps['experiment_name'])
+                   if live['summaries'].get(i) is not None]
+        if charted:
+            st.subheader("📈 Conversion Rate Over Time")
+            figures = -(-len(charted) // PANELS_PER_FIGURE)
+            panel_page = st.number_input("Chart page", 1, figures, 1, key="chart_page") if figures > 1 else 1
+            shown = charted[(panel_page - 1) * PANELS_PER_FIGURE:panel_page * PANELS_PER_FIGURE]
+            tracker = RenderTracker(page)
+            for chart in dashboard_charts(dm, get_chart_cache(), shown):
+                tracker.draw(chart, lambda fig: st.plotly_chart(fig, use_container_width=True))
+            get_render_log().record(tracker.finish())
+            st.markdown("---")
+        
+        # Active experiments
+        st.subheader("🟢 Active Experiments")
+        
+        if len(active_exps) > 0:
+            for idx, exp in active_exps.iterrows():
+                days_running = (datetime.now().date() - pd.to_datetime(exp['start_date']).date()).days
                 
-                if len(results_df) >= 2 and results_df['total_impressions'].sum() > 0:
-                    control = results_df[results_df['variant_name'] == 'control'].iloc[0]
-                    variant = results_df[results_df['variant_name'] != 'control'].iloc[0]
+                with st.expander(f"**{exp['experiment_name']}** - Day {days_running}"):
+                    st.write(f"**Description:** {exp['description']}")
+                    st.write(f"**Started:** {exp['start_date']}")
                     
-                    if control['total_impressions'] > 0 and variant['total_impressions'] > 0:
-                        stats = calc.is_significant(
-                            control_conv=int(control['total_conversions']),
-                            control_imp=int(control['total_impressions']),
-                            variant_conv=int(variant['total_conversions']),
-                            variant_imp=int(variant['total_impressions'])
-                        )
-                        
+                    stats = live['summaries'].get(int(exp['experiment_id']))
+                    srm = live['srm'].get(int(exp['experiment_id']))
+                    
+                    if srm is not None and srm.is_mismatch:
+                        split = ', '.join(f"{name} {observed:.1%} (expected {expected:.1%})" for name, observed, expected
+                                          in zip(srm.variant_names, srm.observed_shares, srm.expected_shares))
+                        st.error(f"⚠️ **Sample ratio mismatch** (p = {srm.p_value:.2g}): {split}. "
+                                 "Results are unreliable until the traffic split is fixed.")
+                    
+                    if stats is not None:
                         col1, col2, col3 = st.columns(3)
                         
                         with col1:
-                            st.metric("Control", f"{stats['control_rate']:.2f}%")
+                            st.metric("Control", f"{stats.control_rate:.2f}%")
                         
                         with col2:
                             st.metric(
                                 "Variant", 
-                                f"{stats['variant_rate']:.2f}%",
-                                delta=f"{stats['relative_lift']:.1f}%"
+                                f"{stats.variant_rate:.2f}%",
+                                delta=f"{stats.relative_lift:.1f}%"
                             )
                         
                         with col3:
-                            confidence_icon = "🟢" if stats['is_significant'] else "🟡"
-                            st.metric("Confidence", f"{confidence_icon} {stats['confidence']:.1f}%")
+                            confidence_icon = "🟢" if stats.is_significant else "🟡"
+                            st.metric("Confidence", f"{confidence_icon} {stats.confidence:.1f}%")
                         
                         # Status
-                        if stats['is_significant']:
-                            if stats['winner'] == 'variant':
-                                st.success(f"✅ **WINNER!** Variant shows {stats['relative_lift']:.1f}% improvement")
+                        if stats.is_significant:
+                            if stats.winner == 'variant':
+                                st.success(f"✅ **WINNER!** Variant shows {stats.relative_lift:.1f}% improvement")
                             else:
                                 st.info("ℹ️ No significant improvement detected")
                         else:
                             st.warning("⏳ Keep running - not yet significant")
-                        
-                        # Chart
-                        fig = go.Figure()
-                        
-                        fig.add_trace(go.Bar(
-                            name='Control',
-                            x=['Conversion Rate'],
-                            y=[stats['control_rate']],
-                            marker_color='lightblue',
-                            text=[f"{stats['control_rate']:.2f}%"],
-                            textposition='auto'
-                        ))
-                        
-                        fig.add_trace(go.Bar(
-                            name='Variant',
-                            x=['Conversion Rate'],
-                            y=[stats['variant_rate']],
-                            marker_color='lightgreen',
-                            text=[f"{stats['variant_rate']:.2f}%"],
-                            textposition='auto'
-                        ))
-                        
-                        fig.update_layout(height=250, showlegend=True)
-                        st.plotly_chart(fig, use_container_width=True)
                     else:
-                        st.info("📊 Collecting data... Check back soon!")
+                        st.info("📊 No data yet. Metrics will appear once traffic is recorded.")
+        else:
+            st.info("👋 No active experiments yet. Create one to get started!")
+    
+    live_dashboard()
+
+    # Jobs run by run_scheduler.py (start_auto_check.ps1 / start_email_alerts.ps1)
+    jobs = read_job_status()
+    with st.expander(f"⏱️ Scheduled Jobs ({len(jobs)})"):
+        if jobs:
+            now = datetime.now().isoformat(sep=' ', timespec='seconds')
+            rows = []
+            for job in jobs:
+                if job.running:
+                    state = "🔄 Running"
+                elif job.next_run is None:
+                    state = "⏹️ Stopped"
+                elif job.next_run < now:
+                    state = "⚠️ Overdue"
+                elif job.last_error:
+                    state = "❌ Last run failed"
                 else:
-                    st.info("📊 No data yet. Metrics will appear once traffic is recorded.")
-    else:
-        st.info("👋 No active experiments yet. Create one to get started!")
+                    state = "✅ Scheduled"
+                rows.append({
+                    'Job': job.job,
+                    'State': state,
+                    'Every (s)': int(job.interval_seconds),
+                    'Runs': job.runs,
+                    'Failures': job.failures,
+                    'Skipped (overlap)': job.skipped,
+                    'Last run': job.last_finished or '-',
+                    'Duration (s)': round(job.last_duration, 2) if job.last_duration is not None else None,
+                    'Next run': job.next_run or '-',
+                    'Last result': job.last_result or '',
+                })
+            st.dataframe(pd.DataFrame(rows), hide_index=True, use_container_width=True)
+            for job in jobs:
+                if job.last_error:
+                    st.error(f"**{job.job}** failed at {job.last_finished}:\n\n```\n{job.last_error}\n```")
+        else:
+            st.info("No scheduled jobs yet. Start them with `python run_scheduler.py` "
+                    "(or start_auto_check.ps1 / start_email_alerts.ps1).")
 
 # ============= CREATE EXPERIMENT PAGE =============
 elif page == "➕ Create Experiment":
@@ -191,6 +302,39 @@ elif page == "➕ Create Experiment":
         if total_allocation != 100:
             st.warning(f"⚠️ Traffic allocation = {total_allocation}% (should be 100%)")
         
+        allocation_mode = st.selectbox(
+            "Traffic allocation",
+            ALLOCATION_MODES,
+            format_func={'fixed': 'Fixed split', 'thompson': 'Bandit: Thompson sampling',
+                         'ucb': 'Bandit: upper confidence bound'}.get,
+            help="Bandits start from the split above and move traffic to the better variants "
+                 "each time `python -m core.bandit` runs"
+        )
+        
+        st.markdown("---")
+        st.subheader("🛡️ Metrics")
+        
+        optional_metrics = [name for name in PRESET_METRICS if name != 'conversion_rate']
+        
+        col1, col2 = st.columns(2)
+        
+        with col1:
+            secondary_metrics = st.multiselect("Secondary metrics", optional_metrics)
+        
+        with col2:
+            guardrail_metrics = st.multiselect(
+                "Guardrail metrics",
+                optional_metrics,
+                help="Flagged if they get significantly worse"
+            )
+        
+        guardrail_threshold = st.number_input("Guardrail tolerance (%)", min_value=0.0, value=1.0)
+        
+        metrics = [PRESET_METRICS['conversion_rate']]
+        metrics += [PRESET_METRICS[name]._replace(role='secondary') for name in secondary_metrics]
+        metrics += [PRESET_METRICS[name]._replace(role='guardrail', threshold=guardrail_threshold)
+                    for name in guardrail_metrics]
+        
         st.markdown("---")
         
         st.subheader("📊 Sample Size Calculator")
@@ -226,7 +370,9 @@ elif page == "➕ Create Experiment":
                         hypothesis=hypothesis,
                         start_date=start_date,
                         created_by=created_by,
-                        variants=variants
+                        variants=variants,
+                        metrics=metrics,
+                        allocation_mode=allocation_mode
                     )
                     
                     st.success(f"""
@@ -242,6 +388,69 @@ elif page == "➕ Create Experiment":
                     
                 except Exception as e:
                     st.error(f"❌ Error: {str(e)}")
+    
+    # Outside the form so the button runs the simulation right away
+    st.markdown("---")
+    st.subheader("🎲 Power Simulation")
+    st.caption("Simulates thousands of experiments day by day with the same significance rule "
+               "the checker uses: control against the first other variant, checked daily. "
+               "Extra variants are not tested; they only take their share of the traffic.")
+    
+    col1, col2, col3, col4 = st.columns(4)
+    
+    with col1:
+        sim_baseline = st.number_input("Baseline Conv. Rate (%)", value=10.0, key="sim_baseline") / 100
+        sim_lift = st.number_input("True Lift (%)", value=5.0, key="sim_lift") / 100
+    
+    with col2:
+        sim_traffic = st.number_input("Daily Traffic", value=10000, min_value=1, key="sim_traffic")
+        sim_days = st.number_input("Max Days", value=28, min_value=1, max_value=365, key="sim_days")
+    
+    with col3:
+        sim_variants = st.number_input("Variants (incl. control)", min_value=2, max_value=4, value=2, key="sim_variants")
+        sim_weekend = st.number_input("Weekend Traffic Factor", value=1.0, min_value=0.0, step=0.1, key="sim_weekend")
+    
+    with col4:
+        sim_peek = st.checkbox("Checked daily (peeking)", value=True, key="sim_peek")
+        sim_trajectories = st.select_slider("Trajectories", options=[1000, 10000, 50000, 100000], value=10000)
+    
+    if st.button("🎲 Run Simulation"):
+        config = SimulationConfig(
+            baseline_rate=sim_baseline,
+            relative_lift=sim_lift,
+            variants=int(sim_variants),
+            daily_traffic=int(sim_traffic),
+            days=int(sim_days),
+            traffic_pattern=weekly_pattern(sim_weekend, date.today().weekday()),
+            peek_every=1 if sim_peek else 0,
+            trajectories=int(sim_trajectories)
+        )
+        
+        with st.spinner("Simulating..."):
+            sim = simulate_power(config, calc)
+        
+        col1, col2, col3, col4 = st.columns(4)
+        
+        with col1:
+            st.metric("Power", f"{sim.power:.1%}")
+        with col2:
+            st.metric("False Positive Rate", f"{sim.false_positive_rate:.1%}",
+                      delta=f"alpha {calc.alpha:.0%}", delta_color="off")
+        with col3:
+            st.metric("Median Days to Decision", sim.days_to_decision() or "—")
+        with col4:
+            st.metric("Days to 80% Power", sim.days_to_power(0.8) or f"> {int(sim_days)}")
+        
+        fig = go.Figure()
+        days_axis = list(range(1, int(sim_days) + 1))
+        fig.add_trace(go.Scatter(x=days_axis, y=[v * 100 for v in sim.decided_by_day], name='Winner found (%)'))
+        fig.add_trace(go.Scatter(x=days_axis, y=[v * 100 for v in sim.false_positives_by_day], name='A/A false positive (%)'))
+        fig.update_layout(height=300, xaxis_title="Day", yaxis_title="% of simulated experiments")
+        st.plotly_chart(fig, use_container_width=True)
+        
+        if sim_peek:
+            st.info(f"📏 With a single look on day {int(sim_days)}: power {sim.fixed_horizon_power:.1%}, "
+                    f"false positive rate {sim.fixed_horizon_false_positive_rate:.1%}")
 
 # ============= RESULTS PAGE =============
 else:
@@ -264,64 +473,113 @@ else:
             st.subheader(exp_info['experiment_name'])
             st.caption(f"Started: {exp_info['start_date']} • Status: {exp_info['status']}")
             
-            results_df = dm.get_experiment_results(selected_id)
+            stats = get_current_summaries(dm, calc, [selected_id]).get(int(selected_id))
             
-            if len(results_df) >= 2 and results_df['total_impressions'].sum() > 0:
-                control = results_df[results_df['variant_name'] == 'control'].iloc[0]
-                variant = results_df[results_df['variant_name'] != 'control'].iloc[0]
+            if stats is not None:
+                col1, col2, col3, col4 = st.columns(4)
                 
-                if control['total_impressions'] > 0 and variant['total_impressions'] > 0:
-                    stats = calc.is_significant(
-                        control_conv=int(control['total_conversions']),
-                        control_imp=int(control['total_impressions']),
-                        variant_conv=int(variant['total_conversions']),
-                        variant_imp=int(variant['total_impressions'])
-                    )
-                    
-                    col1, col2, col3, col4 = st.columns(4)
-                    
-                    with col1:
-                        st.metric("Control", f"{stats['control_rate']:.2f}%")
-                    with col2:
-                        st.metric("Variant", f"{stats['variant_rate']:.2f}%", delta=f"{stats['relative_lift']:.1f}%")
-                    with col3:
-                        st.metric("Confidence", f"{stats['confidence']:.1f}%")
-                    with col4:
-                        st.metric("P-Value", f"{stats['p_value']:.4f}")
-                    
-                    st.markdown("---")
-                    
-                    # Detailed table
-                    comparison = pd.DataFrame({
-                        'Metric': ['Impressions', 'Conversions', 'Conversion Rate', 'Revenue'],
-                        'Control': [
-                            f"{int(control['total_impressions']):,}",
-                            f"{int(control['total_conversions']):,}",
-                            f"{stats['control_rate']:.2f}%",
-                            f"${float(control['total_revenue']):,.2f}"
-                        ],
-                        'Variant': [
-                            f"{int(variant['total_impressions']):,}",
-                            f"{int(variant['total_conversions']):,}",
-                            f"{stats['variant_rate']:.2f}%",
-                            f"${float(variant['total_revenue']):,.2f}"
-                        ]
-                    })
-                    
-                    st.dataframe(comparison, use_container_width=True, hide_index=True)
-                    
-                    st.markdown("---")
-                    
-                    # Recommendation
-                    if stats['is_significant']:
-                        if stats['winner'] == 'variant':
-                            st.success(f"### ✅ Ship the Variant!\n\n**{stats['relative_lift']:.1f}% improvement** with {stats['confidence']:.1f}% confidence")
-                        else:
-                            st.info("### ℹ️ Keep Current Version\n\nNo significant improvement detected.")
+                with col1:
+                    st.metric("Control", f"{stats.control_rate:.2f}%")
+                with col2:
+                    st.metric("Variant", f"{stats.variant_rate:.2f}%", delta=f"{stats.relative_lift:.1f}%")
+                with col3:
+                    st.metric("Confidence", f"{stats.confidence:.1f}%")
+                with col4:
+                    st.metric("P-Value", f"{stats.p_value:.4f}")
+                
+                st.markdown("---")
+                
+                # Detailed table
+                comparison = pd.DataFrame({
+                    'Metric': ['Impressions', 'Conversions', 'Conversion Rate', 'Revenue'],
+                    'Control': [
+                        f"{stats.control_impressions:,}",
+                        f"{stats.control_conversions:,}",
+                        f"{stats.control_rate:.2f}%",
+                        f"${stats.control_revenue:,.2f}"
+                    ],
+                    'Variant': [
+                        f"{stats.variant_impressions:,}",
+                        f"{stats.variant_conversions:,}",
+                        f"{stats.variant_rate:.2f}%",
+                        f"${stats.variant_revenue:,.2f}"
+                    ]
+                })
+                
+                st.dataframe(comparison, use_container_width=True, hide_index=True)
+                
+                # Downsampled to a fixed point budget and cached by data version
+                tracker = RenderTracker(page)
+                tracker.draw(experiment_chart(dm, get_chart_cache(), int(selected_id), stats.data_version,
+                                              title="📈 Conversion Rate Over Time"),
+                             lambda fig: st.plotly_chart(fig, use_container_width=True))
+                get_render_log().record(tracker.finish())
+                
+                # Bandit experiments: how the split moved over the allocation cycles
+                allocation_mode = dm.get_allocation_modes([int(selected_id)]).get(int(selected_id), 'fixed')
+                history = dm.get_allocation_history(int(selected_id)) if allocation_mode != 'fixed' else None
+                
+                if history is not None and not history.empty:
+                    st.subheader(f"🎰 Traffic Allocation ({allocation_mode})")
+                    fig = go.Figure()
+                    for variant_name, rows in history.groupby('variant_name', sort=False):
+                        fig.add_trace(go.Scatter(x=rows['computed_at'], y=rows['traffic_allocation'],
+                                                 name=variant_name, mode='lines+markers'))
+                    fig.update_layout(height=300, xaxis_title="Allocation cycle", yaxis_title="Traffic %")
+                    st.plotly_chart(fig, use_container_width=True)
+                
+                # Every declared metric for every variant, from one scan
+                metric_results = evaluate_metrics(dm, calc, int(selected_id))
+                regressions = guardrail_regressions(metric_results)
+                
+                for r in regressions:
+                    st.error(f"🚨 Guardrail **{r.metric_name}** regressed {r.relative_change:+.1f}% "
+                             f"in {r.variant_name} (p = {r.p_value:.4f})")
+                
+                if metric_results:
+                    st.subheader("🛡️ All Metrics")
+                    st.dataframe(pd.DataFrame({
+                        'Metric': [r.metric_name for r in metric_results],
+                        'Role': [r.role for r in metric_results],
+                        'Variant': [r.variant_name for r in metric_results],
+                        'Control': [f"{r.control_value:,.4f}" for r in metric_results],
+                        'Value': [f"{r.variant_value:,.4f}" for r in metric_results],
+                        'Change': [f"{r.relative_change:+.1f}%" for r in metric_results],
+                        'P-Value': [f"{r.p_value:.4f}" for r in metric_results],
+                        'Status': ['🚨 Regression' if r.regression else '✅ Significant' if r.is_significant else '⏳'
+                                   for r in metric_results],
+                    }), use_container_width=True, hide_index=True)
+                
+                # Per-segment lifts, shrunk towards the experiment's overall effect
+                top = top_segments(heterogeneous_effects(dm, [int(selected_id)], calc=calc), n=10)
+                
+                if not top.empty:
+                    st.subheader("🎯 Top Responding Segments")
+                    st.caption("Lifts are shrunk towards the experiment's overall lift; "
+                               "small segments move the most.")
+                    st.dataframe(pd.DataFrame({
+                        'Segment': top['segment'],
+                        'Variant': top['variant_name'],
+                        'Impressions': [f"{int(c + v):,}" for c, v in
+                                        zip(top['control_impressions'], top['variant_impressions'])],
+                        'Observed Lift': [f"{v:+.1f}%" for v in top['observed_lift']],
+                        'Estimated Lift': [f"{v:+.1f}%" for v in top['shrunk_lift']],
+                        'Interval': [f"{lo:+.1f}% to {hi:+.1f}%" for lo, hi in zip(top['lift_low'], top['lift_high'])],
+                        'P(Better)': [f"{p:.0%}" for p in top['prob_positive']],
+                    }), use_container_width=True, hide_index=True)
+                
+                st.markdown("---")
+                
+                # Recommendation
+                if regressions:
+                    st.error("### 🛑 Hold\n\nA guardrail metric regressed; investigate before shipping.")
+                elif stats.is_significant:
+                    if stats.winner == 'variant':
+                        st.success(f"### ✅ Ship the Variant!\n\n**{stats.relative_lift:.1f}% improvement** with {stats.confidence:.1f}% confidence")
                     else:
-                        st.warning(f"### ⏳ Keep Running\n\nCurrent confidence: {stats['confidence']:.1f}% (need 95%+)")
+                        st.info("### ℹ️ Keep Current Version\n\nNo significant improvement detected.")
                 else:
-                    st.info("📊 Waiting for traffic data...")
+                    st.warning(f"### ⏳ Keep Running\n\nCurrent confidence: {stats.confidence:.1f}% (need 95%+)")
             else:
                 st.info("📊 No data available yet.")
     else:
@@ -329,4 +587,14 @@ else:
 
 # Footer
 st.sidebar.markdown("---")
+cache_stats = calc.cache.stats()
+st.sidebar.caption(f"Significance cache: {cache_stats['hits']:,} hits / {cache_stats['misses']:,} misses "
+                   f"({cache_stats['hit_rate']:.0%})")
+render_stats = get_render_log().summary(page)
+if render_stats is not None:
+    last = render_stats['last']
+    st.sidebar.caption(f"Charts: {last.figures} figure(s), {last.points:,} points, "
+                       f"{last.payload_bytes / 1024:,.0f} KB, {(last.build_seconds + last.render_seconds) * 1000:.0f} ms "
+                       f"({last.cache_hits} cached; median {render_stats['median_seconds'] * 1000:.0f} ms "
+                       f"over {render_stats['runs']} runs)")
 st.sidebar.caption("Built with ❤️ using Streamlit and Pamela Austin's Engineering")
\ No newline at end of file
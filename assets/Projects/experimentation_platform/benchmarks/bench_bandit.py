@@ -0,0 +1,72 @@
+"""
+Bandit allocation benchmarks.
+
+'bandit.update_allocations_*' build a dedicated database of 5,000
+experiments x 3 variants in bandit mode and time one full allocation
+cycle: reading the trigger-maintained totals, computing every split in
+one vectorized pass, and writing the splits and their history in one
+transaction. 'bandit.regret_*' run the regret simulation (1,000 runs x
+28 days) and report the expected regret against a fixed equal split.
+"""
+
+import os
+import sqlite3
+
+from benchmarks.harness import BenchContext, benchmark
+from benchmarks.synthetic_data import SyntheticConfig, generate_database
+from core.bandit import simulate_regret, update_allocations
+from core.data_manager import ExperimentDataManager
+
+BANDIT_CONFIG = SyntheticConfig(experiments=5000, variants=3, days=7, rows_per_day=1)
+REGRET_RATES = (0.10, 0.11, 0.12)
+
+
+def _bandit_db(ctx: BenchContext, mode: str) -> ExperimentDataManager:
+    path = os.path.join(ctx.work_dir, f"bandit_{mode}.db")
+    if not os.path.exists(path):
+        generate_database(path, BANDIT_CONFIG)
+        conn = sqlite3.connect(path)
+        conn.execute("UPDATE experiments SET status = 'running', allocation_mode = ?", (mode,))
+        conn.commit()
+        conn.close()
+    return ExperimentDataManager(path)
+
+
+def _cycle(ctx: BenchContext, mode: str):
+    dm = _bandit_db(ctx, mode)
+
+    def run():
+        cycle = update_allocations(dm, seed=42)
+        return {'experiments': cycle.experiments, 'variants': cycle.variants}
+    return run
+
+
+def _regret(method: str):
+    def run():
+        result = simulate_regret(REGRET_RATES, method=method, runs=1000, seed=42)
+        return {
+            'regret': round(result.expected_regret),
+            'fixed_split_regret': round(result.fixed_split_regret),
+            'reduction': f"{result.regret_reduction:.0%}",
+        }
+    return run
+
+
+@benchmark('bandit.update_allocations_thompson', repeat=3, group='bandit')
+def bench_update_thompson(ctx: BenchContext):
+    return _cycle(ctx, 'thompson')
+
+
+@benchmark('bandit.update_allocations_ucb', repeat=3, group='bandit')
+def bench_update_ucb(ctx: BenchContext):
+    return _cycle(ctx, 'ucb')
+
+
+@benchmark('bandit.regret_thompson', repeat=1, group='bandit')
+def bench_regret_thompson(ctx: BenchContext):
+    return _regret('thompson')
+
+
+@benchmark('bandit.regret_ucb', repeat=1, group='bandit')
+def bench_regret_ucb(ctx: BenchContext):
+    return _regret('ucb')
@@ -0,0 +1,73 @@
+"""
+Bulk import/export benchmarks.
+
+'bulk_io.export_*' streams every metric row of the benchmark database to
+a CSV or Parquet file. 'bulk_io.import_*' loads that file, through the
+same validation and bulk insert path as `python bulk_io.py import`, into
+a copy of the database whose metric rows were cleared (each repeat
+appends the rows again).
+"""
+
+import os
+import shutil
+import sqlite3
+
+from benchmarks.harness import BenchContext, benchmark
+from bulk_io import export_file, import_file
+from core.data_manager import ExperimentDataManager
+
+
+def _exported(ctx: BenchContext, extension: str) -> str:
+    path = os.path.join(ctx.work_dir, f"bulk_source.{extension}")
+    if not os.path.exists(path):
+        export_file(ExperimentDataManager(ctx.db_path), path)
+    return path
+
+
+def _empty_copy(ctx: BenchContext, name: str) -> ExperimentDataManager:
+    """Copy of the benchmark database with experiments and variants but no metric rows"""
+    path = os.path.join(ctx.work_dir, name)
+    shutil.copyfile(ctx.db_path, path)
+    conn = sqlite3.connect(path)
+    conn.execute("DELETE FROM experiment_metrics")
+    conn.commit()
+    conn.close()
+    return ExperimentDataManager(path)
+
+
+def _export_bench(ctx: BenchContext, extension: str):
+    dm = ExperimentDataManager(ctx.db_path)
+    path = os.path.join(ctx.work_dir, f"bulk_export.{extension}")
+
+    def run():
+        return {'rows': export_file(dm, path)['rows']}
+    return run
+
+
+def _import_bench(ctx: BenchContext, extension: str):
+    source = _exported(ctx, extension)
+    dm = _empty_copy(ctx, f"bulk_import_{extension}.db")
+
+    def run():
+        return {'rows': import_file(dm, source)['rows']}
+    return run
+
+
+@benchmark('bulk_io.export_csv', repeat=3, group='bulk_io')
+def bench_export_csv(ctx: BenchContext):
+    return _export_bench(ctx, 'csv')
+
+
+@benchmark('bulk_io.export_parquet', repeat=3, group='bulk_io')
+def bench_export_parquet(ctx: BenchContext):
+    return _export_bench(ctx, 'parquet')
+
+
+@benchmark('bulk_io.import_csv', repeat=3, group='bulk_io')
+def bench_import_csv(ctx: BenchContext):
+    return _import_bench(ctx, 'csv')
+
+
+@benchmark('bulk_io.import_parquet', repeat=3, group='bulk_io')
+def bench_import_parquet(ctx: BenchContext):
+    return _import_bench(ctx, 'parquet')
@@ -0,0 +1,98 @@
+"""
+Chart data benchmarks: the Dashboard's small-multiples figure for 12
+long-running experiments (3 variants x 1,000 days each).
+
+'charts.dashboard_full' builds it at full resolution as a baseline for
+the payload; 'charts.dashboard_cold' downsamples to POINT_BUDGET points
+per line with an empty cache; 'charts.dashboard_warm' is a rerun where
+nothing changed and 'charts.dashboard_one_changed' one where a single
+experiment's data version moved. All report the points and JSON payload
+bytes sent. 'charts.lttb' downsamples a 1M-point series to 1,000 points.
+"""
+
+import os
+
+import numpy as np
+
+from benchmarks.harness import BenchContext, benchmark
+from benchmarks.synthetic_data import SyntheticConfig, generate_database
+from core.chart_data import ChartCache, dashboard_charts, lttb
+from core.data_manager import ExperimentDataManager
+
+EXPERIMENTS = 12
+DAYS = 1_000
+
+
+def _long_experiments(ctx: BenchContext):
+    """Scratch database of long experiments (built once per run) and its panels"""
+    path = os.path.join(ctx.work_dir, 'charts.db')
+    if not os.path.exists(path):
+        generate_database(path, SyntheticConfig(experiments=EXPERIMENTS, variants=3, days=DAYS))
+    dm = ExperimentDataManager(path)
+    ids = list(range(1, EXPERIMENTS + 1))
+    versions = dm.get_data_versions(ids)
+    return dm, [(i, f"Experiment {i}", versions[i]) for i in ids]
+
+
+def _result(charts) -> dict:
+    return {
+        'calls': len(charts),
+        'points': sum(spec.points for spec, _ in charts),
+        'payload_bytes': sum(spec.payload_bytes for spec, _ in charts),
+    }
+
+
+@benchmark('charts.dashboard_full', repeat=3, group='charts')
+def bench_dashboard_full(ctx: BenchContext):
+    dm, experiments = _long_experiments(ctx)
+
+    def run():
+        return _result(dashboard_charts(dm, ChartCache(budget=None), experiments))
+    return run
+
+
+@benchmark('charts.dashboard_cold', repeat=3, group='charts')
+def bench_dashboard_cold(ctx: BenchContext):
+    dm, experiments = _long_experiments(ctx)
+
+    def run():
+        return _result(dashboard_charts(dm, ChartCache(), experiments))
+    return run
+
+
+@benchmark('charts.dashboard_warm', repeat=10, group='charts')
+def bench_dashboard_warm(ctx: BenchContext):
+    dm, experiments = _long_experiments(ctx)
+    cache = ChartCache()
+    dashboard_charts(dm, cache, experiments)
+
+    def run():
+        return _result(dashboard_charts(dm, cache, experiments))
+    return run
+
+
+@benchmark('charts.dashboard_one_changed', repeat=5, group='charts')
+def bench_dashboard_one_changed(ctx: BenchContext):
+    dm, experiments = _long_experiments(ctx)
+    cache = ChartCache()
+    dashboard_charts(dm, cache, experiments)
+
+    def run():
+        # A new data version for the first experiment, as after log_metrics
+        experiment_id, title, version = experiments[0]
+        experiments[0] = (experiment_id, title, version + 1)
+        return _result(dashboard_charts(dm, cache, experiments))
+    return run
+
+
+@benchmark('charts.lttb', repeat=5, group='charts')
+def bench_lttb(ctx: BenchContext):
+    n = 1_000_000
+    rng = np.random.default_rng(42)
+    x = np.arange(n, dtype=float)
+    y = np.cumsum(rng.normal(size=n))
+
+    def run():
+        lttb(x, y, 1_000)
+        return {'rows': n}
+    return run
@@ -0,0 +1,169 @@
+"""
+Benchmarks for the core data manager, statistical engine and checker scripts.
+"""
+
+import contextlib
+import io
+import os
+import shutil
+
+from benchmarks.harness import BenchContext, benchmark
+from core.data_manager import ExperimentDataManager
+from core.statistical_engine import ABTestCalculator
+
+
+@contextlib.contextmanager
+def _in_dir(path: str):
+    """Run with `path` as the working directory and stdout silenced"""
+    previous = os.getcwd()
+    os.chdir(path)
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            yield
+    finally:
+        os.chdir(previous)
+
+
+@benchmark('ingestion.log_metrics', repeat=3, group='ingestion')
+def bench_log_metrics(ctx: BenchContext):
+    # Work on a copy so the shared database stays the same for other benchmarks
+    scratch = os.path.join(ctx.work_dir, 'ingest.db')
+    shutil.copyfile(ctx.db_path, scratch)
+    dm = ExperimentDataManager(scratch)
+    experiment_id = ctx.info['experiment_ids'][0]
+    n = 500
+
+    def run():
+        for i in range(n):
+            dm.log_metrics(experiment_id, 'control', '2024-06-01', 1000, 100 + i % 7, 250.0)
+        return {'rows': n}
+    return run
+
+
+@benchmark('ingestion.bulk_generate', repeat=3, group='ingestion')
+def bench_bulk_generate(ctx: BenchContext):
+    from benchmarks.synthetic_data import SyntheticConfig, generate_database
+
+    config = SyntheticConfig(experiments=10, days=100, rows_per_day=10)
+    scratch = os.path.join(ctx.work_dir, 'bulk.db')
+
+    def run():
+        info = generate_database(scratch, config)
+        return {'rows': info['metric_rows']}
+    return run
+
+
+@benchmark('data_manager.get_active_experiments', repeat=10, group='queries')
+def bench_active(ctx: BenchContext):
+    dm = ExperimentDataManager(ctx.db_path)
+
+    def run():
+        dm.get_active_experiments()
+        return {'calls': 1}
+    return run
+
+
+@benchmark('data_manager.get_experiment_results', repeat=3, group='queries')
+def bench_results(ctx: BenchContext):
+    dm = ExperimentDataManager(ctx.db_path)
+    ids = ctx.info['experiment_ids']
+
+    def run():
+        for experiment_id in ids:
+            dm.get_experiment_results(experiment_id)
+        return {'calls': len(ids)}
+    return run
+
+
+@benchmark('statistics.is_significant', repeat=5, group='statistics')
+def bench_is_significant(ctx: BenchContext):
+    calc = ABTestCalculator()
+    n = 20_000
+
+    def run():
+        for i in range(n):
+            calc.is_significant(1000 + i % 50, 10_000, 1100, 10_000)
+        return {'calls': n}
+    return run
+
+
+@benchmark('statistics.evaluate', repeat=5, group='statistics')
+def bench_evaluate(ctx: BenchContext):
+    calc = ABTestCalculator()
+    n = 20_000
+
+    def run():
+        for i in range(n):
+            calc.evaluate(1000 + i % 50, 10_000, 1100, 10_000)
+        return {'calls': n}
+    return run
+
+
+@benchmark('statistics.is_significant_legacy', repeat=5, group='statistics')
+def bench_is_significant_legacy(ctx: BenchContext):
+    """The original NumPy/SciPy implementation, kept as a baseline"""
+    import numpy as np
+    from scipy import stats
+
+    def legacy(control_conv, control_imp, variant_conv, variant_imp, alpha=0.20):
+        p1 = control_conv / control_imp
+        p2 = variant_conv / variant_imp
+        p_pool = (control_conv + variant_conv) / (control_imp + variant_imp)
+        se = np.sqrt(p_pool * (1 - p_pool) * (1/control_imp + 1/variant_imp))
+        z_score = (p2 - p1) / se
+        p_value = 2 * (1 - stats.norm.cdf(abs(z_score)))
+        lift = p2 - p1
+        return {
+            'is_significant': p_value < alpha,
+            'p_value': p_value,
+            'confidence': (1 - p_value) * 100,
+            'z_score': z_score,
+            'control_rate': p1 * 100,
+            'variant_rate': p2 * 100,
+            'absolute_lift': lift * 100,
+            'relative_lift': lift / p1 * 100,
+            'winner': 'variant' if (p_value < alpha and lift > 0) else 'control' if (p_value < alpha and lift < 0) else 'inconclusive'
+        }
+
+    n = 5_000
+
+    def run():
+        for i in range(n):
+            legacy(1000 + i % 50, 10_000, 1100, 10_000)
+        return {'calls': n}
+    return run
+
+
+@benchmark('statistics.calculate_sample_size', repeat=5, group='statistics')
+def bench_sample_size(ctx: BenchContext):
+    calc = ABTestCalculator()
+    n = 20_000
+
+    def run():
+        for i in range(n):
+            calc.calculate_sample_size(0.10, 0.01 + (i % 10) / 1000)
+        return {'calls': n}
+    return run
+
+
+@benchmark('scripts.check_results', repeat=3, group='scripts')
+def bench_check_results(ctx: BenchContext):
+    import check_results
+
+    def run():
+        with _in_dir(ctx.work_dir):
+            check_results.check_and_save_results()
+    return run
+
+
+@benchmark('scripts.email_results', repeat=3, group='scripts')
+def bench_email_results(ctx: BenchContext):
+    import email_results
+
+    # Never talk to a real SMTP server while benchmarking
+    email_results.send_email = lambda subject, body_html: True
+
+    def run():
+        with _in_dir(ctx.work_dir):
+            email_results.check_and_notify()
+    return run
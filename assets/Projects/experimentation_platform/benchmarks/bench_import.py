@@ -0,0 +1,67 @@
+"""
+Cold-start benchmarks for the checker scripts.
+
+Each run starts a fresh interpreter with `-X importtime` and records the
+cumulative import time reported by Python, plus which heavy libraries
+ended up being imported. 'startup.legacy_imports' reproduces what the
+scripts used to import (pandas + NumPy + scipy.stats) as a baseline.
+"""
+
+import os
+import subprocess
+import sys
+
+from benchmarks.harness import BenchContext, benchmark
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HEAVY_MODULES = ('pandas', 'numpy', 'scipy')
+
+
+def import_profile(statement: str) -> dict:
+    """
+    Run `statement` in a new interpreter with -X importtime.
+
+    Returns:
+        {'import_us': total top-level cumulative microseconds,
+         'heavy_modules': heavy top-level packages that were imported}
+    """
+    out = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', statement],
+        cwd=PROJECT_ROOT, capture_output=True, text=True, check=True
+    )
+
+    total_us = 0
+    heavy = set()
+    for line in out.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        # Nested imports are indented; only top-level entries add up to the total
+        if not name.startswith('  '):
+            total_us += int(cumulative)
+        package = name.strip().split('.')[0]
+        if package in HEAVY_MODULES:
+            heavy.add(package)
+
+    return {'import_us': total_us, 'heavy_modules': sorted(heavy)}
+
+
+@benchmark('startup.check_results', repeat=5, group='startup')
+def bench_check_results_import(ctx: BenchContext):
+    def run():
+        return import_profile('import check_results')
+    return run
+
+
+@benchmark('startup.email_results', repeat=5, group='startup')
+def bench_email_results_import(ctx: BenchContext):
+    def run():
+        return import_profile('import email_results')
+    return run
+
+
+@benchmark('startup.legacy_imports', repeat=5, group='startup')
+def bench_legacy_imports(ctx: BenchContext):
+    def run():
+        return import_profile('import pandas, numpy; from scipy import stats')
+    return run
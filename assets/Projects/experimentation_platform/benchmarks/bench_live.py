@@ -0,0 +1,74 @@
+"""
+Live dashboard benchmarks: the database work behind one refresh.
+
+'live.full_rerun' is what a page reload did: list the active experiments
+and load every experiment's summary. 'live.poll_idle' is a change-feed
+poll when nothing changed (the common case for a dashboard left open),
+and 'live.poll_one_change' a poll after one experiment got new metrics,
+including recomputing that experiment.
+"""
+
+import os
+import shutil
+from datetime import date
+
+from benchmarks.harness import BenchContext, benchmark
+from core.change_feed import ChangeFeed
+from core.data_manager import ExperimentDataManager
+from core.experiment_summary import get_current_summaries
+from core.statistical_engine import ABTestCalculator
+
+POLLS = 1000
+
+
+def _live_db(ctx: BenchContext) -> ExperimentDataManager:
+    path = os.path.join(ctx.work_dir, 'live.db')
+    if not os.path.exists(path):
+        shutil.copyfile(ctx.db_path, path)
+        dm = ExperimentDataManager(path)
+        # Stored snapshots, as the checker leaves them
+        get_current_summaries(dm, ABTestCalculator(), ctx.info['experiment_ids'], save=True)
+    return ExperimentDataManager(path)
+
+
+@benchmark('live.full_rerun', repeat=5, group='live')
+def bench_full_rerun(ctx: BenchContext):
+    dm = _live_db(ctx)
+    calc = ABTestCalculator()
+
+    def run():
+        ids = [exp.experiment_id for exp in dm.get_active_experiment_rows()]
+        get_current_summaries(dm, calc, ids)
+        return {'calls': 1}
+    return run
+
+
+@benchmark('live.poll_idle', repeat=5, group='live')
+def bench_poll_idle(ctx: BenchContext):
+    feed = ChangeFeed(_live_db(ctx))
+    feed.current()
+
+    def run():
+        for _ in range(POLLS):
+            feed.current()
+        return {'calls': POLLS, 'table_reads': feed.reads - 1}
+    return run
+
+
+@benchmark('live.poll_one_change', repeat=5, group='live')
+def bench_poll_one_change(ctx: BenchContext):
+    dm = _live_db(ctx)
+    calc = ABTestCalculator()
+    feed = ChangeFeed(dm)
+    experiment_id = ctx.info['experiment_ids'][0]
+    state = feed.current()
+
+    def run():
+        nonlocal state
+        dm.log_metrics(experiment_id, 'control', date(2024, 6, 1), 100, 10, 25.0)
+        after = feed.current()
+        changed = ChangeFeed.changes(state, after).experiments
+        get_current_summaries(dm, calc, changed)
+        state = after
+        return {'calls': 1, 'recomputed': len(changed)}
+    return run
@@ -0,0 +1,55 @@
+"""
+Multi-metric evaluation benchmarks.
+
+Every experiment of the shared database gets all PRESET_METRICS (one
+primary, the rest guardrails). 'metrics.evaluate_single_scan' evaluates
+them from one grouped scan per experiment; 'metrics.evaluate_per_metric'
+is the naive alternative of one scan per metric, for comparison.
+"""
+
+import os
+import shutil
+
+from benchmarks.harness import BenchContext, benchmark
+from core.data_manager import ExperimentDataManager
+from core.metric_evaluation import PRESET_METRICS, evaluate_metrics
+from core.statistical_engine import ABTestCalculator
+
+
+def _metrics_db(ctx: BenchContext) -> ExperimentDataManager:
+    path = os.path.join(ctx.work_dir, 'metrics.db')
+    if not os.path.exists(path):
+        shutil.copyfile(ctx.db_path, path)
+        dm = ExperimentDataManager(path)
+        for experiment_id in ctx.info['experiment_ids']:
+            for name, metric in PRESET_METRICS.items():
+                role = 'primary' if name == 'conversion_rate' else 'guardrail'
+                dm.add_metric_definition(experiment_id, metric._replace(role=role))
+    return ExperimentDataManager(path)
+
+
+@benchmark('metrics.evaluate_single_scan', repeat=5, group='metrics')
+def bench_single_scan(ctx: BenchContext):
+    dm = _metrics_db(ctx)
+    calc = ABTestCalculator()
+    experiment_ids = ctx.info['experiment_ids']
+
+    def run():
+        for experiment_id in experiment_ids:
+            evaluate_metrics(dm, calc, experiment_id)
+        return {'calls': len(experiment_ids), 'metrics': len(PRESET_METRICS)}
+    return run
+
+
+@benchmark('metrics.evaluate_per_metric', repeat=5, group='metrics')
+def bench_per_metric(ctx: BenchContext):
+    dm = _metrics_db(ctx)
+    calc = ABTestCalculator()
+    experiment_ids = ctx.info['experiment_ids']
+
+    def run():
+        for experiment_id in experiment_ids:
+            for metric in dm.get_metric_definitions(experiment_id):
+                evaluate_metrics(dm, calc, experiment_id, [metric._replace(role='primary')])
+        return {'calls': len(experiment_ids), 'metrics': len(PRESET_METRICS)}
+    return run
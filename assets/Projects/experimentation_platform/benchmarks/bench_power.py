@@ -0,0 +1,39 @@
+"""
+Power simulation benchmarks.
+
+'power.simulate_10k' is the Create Experiment page's default run
+(10,000 trajectories plus as many A/A trajectories, 28 days, daily
+checks). 'power.simulate_pool' spreads a larger run over a process pool
+sized to the machine; its size grows with the profile.
+"""
+
+import os
+
+from benchmarks.harness import BenchContext, benchmark
+from core.power_simulation import SimulationConfig, simulate_power, weekly_pattern
+from core.statistical_engine import ABTestCalculator
+
+POOL_TRAJECTORIES = {'small': 100_000, 'medium': 200_000, 'large': 1_000_000}
+
+
+@benchmark('power.simulate_10k', repeat=3, group='power')
+def bench_simulate_10k(ctx: BenchContext):
+    config = SimulationConfig(trajectories=10_000, traffic_pattern=weekly_pattern(0.6), seed=1)
+    calc = ABTestCalculator()
+
+    def run():
+        result = simulate_power(config, calc)
+        return {'rows': 2 * config.trajectories, 'power': round(result.power, 3)}
+    return run
+
+
+@benchmark('power.simulate_pool', repeat=1, group='power')
+def bench_simulate_pool(ctx: BenchContext):
+    config = SimulationConfig(trajectories=POOL_TRAJECTORIES.get(ctx.profile, 100_000), seed=1)
+    calc = ABTestCalculator()
+    workers = os.cpu_count() or 1
+
+    def run():
+        simulate_power(config, calc, workers=workers)
+        return {'rows': 2 * config.trajectories, 'workers': workers}
+    return run
@@ -0,0 +1,49 @@
+"""
+Data quality benchmarks.
+
+'quality.srm_from_totals' is the SRM check the checker scripts and the
+Dashboard run: every experiment tested from the trigger-maintained
+variant_totals table. 'quality.srm_from_scan' computes the same test from
+get_experiment_totals, i.e. a scan of the metric rows, for comparison.
+'quality.check_metric_rows' is the vectorized ingestion check on 100k
+rows.
+"""
+
+from benchmarks.harness import BenchContext, benchmark
+from core.data_manager import ExperimentDataManager
+from core.data_quality import check_metric_rows, srm_checks, srm_test
+
+ROWS = 100_000
+
+
+@benchmark('quality.srm_from_totals', repeat=5, group='quality')
+def bench_srm_from_totals(ctx: BenchContext):
+    dm = ExperimentDataManager(ctx.db_path)
+    ids = ctx.info['experiment_ids']
+
+    def run():
+        return {'calls': len(srm_checks(dm, ids))}
+    return run
+
+
+@benchmark('quality.srm_from_scan', repeat=5, group='quality')
+def bench_srm_from_scan(ctx: BenchContext):
+    dm = ExperimentDataManager(ctx.db_path)
+    ids = ctx.info['experiment_ids']
+
+    def run():
+        totals = dm.get_experiment_totals(ids)
+        for rows in totals.values():
+            srm_test([r.total_impressions for r in rows], [1.0] * len(rows))
+        return {'calls': len(totals)}
+    return run
+
+
+@benchmark('quality.check_metric_rows', repeat=5, group='quality')
+def bench_check_metric_rows(ctx: BenchContext):
+    rows = [(1, 1, '2024-01-01', 1000 + i % 50, 100 + i % 7, 12.5, 800, None, None, None) for i in range(ROWS)]
+
+    def run():
+        check_metric_rows(rows)
+        return {'rows': ROWS}
+    return run
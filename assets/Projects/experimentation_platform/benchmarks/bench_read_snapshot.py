@@ -0,0 +1,113 @@
+"""
+Read snapshot benchmarks.
+
+'snapshot.read_disk' and 'snapshot.read_memory' time a Dashboard's reads
+(active experiments, every experiment's totals and stored snapshots) on
+an idle database, from the file and from the in-memory snapshot.
+
+'snapshot.writer_stall_*' run the same reads in a loop while a writer
+process commits WRITES single-row log_metrics calls, and report the
+writer's commit latency (median, p99, max in ms) and the reads' mean
+latency. Against the file, readers hold the lock a committing writer
+waits for; against the snapshot they do not (the copy itself briefly
+does).
+"""
+
+import os
+import shutil
+import sqlite3
+import statistics
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date
+
+from benchmarks.harness import BenchContext, benchmark
+from core.data_manager import ExperimentDataManager
+from core.read_snapshot import ReadSnapshotDataManager
+
+READ_ROUNDS = 20
+WRITES = 300
+
+
+def _copy(ctx: BenchContext, name: str) -> str:
+    path = os.path.join(ctx.work_dir, name)
+    shutil.copyfile(ctx.db_path, path)
+    conn = sqlite3.connect(path)
+    conn.execute("UPDATE experiments SET status = 'running'")
+    conn.commit()
+    conn.close()
+    return path
+
+
+def _read_round(dm: ExperimentDataManager, ids):
+    dm.get_active_experiment_rows()
+    dm.get_experiment_totals(ids)
+    dm.get_snapshots(ids)
+
+
+def _write(db_path: str, experiment_id: int, writes: int):
+    """Worker: single-row commits, returns each call's latency in seconds"""
+    dm = ExperimentDataManager(db_path)
+    latencies = []
+    for i in range(writes):
+        started = time.perf_counter()
+        dm.log_metrics(experiment_id, 'control', date(2025, 1, 1), 1000, 100, 250.0)
+        latencies.append(time.perf_counter() - started)
+    return latencies
+
+
+def _reads(ctx: BenchContext, snapshot: bool):
+    path = _copy(ctx, 'snapshot_read.db')
+    dm = ReadSnapshotDataManager(path) if snapshot else ExperimentDataManager(path)
+    ids = ctx.info['experiment_ids']
+
+    def run():
+        for _ in range(READ_ROUNDS):
+            _read_round(dm, ids)
+        return {'calls': READ_ROUNDS}
+    return run
+
+
+def _stall(ctx: BenchContext, snapshot: bool):
+    path = _copy(ctx, f"snapshot_stall_{int(snapshot)}.db")
+    dm = ReadSnapshotDataManager(path) if snapshot else ExperimentDataManager(path)
+    ids = ctx.info['experiment_ids']
+    pool = ProcessPoolExecutor(max_workers=1)
+    list(pool.map(abs, [0]))
+
+    def run():
+        writer = pool.submit(_write, path, ids[0], WRITES)
+        reads = []
+        while not writer.done():
+            started = time.perf_counter()
+            _read_round(dm, ids)
+            reads.append(time.perf_counter() - started)
+        latencies = sorted(writer.result())
+        return {
+            'write_p50_ms': round(statistics.median(latencies) * 1000, 2),
+            'write_p99_ms': round(latencies[int(len(latencies) * 0.99)] * 1000, 2),
+            'write_max_ms': round(latencies[-1] * 1000, 2),
+            'read_mean_ms': round(statistics.mean(reads) * 1000, 2) if reads else None,
+            'reads': len(reads),
+        }
+    return run
+
+
+@benchmark('snapshot.read_disk', repeat=5, group='snapshot')
+def bench_read_disk(ctx: BenchContext):
+    return _reads(ctx, snapshot=False)
+
+
+@benchmark('snapshot.read_memory', repeat=5, group='snapshot')
+def bench_read_memory(ctx: BenchContext):
+    return _reads(ctx, snapshot=True)
+
+
+@benchmark('snapshot.writer_stall_disk', repeat=3, group='snapshot')
+def bench_writer_stall_disk(ctx: BenchContext):
+    return _stall(ctx, snapshot=False)
+
+
+@benchmark('snapshot.writer_stall_memory', repeat=3, group='snapshot')
+def bench_writer_stall_memory(ctx: BenchContext):
+    return _stall(ctx, snapshot=True)
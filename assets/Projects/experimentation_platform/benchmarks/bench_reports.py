@@ -0,0 +1,258 @@
+"""
+Report rendering benchmarks.
+
+Renders 10,000 experiment sections (each with three metrics, every 50th
+with a guardrail regression and every 100th with a sample ratio
+mismatch). 'reports.legacy_*' are the previous implementations, kept
+here as the baseline: the email body built with `+=` (as a string and
+written to a file) and the results files written with json.dump and
+line-by-line f.write calls. The other benchmarks use core/reports.py:
+'reports.html' renders the email body string, 'reports.html_file' and
+'reports.files' stream to files, and 'reports.html_parallel' renders on
+4 processes (needs several CPU cores to pay off).
+"""
+
+import json
+import os
+import random
+
+from benchmarks.harness import BenchContext, benchmark
+from core.data_manager import ExperimentSnapshot
+from core.data_quality import SRMResult
+from core.metric_evaluation import MetricResult
+from core.reports import ReportSection, render_report, significant_entry, write_report
+
+SECTIONS = 10_000
+TIMESTAMP = '2025-01-01 00:00:00'
+
+
+def _sections():
+    rng = random.Random(42)
+    sections = []
+    for i in range(1, SECTIONS + 1):
+        control, variant = rng.uniform(8, 12), rng.uniform(8, 14)
+        stats = ExperimentSnapshot(
+            i, 1, 0.05, None, 'control', 'variant_a',
+            100_000, int(control * 1000), control * 2500, 100_000, int(variant * 1000), variant * 2500,
+            30, True, 0.001, 99.9, 3.3, control, variant, variant - control,
+            (variant - control) / control * 100, 'variant' if variant > control else 'control'
+        )
+        metrics = [
+            MetricResult(name, role, 'variant_a', 0.1, 0.11, rng.uniform(-5, 15), 0.01, True,
+                         role == 'guardrail' and i % 50 == 0)
+            for name, role in (('conversion_rate', 'primary'), ('revenue_per_user', 'secondary'),
+                               ('average_order_value', 'guardrail'))
+        ]
+        srm = None
+        if i % 100 == 0:
+            srm = SRMResult(i, ['control', 'variant_a'], [55_000, 45_000], [0.5, 0.5], [0.55, 0.45],
+                            1000.0, 1e-200, True)
+        sections.append(ReportSection(i, f"Experiment {i}", stats, metrics,
+                                      [m for m in metrics if m.regression], srm))
+    return sections
+
+
+def _legacy_html(notifications) -> str:
+    """email_results.send_results_email's body before core/reports.py (verbatim)"""
+    
+    # Build HTML email
+    html = f"""
+    <html>
+    <head>
+        <style>
+            body {{ font-family: Arial, sans-serif; }}
+            .header {{ background-color: #4CAF50; color: white; padding: 20px; text-align: center; }}
+            .experiment {{ border: 1px solid #ddd; margin: 20px; padding: 20px; border-radius: 5px; }}
+            .metric {{ display: inline-block; margin: 10px; padding: 10px; background: #f5f5f5; border-radius: 5px; }}
+            .winner {{ color: #4CAF50; font-weight: bold; font-size: 24px; }}
+            .stats {{ background: #e3f2fd; padding: 15px; margin: 10px 0; border-radius: 5px; }}
+            .guardrail {{ background: #ffebee; color: #c62828; padding: 15px; margin: 10px 0; border-radius: 5px; }}
+        </style>
+    </head>
+    <body>
+        <div class="header">
+            <h1>🎉 Experiment Results Ready!</h1>
+            <p>Significant results detected at {TIMESTAMP}</p>
+        </div>
+    """
+    
+    for notif in notifications:
+        stats = notif['stats']
+        exp_name = notif['experiment']
+        
+        guardrails = ''
+        if notif['regressions']:
+            items = ''.join(
+                f"<li>{r.metric_name} ({r.variant_name}): {r.relative_change:+.1f}%, p = {r.p_value:.4f}</li>"
+                for r in notif['regressions']
+            )
+            guardrails = f'<div class="guardrail"><strong>🚨 Guardrail regressions:</strong><ul>{items}</ul></div>'
+        if notif['srm']:
+            srm = notif['srm']
+            items = ''.join(
+                f"<li>{name}: {observed:.1%} of impressions (expected {expected:.1%})</li>"
+                for name, observed, expected in zip(srm.variant_names, srm.observed_shares, srm.expected_shares)
+            )
+            guardrails += (f'<div class="guardrail"><strong>⚠️ Sample ratio mismatch (p = {srm.p_value:.2g}):</strong> '
+                           f'the traffic split is broken, so these results cannot be trusted.<ul>{items}</ul></div>')
+        
+        html += f"""
+        <div class="experiment">
+            <h2>{exp_name}</h2>
+            <p class="winner">{'⚠️ Sample Ratio Mismatch' if notif['srm'] else '✅ WINNER DETECTED!' if stats.winner == 'variant' else '📊 Significant Result' if stats.is_significant else '🚨 Guardrail Alert'}</p>
+            
+            <div class="stats">
+                <div class="metric">
+                    <strong>Control Rate:</strong><br>
+                    {stats.control_rate:.2f}%
+                </div>
+                <div class="metric">
+                    <strong>Variant Rate:</strong><br>
+                    {stats.variant_rate:.2f}%
+                </div>
+                <div class="metric">
+                    <strong>Lift:</strong><br>
+                    {stats.relative_lift:.1f}%
+                </div>
+                <div class="metric">
+                    <strong>Confidence:</strong><br>
+                    {stats.confidence:.1f}%
+                </div>
+            </div>
+            
+            {guardrails}
+            
+            <p><strong>Sample Size:</strong></p>
+            <ul>
+                <li>Control: {stats.control_impressions:,} impressions, {stats.control_conversions:,} conversions</li>
+                <li>Variant: {stats.variant_impressions:,} impressions, {stats.variant_conversions:,} conversions</li>
+            </ul>
+            
+            <p><strong>Recommendation:</strong> 
+            {'🛑 Fix the traffic split before trusting these results.' if notif['srm'] else '🛑 Investigate the guardrail regressions before shipping.' if notif['regressions'] else '🚀 Ship the variant immediately!' if stats.winner == 'variant' else '⚠️ Keep current version or investigate further.'}
+            </p>
+            
+            <p><a href="http://localhost:8501">View in Dashboard →</a></p>
+        </div>
+        """
+    
+    html += """
+    </body>
+    </html>
+    """
+    return html
+
+
+def _legacy_files(sections, out_dir: str):
+    """check_results.py's file output before core/reports.py"""
+    results = {
+        'timestamp': TIMESTAMP,
+        'significant_experiments': [significant_entry(s) for s in sections],
+        'guardrail_alerts': [{'experiment_name': s.experiment_name, 'experiment_id': s.experiment_id, **r._asdict()}
+                             for s in sections for r in s.regressions],
+        'srm_alerts': [{'experiment_name': s.experiment_name, **s.srm._asdict()} for s in sections if s.srm],
+    }
+    with open(os.path.join(out_dir, 'legacy.json'), 'w') as f:
+        json.dump(results, f, indent=2)
+    with open(os.path.join(out_dir, 'legacy.txt'), 'w', encoding='utf-8') as f:
+        f.write("=" * 70 + "\n")
+        f.write(f"🎯 EXPERIMENT RESULTS - {TIMESTAMP}\n")
+        f.write("=" * 70 + "\n\n")
+        for exp in results['significant_experiments']:
+            f.write(f"📊 {exp['experiment_name']}\n")
+            f.write("-" * 70 + "\n")
+            f.write(f"Status: {'✅ WINNER DETECTED!' if exp['winner'] == 'variant' else '📊 Significant Result'}\n\n")
+            f.write("METRICS:\n")
+            f.write(f"  Control Rate:     {exp['control_rate']:.2f}%\n")
+            f.write(f"  Variant Rate:     {exp['variant_rate']:.2f}%\n")
+            f.write(f"  Lift:             {exp['lift']:.1f}%\n")
+            f.write(f"  Confidence:       {exp['confidence']:.1f}%\n\n")
+            if len(exp['metrics']) > 1:
+                f.write("ALL METRICS:\n")
+                for m in exp['metrics']:
+                    flag = ' 🚨' if m['regression'] else ''
+                    f.write(f"  {m['metric_name']:<24} {m['role']:<10} {m['relative_change']:+7.1f}%  "
+                            f"p = {m['p_value']:.4f}{flag}\n")
+                f.write("\n")
+            f.write("SAMPLE SIZE:\n")
+            f.write(f"  Control: {exp['control_impressions']:,} impressions, {exp['control_conversions']:,} conversions\n")
+            f.write(f"  Variant: {exp['variant_impressions']:,} impressions, {exp['variant_conversions']:,} conversions\n\n")
+            f.write(f"RECOMMENDATION: {exp['recommendation']}\n")
+            f.write("=" * 70 + "\n\n")
+
+
+@benchmark('reports.legacy_html', repeat=5, group='reports')
+def bench_legacy_html(ctx: BenchContext):
+    notifications = [{'experiment': s.experiment_name, 'exp_id': s.experiment_id, 'stats': s.stats,
+                      'regressions': s.regressions, 'srm': s.srm} for s in _sections()]
+
+    def run():
+        _legacy_html(notifications)
+        return {'calls': SECTIONS}
+    return run
+
+
+@benchmark('reports.html', repeat=5, group='reports')
+def bench_html(ctx: BenchContext):
+    sections = _sections()
+
+    def run():
+        render_report('html', sections, TIMESTAMP)
+        return {'calls': SECTIONS}
+    return run
+
+
+@benchmark('reports.legacy_html_file', repeat=5, group='reports')
+def bench_legacy_html_file(ctx: BenchContext):
+    notifications = [{'experiment': s.experiment_name, 'exp_id': s.experiment_id, 'stats': s.stats,
+                      'regressions': s.regressions, 'srm': s.srm} for s in _sections()]
+    path = os.path.join(ctx.work_dir, 'legacy.html')
+
+    def run():
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(_legacy_html(notifications))
+        return {'calls': SECTIONS}
+    return run
+
+
+@benchmark('reports.html_file', repeat=5, group='reports')
+def bench_html_file(ctx: BenchContext):
+    sections = _sections()
+    path = os.path.join(ctx.work_dir, 'report.html')
+
+    def run():
+        write_report(path, 'html', sections, TIMESTAMP)
+        return {'calls': SECTIONS}
+    return run
+
+
+@benchmark('reports.html_parallel', repeat=5, group='reports')
+def bench_html_parallel(ctx: BenchContext):
+    sections = _sections()
+    path = os.path.join(ctx.work_dir, 'report.html')
+
+    def run():
+        write_report(path, 'html', sections, TIMESTAMP, workers=4)
+        return {'calls': SECTIONS}
+    return run
+
+
+@benchmark('reports.legacy_files', repeat=5, group='reports')
+def bench_legacy_files(ctx: BenchContext):
+    sections = _sections()
+
+    def run():
+        _legacy_files(sections, ctx.work_dir)
+        return {'calls': SECTIONS}
+    return run
+
+
+@benchmark('reports.files', repeat=5, group='reports')
+def bench_files(ctx: BenchContext):
+    sections = _sections()
+
+    def run():
+        write_report(os.path.join(ctx.work_dir, 'report.json'), 'json', sections, TIMESTAMP)
+        write_report(os.path.join(ctx.work_dir, 'report.txt'), 'text', sections, TIMESTAMP)
+        return {'calls': SECTIONS}
+    return run
@@ -0,0 +1,59 @@
+"""
+Retention benchmarks: database size and get_experiment_results latency
+before and after completed experiments are rolled up.
+
+Half of the experiments are marked completed on a copy of the shared
+database. 'retention.results_hot' queries them with all daily rows still
+in place; 'retention.results_rolled_up' queries them after
+RetentionManager has run. Both report the database file size in bytes.
+"""
+
+import os
+import shutil
+
+from benchmarks.harness import BenchContext, benchmark
+from core.data_manager import ExperimentDataManager
+from core.retention import RetentionManager
+
+
+def _completed_copy(ctx: BenchContext, name: str):
+    """Copy the shared database and complete every other experiment"""
+    path = os.path.join(ctx.work_dir, name)
+    shutil.copyfile(ctx.db_path, path)
+    dm = ExperimentDataManager(path)
+    completed = ctx.info['experiment_ids'][::2]
+    for experiment_id in completed:
+        dm.complete_experiment(experiment_id)
+    return dm, completed
+
+
+def _query_all(dm: ExperimentDataManager, experiment_ids):
+    def run():
+        for experiment_id in experiment_ids:
+            dm.get_experiment_result_rows(experiment_id)
+        return {'calls': len(experiment_ids), 'db_bytes': os.path.getsize(dm.db_path)}
+    return run
+
+
+@benchmark('retention.results_hot', repeat=5, group='retention')
+def bench_results_hot(ctx: BenchContext):
+    dm, completed = _completed_copy(ctx, 'retention_hot.db')
+    return _query_all(dm, completed)
+
+
+@benchmark('retention.results_rolled_up', repeat=5, group='retention')
+def bench_results_rolled_up(ctx: BenchContext):
+    dm, completed = _completed_copy(ctx, 'retention_rolled.db')
+    RetentionManager(dm, archive_path=os.path.join(ctx.work_dir, 'retention_archive.db')).run()
+    return _query_all(dm, completed)
+
+
+@benchmark('retention.run', repeat=1, group='retention')
+def bench_retention_run(ctx: BenchContext):
+    dm, _ = _completed_copy(ctx, 'retention_run.db')
+    retention = RetentionManager(dm, archive_path=None)
+
+    def run():
+        summary = retention.run()
+        return {'rows': summary['rows_removed'], 'db_bytes': os.path.getsize(dm.db_path)}
+    return run
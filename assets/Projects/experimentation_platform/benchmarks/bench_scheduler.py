@@ -0,0 +1,92 @@
+"""
+Scheduler benchmarks: one checker cycle as a new process vs. as a job of
+the long-lived in-process scheduler.
+
+'scheduler.checker_subprocess' starts `python check_results.py` for
+every cycle, as start_auto_check.ps1 used to. 'scheduler.checker_in_process'
+runs the same cycles as a Scheduler job sharing one data manager and
+calculator (run_scheduler.py). 'scheduler.dispatch' times a no-op job to
+show the scheduler's own cost per run beyond the interval it waits
+(thread hand-off plus the status rows it writes).
+"""
+
+import asyncio
+import os
+import subprocess
+import sys
+import time
+
+from benchmarks.bench_core import _in_dir
+from benchmarks.harness import BenchContext, benchmark
+from core.data_manager import open_data_manager
+from core.scheduler import Job, Scheduler
+from core.statistical_engine import ABTestCalculator
+from core.significance_cache import SignificanceCache
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CYCLES = 5
+
+
+def _run_until(ctx: BenchContext, func, runs: int, interval: float) -> int:
+    """Run `func` as the only job of a scheduler until it ran `runs` times"""
+    async def main():
+        loop = asyncio.get_running_loop()
+        done = 0
+
+        def job():
+            nonlocal done
+            func()
+            done += 1
+            if done >= runs:
+                loop.call_soon_threadsafe(scheduler.stop)
+
+        scheduler = Scheduler([Job('bench', job, interval)], status_path=os.path.join(ctx.work_dir, 'scheduler.db'))
+        await scheduler.run()
+        return scheduler.status['bench'].runs
+
+    return asyncio.run(main())
+
+
+@benchmark('scheduler.checker_subprocess', repeat=3, group='scheduler')
+def bench_checker_subprocess(ctx: BenchContext):
+    script = os.path.join(PROJECT_ROOT, 'check_results.py')
+
+    def run():
+        for _ in range(CYCLES):
+            subprocess.run([sys.executable, script], cwd=ctx.work_dir, check=True,
+                           stdout=subprocess.DEVNULL)
+        return {'calls': CYCLES}
+    return run
+
+
+@benchmark('scheduler.checker_in_process', repeat=3, group='scheduler')
+def bench_checker_in_process(ctx: BenchContext):
+    import check_results
+
+    with _in_dir(ctx.work_dir):
+        dm = open_data_manager()
+    calc = ABTestCalculator(cache=SignificanceCache())
+
+    def cycles():
+        with _in_dir(ctx.work_dir):
+            for _ in range(CYCLES):
+                check_results.check_and_save_results(dm, calc)
+
+    # One scheduled run doing every cycle, so the timing has no idle waits
+    def run():
+        _run_until(ctx, cycles, 1, interval=60)
+        return {'calls': CYCLES}
+    return run
+
+
+@benchmark('scheduler.dispatch', repeat=3, group='scheduler')
+def bench_dispatch(ctx: BenchContext):
+    n = 200
+    interval = 0.005
+
+    def run():
+        started = time.perf_counter()
+        runs = _run_until(ctx, lambda: None, n, interval)
+        per_run = (time.perf_counter() - started) / runs
+        return {'calls': runs, 'overhead_ms': round((per_run - interval) * 1000, 3)}
+    return run
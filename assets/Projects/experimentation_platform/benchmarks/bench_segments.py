@@ -0,0 +1,60 @@
+"""
+Segment breakdown benchmarks.
+
+Builds a dedicated database whose rows are spread over
+3 platforms x 200 countries x 2 user types (1,200 finest segments,
+2,412 segments in the full cube) and times the cube query plus the
+single vectorized evaluation of every segment x variant comparison.
+'segments.shrunk_effects' is the empirical Bayes estimate of every
+segment's effect from the same cube.
+"""
+
+import os
+
+from benchmarks.harness import BenchContext, benchmark
+from benchmarks.synthetic_data import SyntheticConfig, generate_database
+from core.data_manager import ExperimentDataManager
+from core.heterogeneous_effects import segment_effects
+from core.statistical_engine import ABTestCalculator
+
+SEGMENT_CONFIG = SyntheticConfig(experiments=1, variants=3, days=30, rows_per_day=1200, countries=200)
+
+
+def _segment_db(ctx: BenchContext) -> ExperimentDataManager:
+    path = os.path.join(ctx.work_dir, 'segments.db')
+    if not os.path.exists(path):
+        generate_database(path, SEGMENT_CONFIG)
+    return ExperimentDataManager(path)
+
+
+@benchmark('segments.get_segment_cube', repeat=5, group='segments')
+def bench_segment_cube(ctx: BenchContext):
+    dm = _segment_db(ctx)
+
+    def run():
+        cube = dm.get_segment_cube(1)
+        return {'segments': len(cube) // SEGMENT_CONFIG.variants}
+    return run
+
+
+@benchmark('segments.evaluate_segments', repeat=5, group='segments')
+def bench_evaluate_segments(ctx: BenchContext):
+    cube = _segment_db(ctx).get_segment_cube(1)
+    calc = ABTestCalculator()
+
+    def run():
+        results = calc.evaluate_segments(cube)
+        return {'calls': len(results)}
+    return run
+
+
+@benchmark('segments.shrunk_effects', repeat=5, group='segments')
+def bench_shrunk_effects(ctx: BenchContext):
+    cube = _segment_db(ctx).get_segment_cube(1)
+    cube.insert(0, 'experiment_id', 1)
+    calc = ABTestCalculator()
+
+    def run():
+        effects = segment_effects(cube, calc)
+        return {'calls': len(effects)}
+    return run
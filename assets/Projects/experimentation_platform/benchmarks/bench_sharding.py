@@ -0,0 +1,85 @@
+"""
+Concurrent-writer benchmarks for sharded storage.
+
+WRITERS processes each ingest into their own experiment with many small
+log_metrics_batch transactions (the shape of live ingestion). With one
+shard every commit waits for the single database lock; with more shards
+the writers spread over separate files. One benchmark per shard count,
+so rows/sec shows how write throughput scales.
+
+Scaling has not been demonstrated yet: the only runs so far were on a
+single core, where the writers take turns on the CPU anyway and every
+shard count lands at about the same rows/sec (1 shard 12.3k, 8 shards
+10.9k; extra shards only add files to open and sync). Run it on a
+machine with at least WRITERS cores before relying on sharding for
+write throughput.
+"""
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, timedelta
+
+from benchmarks.harness import BenchContext, benchmark
+from core.sharded_data_manager import ShardedExperimentDataManager
+
+WRITERS = 8
+BATCHES_PER_WRITER = 50
+ROWS_PER_BATCH = 20
+
+
+def _write(shard_dir: str, experiment_id: int) -> int:
+    """Worker: ingest BATCHES_PER_WRITER transactions into one experiment"""
+    dm = ShardedExperimentDataManager(shard_dir)
+    start = date(2024, 1, 1)
+    written = 0
+    for b in range(BATCHES_PER_WRITER):
+        rows = [{
+            'variant_name': 'control' if i % 2 == 0 else 'variant_a',
+            'date': start + timedelta(days=b),
+            'impressions': 1000,
+            'conversions': 100 + i,
+            'revenue': 250.0,
+        } for i in range(ROWS_PER_BATCH)]
+        written += dm.log_metrics_batch(experiment_id, rows)
+    return written
+
+
+def _writers(ctx: BenchContext, shards: int):
+    shard_dir = os.path.join(ctx.work_dir, f'shards_{shards}')
+    dm = ShardedExperimentDataManager(shard_dir, shards)
+    experiment_ids = [
+        dm.create_experiment(
+            name=f"Writer {w}", description='', hypothesis='', start_date=date(2024, 1, 1),
+            created_by='bench@example.com',
+            variants=[{'name': 'control', 'allocation': 50}, {'name': 'variant_a', 'allocation': 50}]
+        )
+        for w in range(WRITERS)
+    ]
+    pool = ProcessPoolExecutor(max_workers=WRITERS)
+    # Start the worker processes outside the timed part
+    list(pool.map(abs, range(WRITERS)))
+
+    def run():
+        rows = sum(pool.map(_write, [shard_dir] * WRITERS, experiment_ids))
+        return {'rows': rows, 'writers': WRITERS, 'shards': shards}
+    return run
+
+
+@benchmark('sharding.writers_1_shard', repeat=3, group='sharding')
+def bench_writers_1(ctx: BenchContext):
+    return _writers(ctx, 1)
+
+
+@benchmark('sharding.writers_2_shards', repeat=3, group='sharding')
+def bench_writers_2(ctx: BenchContext):
+    return _writers(ctx, 2)
+
+
+@benchmark('sharding.writers_4_shards', repeat=3, group='sharding')
+def bench_writers_4(ctx: BenchContext):
+    return _writers(ctx, 4)
+
+
+@benchmark('sharding.writers_8_shards', repeat=3, group='sharding')
+def bench_writers_8(ctx: BenchContext):
+    return _writers(ctx, 8)
@@ -0,0 +1,69 @@
+"""
+Significance cache benchmarks.
+
+All three time the same 10,000 distinct count tuples through
+`ABTestCalculator.evaluate`: without a cache, with a warm in-process
+cache, and in a fresh process's calculator whose cache is first read
+from the shared file (what a checker run pays when the app or an earlier
+run already tested the counts).
+"""
+
+import os
+
+import numpy as np
+
+from benchmarks.harness import BenchContext, benchmark
+from core.significance_cache import SignificanceCache
+from core.statistical_engine import ABTestCalculator
+
+TUPLES = 10_000
+
+
+def _counts(seed: int = 7):
+    rng = np.random.default_rng(seed)
+    imp = rng.integers(1_000, 100_000, size=(TUPLES, 2))
+    conv = rng.binomial(imp, 0.1)
+    return [(int(cc), int(ci), int(vc), int(vi)) for (cc, vc), (ci, vi) in zip(conv, imp)]
+
+
+def _evaluate_all(calc: ABTestCalculator, counts):
+    for cc, ci, vc, vi in counts:
+        calc.evaluate(cc, ci, vc, vi)
+
+
+@benchmark('significance_cache.uncached', repeat=5, group='significance_cache')
+def bench_uncached(ctx: BenchContext):
+    calc = ABTestCalculator()
+    counts = _counts()
+
+    def run():
+        _evaluate_all(calc, counts)
+        return {'calls': TUPLES}
+    return run
+
+
+@benchmark('significance_cache.warm', repeat=5, group='significance_cache')
+def bench_warm(ctx: BenchContext):
+    calc = ABTestCalculator(cache=SignificanceCache())
+    counts = _counts()
+    _evaluate_all(calc, counts)
+
+    def run():
+        _evaluate_all(calc, counts)
+        return {'calls': TUPLES, 'hit_rate': round(calc.cache.stats()['hit_rate'], 3)}
+    return run
+
+
+@benchmark('significance_cache.from_file', repeat=5, group='significance_cache')
+def bench_from_file(ctx: BenchContext):
+    path = os.path.join(ctx.work_dir, 'significance_cache.db')
+    counts = _counts()
+    writer = SignificanceCache(path=path)
+    _evaluate_all(ABTestCalculator(cache=writer), counts)
+    writer.flush()
+
+    def run():
+        calc = ABTestCalculator(cache=SignificanceCache(path=path))
+        _evaluate_all(calc, counts)
+        return {'calls': TUPLES, 'misses': calc.cache.misses}
+    return run
@@ -0,0 +1,110 @@
+"""
+Streaming statistics benchmarks.
+
+Compares the one-pass accumulators in core/statistical_engine.py with the
+old list-based mean (`sum(list(data)) / len(...)`), on a stream of values
+produced in NumPy chunks. Peak memory is measured once per benchmark with
+tracemalloc (outside the timed runs) and reported as peak_bytes.
+
+The streaming benchmarks use 100M values on the medium and large
+profiles. The list-based baseline is capped at 5M values, because a
+Python list of 100M floats needs several GB.
+"""
+
+import tracemalloc
+
+import numpy as np
+
+from benchmarks.harness import BenchContext, benchmark
+from core.statistical_engine import RunningStats, StatisticalEngine, TDigest
+
+STREAM_VALUES = {'small': 10_000_000, 'medium': 100_000_000, 'large': 100_000_000}
+LIST_VALUES_CAP = 5_000_000
+CHUNK = 1_000_000
+
+
+def _chunks(n: int, seed: int = 7):
+    """Yield n revenue-like values in NumPy chunks"""
+    rng = np.random.default_rng(seed)
+    for start in range(0, n, CHUNK):
+        yield rng.gamma(2.0, 5.0, min(CHUNK, n - start))
+
+
+def _scalars(n: int):
+    for chunk in _chunks(n):
+        yield from chunk.tolist()
+
+
+def _peak_bytes(func) -> int:
+    tracemalloc.start()
+    try:
+        func()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def _legacy_mean(data):
+    data_list = list(data)
+    return sum(data_list) / len(data_list)
+
+
+@benchmark('streaming.running_stats_chunks', repeat=3, group='streaming')
+def bench_running_stats(ctx: BenchContext):
+    n = STREAM_VALUES[ctx.profile]
+    peak = _peak_bytes(lambda: StatisticalEngine.describe(_chunks(n // 10)))
+
+    def run():
+        StatisticalEngine.describe(_chunks(n))
+        return {'rows': n, 'peak_bytes': peak}
+    return run
+
+
+@benchmark('streaming.merge_partitions', repeat=3, group='streaming')
+def bench_merge_partitions(ctx: BenchContext):
+    """Accumulate 10 partitions separately, then merge (as across processes)"""
+    n = STREAM_VALUES[ctx.profile] // 10
+
+    def run():
+        parts = [StatisticalEngine.describe(_chunks(n, seed)) for seed in range(10)]
+        total = RunningStats()
+        for part in parts:
+            total.merge(part)
+        return {'rows': n * 10}
+    return run
+
+
+@benchmark('streaming.tdigest_chunks', repeat=3, group='streaming')
+def bench_tdigest(ctx: BenchContext):
+    n = STREAM_VALUES[ctx.profile]
+    peak = _peak_bytes(lambda: StatisticalEngine.quantiles(_chunks(n // 10), [0.5]))
+
+    def run():
+        digest = TDigest()
+        for chunk in _chunks(n):
+            digest.update_array(chunk)
+        digest.quantile(0.99)
+        return {'rows': n, 'peak_bytes': peak}
+    return run
+
+
+@benchmark('streaming.running_stats_scalars', repeat=3, group='streaming')
+def bench_scalar_stream(ctx: BenchContext):
+    n = min(STREAM_VALUES[ctx.profile], LIST_VALUES_CAP)
+    peak = _peak_bytes(lambda: StatisticalEngine.mean(_scalars(n)))
+
+    def run():
+        StatisticalEngine.mean(_scalars(n))
+        return {'rows': n, 'peak_bytes': peak}
+    return run
+
+
+@benchmark('streaming.legacy_list_mean', repeat=3, group='streaming')
+def bench_legacy_list_mean(ctx: BenchContext):
+    n = min(STREAM_VALUES[ctx.profile], LIST_VALUES_CAP)
+    peak = _peak_bytes(lambda: _legacy_mean(_scalars(n)))
+
+    def run():
+        _legacy_mean(_scalars(n))
+        return {'rows': n, 'peak_bytes': peak}
+    return run
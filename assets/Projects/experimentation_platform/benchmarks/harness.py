@@ -0,0 +1,127 @@
+"""
+Minimal benchmark harness (asv-style).
+
+Benchmarks register themselves with the `@benchmark` decorator. A
+benchmark function receives a `BenchContext` and does its setup, then
+returns a zero-argument callable that is the part being timed. The
+callable may return a dict of extra numbers (e.g. {'rows': 100000});
+a 'rows' or 'calls' entry is turned into a per-second throughput.
+
+Results are written to `benchmarks/results/<commit>.json` so runs can
+be compared across commits with `run_benchmarks.py compare`.
+"""
+
+import json
+import os
+import platform
+import statistics
+import subprocess
+import time
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'results')
+
+# name -> (function, repeat, group)
+_REGISTRY: Dict[str, tuple] = {}
+
+
+@dataclass
+class BenchContext:
+    """Shared state handed to every benchmark"""
+    db_path: str
+    work_dir: str
+    profile: str
+    info: dict = field(default_factory=dict)
+
+
+def benchmark(name: str, repeat: int = 5, group: str = 'default'):
+    """Register a benchmark function under `name`"""
+    def decorator(func: Callable):
+        _REGISTRY[name] = (func, repeat, group)
+        return func
+    return decorator
+
+
+def registered(pattern: Optional[str] = None) -> List[str]:
+    """Names of registered benchmarks, optionally filtered by substring"""
+    return sorted(n for n in _REGISTRY if not pattern or pattern in n)
+
+
+def run_one(name: str, ctx: BenchContext) -> dict:
+    """Run a single registered benchmark and return its timing record"""
+    func, repeat, group = _REGISTRY[name]
+    timed = func(ctx)
+
+    times = []
+    extra = {}
+    for _ in range(repeat):
+        started = time.perf_counter()
+        extra = timed() or {}
+        times.append(time.perf_counter() - started)
+
+    record = {
+        'group': group,
+        'repeat': repeat,
+        'min': min(times),
+        'median': statistics.median(times),
+        'mean': statistics.fmean(times),
+    }
+    record.update(extra)
+    for unit in ('rows', 'calls'):
+        if unit in extra:
+            record[f'{unit}_per_sec'] = extra[unit] / record['median']
+    return record
+
+
+def git_commit() -> str:
+    """Short hash of HEAD, or 'unknown' outside a git checkout"""
+    try:
+        out = subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'],
+            capture_output=True, text=True, check=True
+        )
+        return out.stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+
+def save_results(results: Dict[str, dict], profile: str) -> str:
+    """Write a results file named after the current commit"""
+    os.makedirs(RESULTS_DIR, exist_ok=True)
+    commit = git_commit()
+    payload = {
+        'commit': commit,
+        'timestamp': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+        'profile': profile,
+        'python': platform.python_version(),
+        'machine': platform.platform(),
+        'benchmarks': results,
+    }
+    path = os.path.join(RESULTS_DIR, f"{commit}-{profile}.json")
+    with open(path, 'w') as f:
+        json.dump(payload, f, indent=2)
+    return path
+
+
+def compare(base_path: str, new_path: str, threshold: float = 0.10) -> List[tuple]:
+    """
+    Compare median times of two results files.
+
+    Returns:
+        List of (name, base_median, new_median, ratio, flag) where flag is
+        'REGRESSION', 'faster' or ''
+    """
+    with open(base_path) as f:
+        base = json.load(f)['benchmarks']
+    with open(new_path) as f:
+        new = json.load(f)['benchmarks']
+
+    rows = []
+    for name in sorted(set(base) & set(new)):
+        old_t, new_t = base[name]['median'], new[name]['median']
+        ratio = new_t / old_t if old_t > 0 else float('inf')
+        flag = 'REGRESSION' if ratio > 1 + threshold else 'faster' if ratio < 1 - threshold else ''
+        rows.append((name, old_t, new_t, ratio, flag))
+    return rows
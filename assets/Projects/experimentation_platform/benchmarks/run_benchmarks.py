@@ -0,0 +1,116 @@
+"""
+Benchmark runner.
+
+Run from the project root:
+    python -m benchmarks.run_benchmarks run --profile small
+    python -m benchmarks.run_benchmarks run --profile medium -k statistics
+    python -m benchmarks.run_benchmarks compare benchmarks/results/abc123-small.json benchmarks/results/def456-small.json
+"""
+
+import argparse
+import importlib
+import os
+import sys
+import tempfile
+import time
+
+from benchmarks.harness import BenchContext, compare, registered, run_one, save_results
+from benchmarks.synthetic_data import PROFILES, generate_database
+
+# Modules whose @benchmark functions are collected
+BENCH_MODULES = [
+    'benchmarks.bench_bandit',
+    'benchmarks.bench_bulk_io',
+    'benchmarks.bench_charts',
+    'benchmarks.bench_core',
+    'benchmarks.bench_import',
+    'benchmarks.bench_live',
+    'benchmarks.bench_metrics',
+    'benchmarks.bench_power',
+    'benchmarks.bench_quality',
+    'benchmarks.bench_read_snapshot',
+    'benchmarks.bench_reports',
+    'benchmarks.bench_retention',
+    'benchmarks.bench_scheduler',
+    'benchmarks.bench_segments',
+    'benchmarks.bench_sharding',
+    'benchmarks.bench_significance_cache',
+    'benchmarks.bench_streaming',
+]
+
+# Record keys printed in the fixed columns; anything else is shown as key=value
+STANDARD_KEYS = {'group', 'repeat', 'min', 'median', 'mean', 'rows', 'calls', 'rows_per_sec', 'calls_per_sec'}
+
+
+def cmd_run(args):
+    for module in BENCH_MODULES:
+        importlib.import_module(module)
+
+    names = registered(args.k)
+    if not names:
+        print(f"No benchmarks match '{args.k}'")
+        return 1
+
+    config = PROFILES[args.profile]
+    with tempfile.TemporaryDirectory(prefix='expbench-') as work_dir:
+        # Checker scripts use the relative path data/experiments.db
+        db_path = os.path.join(work_dir, 'data', 'experiments.db')
+
+        print(f"🧪 Building '{args.profile}' database ({config.total_rows:,} metric rows)...")
+        started = time.perf_counter()
+        info = generate_database(db_path, config)
+        print(f"   done in {time.perf_counter() - started:.1f}s\n")
+
+        ctx = BenchContext(db_path=db_path, work_dir=work_dir, profile=args.profile, info=info)
+
+        results = {}
+        for name in names:
+            record = run_one(name, ctx)
+            results[name] = record
+            throughput = ''
+            for unit in ('rows', 'calls'):
+                if f'{unit}_per_sec' in record:
+                    throughput = f"  {record[f'{unit}_per_sec']:>14,.0f} {unit}/s"
+            extras = ''.join(
+                f"  {key}={value:,}" if isinstance(value, int) else f"  {key}={value}"
+                for key, value in record.items() if key not in STANDARD_KEYS
+            )
+            print(f"{name:<45} median {record['median'] * 1000:>10.2f} ms{throughput}{extras}")
+
+    if not args.no_save:
+        path = save_results(results, args.profile)
+        print(f"\n💾 Results saved to {path}")
+    return 0
+
+
+def cmd_compare(args):
+    rows = compare(args.base, args.new, args.threshold)
+    print(f"{'benchmark':<45} {'base ms':>10} {'new ms':>10} {'ratio':>7}")
+    for name, old_t, new_t, ratio, flag in rows:
+        print(f"{name:<45} {old_t * 1000:>10.2f} {new_t * 1000:>10.2f} {ratio:>7.2f} {flag}")
+    return 1 if any(flag == 'REGRESSION' for *_, flag in rows) else 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Experimentation platform benchmarks")
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    run = sub.add_parser('run', help="Run benchmarks and save results")
+    run.add_argument('--profile', choices=sorted(PROFILES), default='small')
+    run.add_argument('-k', help="Only run benchmarks whose name contains this text")
+    run.add_argument('--no-save', action='store_true')
+    run.set_defaults(func=cmd_run)
+
+    cmp = sub.add_parser('compare', help="Compare two results files")
+    cmp.add_argument('base')
+    cmp.add_argument('new')
+    cmp.add_argument('--threshold', type=float, default=0.10,
+                     help="Relative slowdown reported as a regression (default 0.10)")
+    cmp.set_defaults(func=cmd_compare)
+
+    args = parser.parse_args()
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
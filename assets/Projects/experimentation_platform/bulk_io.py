@@ -0,0 +1,386 @@
+"""
+Bulk import and export of experiment metrics (CSV or Parquet) and of
+experiment definitions (JSON).
+
+Import streams the file in chunks, so memory stays flat however large
+the file is. Each chunk is validated with vectorized checks (the value
+checks come from core/data_quality.py), variant names are mapped to ids
+with one query per chunk (for experiments not seen before), and the
+chunk is loaded with one transaction per database.
+Chunks loaded before an error stay loaded; the error names the rows.
+
+Input columns:
+    variant_name, date, impressions, conversions, revenue   (required)
+    experiment_id        (required unless --experiment is given)
+    unique_users, platform, country, user_type               (optional)
+    granularity, days_covered                                (optional)
+
+Metric exports contain the daily rows and the weekly/monthly rows that
+retention (core/retention.py) rolled completed experiments up into.
+`granularity` says which a row is ('day', or the rollup period with
+`date` being its first day) and `days_covered` holds a rollup's day
+count. Importing such a file puts the rolled-up rows back into
+experiment_metrics_rollup, so results match the exported database.
+
+Metrics can only be imported into experiments whose variants exist.
+`--what experiments` exports the experiments themselves (variants and
+their current split, metric definitions, allocation mode, status) as
+JSON; importing that file first recreates them with the same ids, so
+a fresh database can take the metrics export next. Snapshots and bandit
+allocation history are not exported; they are recomputed or start over.
+
+Usage (from the project root):
+    python bulk_io.py import history.csv --experiment 3
+    python bulk_io.py import history.parquet --chunk-rows 500000
+    python bulk_io.py export metrics.parquet --experiment 3
+    python bulk_io.py export results.csv --what results
+    python bulk_io.py export experiments.json --what experiments
+    python bulk_io.py import experiments.json       # then the metrics file
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from typing import Dict, Iterator, List, Optional
+
+import pandas as pd
+
+from core.data_manager import METRIC_ROW_COLUMNS, ROLLUP_ROW_COLUMNS, VariantTotals, open_data_manager
+from core.data_quality import OPTIONAL_FIELDS, metric_problems
+from core.retention import PERIOD_START
+from database.db_setup import DIMENSIONS
+
+REQUIRED_COLUMNS = ('variant_name', 'date', 'impressions', 'conversions', 'revenue')
+COUNT_COLUMNS = ('impressions', 'conversions', 'unique_users')
+CHUNK_ROWS = 100_000
+# 'day' rows go to experiment_metrics, the others are retention rollups
+GRANULARITIES = ('day',) + tuple(PERIOD_START)
+
+# Export column order; matches the import format
+EXPORT_COLUMNS = ('experiment_id', 'variant_name', 'date', 'impressions', 'conversions',
+                  'revenue', 'unique_users') + DIMENSIONS + ('granularity', 'days_covered')
+
+
+def peak_memory_bytes() -> Optional[int]:
+    """Peak resident memory of this process so far (None if unavailable)"""
+    try:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # kilobytes on Linux, bytes on macOS
+        return peak if sys.platform == 'darwin' else peak * 1024
+    except ImportError:
+        pass
+    try:
+        import ctypes
+        from ctypes import wintypes
+
+        class Counters(ctypes.Structure):
+            _fields_ = [('cb', wintypes.DWORD), ('PageFaultCount', wintypes.DWORD)] + [
+                (name, ctypes.c_size_t) for name in (
+                    'PeakWorkingSetSize', 'WorkingSetSize', 'QuotaPeakPagedPoolUsage',
+                    'QuotaPagedPoolUsage', 'QuotaPeakNonPagedPoolUsage', 'QuotaNonPagedPoolUsage',
+                    'PagefileUsage', 'PeakPagefileUsage')
+            ]
+
+        counters = Counters()
+        counters.cb = ctypes.sizeof(counters)
+        ctypes.windll.psapi.GetProcessMemoryInfo(
+            ctypes.windll.kernel32.GetCurrentProcess(), ctypes.byref(counters), counters.cb)
+        return counters.PeakWorkingSetSize
+    except (AttributeError, OSError):
+        return None
+
+
+def read_chunks(path: str, chunk_rows: int = CHUNK_ROWS) -> Iterator[pd.DataFrame]:
+    """Stream a CSV or Parquet file as DataFrames of at most chunk_rows rows"""
+    if path.lower().endswith(('.parquet', '.pq')):
+        import pyarrow.parquet as pq
+
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=chunk_rows):
+            yield batch.to_pandas()
+    else:
+        # Strings stay strings (dates, segment values); numbers are checked below
+        yield from pd.read_csv(path, chunksize=chunk_rows, dtype=str, keep_default_na=False, na_values=[''])
+
+
+def validate_chunk(chunk: pd.DataFrame, experiment_id: Optional[int], offset: int, skip_invalid: bool):
+    """
+    Normalize one chunk and check every row at once
+
+    Returns:
+        (clean DataFrame, number of rows dropped)
+
+    Raises:
+        ValueError: on missing columns, or on invalid rows unless skip_invalid
+    """
+    required = REQUIRED_COLUMNS + (() if experiment_id is not None else ('experiment_id',))
+    missing = [c for c in required if c not in chunk.columns]
+    if missing:
+        raise ValueError(f"Missing columns: {missing}")
+
+    frame = pd.DataFrame(index=chunk.index)
+    frame['experiment_id'] = (experiment_id if experiment_id is not None
+                              else pd.to_numeric(chunk['experiment_id'], errors='coerce'))
+    frame['variant_name'] = chunk['variant_name'].astype('string').str.strip()
+    frame['date'] = pd.to_datetime(chunk['date'], errors='coerce', format='ISO8601').dt.strftime('%Y-%m-%d')
+    for column in COUNT_COLUMNS + ('revenue',):
+        values = chunk[column] if column in chunk.columns else 0
+        if column in OPTIONAL_FIELDS and column in chunk.columns:
+            # A blank cell is 0; text that is not a number is still rejected
+            values = values.fillna(0)
+        frame[column] = pd.to_numeric(values, errors='coerce')
+    for dim in DIMENSIONS:
+        frame[dim] = chunk[dim].astype('string') if dim in chunk.columns else None
+    frame['granularity'] = (chunk['granularity'].astype('string').str.strip().fillna('day')
+                            if 'granularity' in chunk.columns else 'day')
+    frame['days_covered'] = (pd.to_numeric(chunk['days_covered'], errors='coerce')
+                             if 'days_covered' in chunk.columns else 0)
+    rollup = (frame['granularity'] != 'day').to_numpy(dtype=bool)
+    days = frame['days_covered'].to_numpy(dtype=float)
+
+    problems = {
+        'missing experiment_id': frame['experiment_id'].isna().to_numpy(),
+        'missing variant_name': (frame['variant_name'].isna() | (frame['variant_name'] == '')).to_numpy(dtype=bool),
+        'invalid date': frame['date'].isna().to_numpy(),
+        'invalid granularity': (~frame['granularity'].isin(GRANULARITIES)).to_numpy(dtype=bool),
+        'invalid days_covered': rollup & ~((days >= 0) & (days % 1 == 0)),
+        **metric_problems(frame['impressions'], frame['conversions'], frame['revenue'], frame['unique_users']),
+    }
+    bad = pd.DataFrame(problems, index=frame.index)
+    invalid = bad.any(axis=1)
+
+    if invalid.any() and not skip_invalid:
+        first = invalid.idxmax()
+        reasons = [name for name in problems if bad.at[first, name]]
+        raise ValueError(f"{int(invalid.sum())} invalid row(s) in rows {offset + 1}-{offset + len(chunk)}; "
+                         f"first is row {offset + chunk.index.get_loc(first) + 1}: {', '.join(reasons)} "
+                         f"(use --skip-invalid to drop them)")
+
+    frame = frame[~invalid]
+    frame['days_covered'] = frame['days_covered'].where(frame['granularity'] != 'day', 0)
+    for column in COUNT_COLUMNS + ('experiment_id', 'days_covered'):
+        frame[column] = frame[column].astype('int64')
+    return frame, int(invalid.sum())
+
+
+def import_file(dm, path: str, experiment_id: Optional[int] = None,
+                chunk_rows: int = CHUNK_ROWS, skip_invalid: bool = False) -> Dict:
+    """
+    Stream `path` into experiment_metrics (and rolled-up rows into
+    experiment_metrics_rollup)
+
+    Returns:
+        {'rows': inserted, 'skipped': dropped invalid rows, 'chunks': n}
+    """
+    variant_ids = {}
+    known = set()
+    inserted = skipped = chunks = offset = 0
+
+    for chunk in read_chunks(path, chunk_rows):
+        frame, dropped = validate_chunk(chunk, experiment_id, offset, skip_invalid)
+        offset += len(chunk)
+        skipped += dropped
+        chunks += 1
+        if frame.empty:
+            continue
+
+        # Resolve variant names of experiments not seen in earlier chunks
+        new_ids = set(frame['experiment_id'].unique().tolist()) - known
+        if new_ids:
+            variant_ids.update(dm.get_variant_ids(new_ids))
+            known |= new_ids
+
+        keys = pd.MultiIndex.from_arrays([frame['experiment_id'], frame['variant_name']])
+        resolved = pd.Series(variant_ids, dtype='float64').reindex(keys).to_numpy() if variant_ids else None
+        if resolved is None or pd.isna(resolved).any():
+            missing = sorted(set(zip(frame['experiment_id'].tolist(), frame['variant_name'].tolist()))
+                             - set(variant_ids))[:5]
+            raise ValueError(f"Unknown (experiment_id, variant_name) pairs, e.g. {missing}")
+        frame['variant_id'] = resolved.astype('int64')
+
+        frame['period_start'] = frame['date']
+        for rollup, columns in ((False, METRIC_ROW_COLUMNS), (True, ROLLUP_ROW_COLUMNS)):
+            part = frame[(frame['granularity'] != 'day') == rollup]
+            if part.empty:
+                continue
+            # Plain Python values for sqlite3; NaN/NA dimensions become NULL
+            values = [part[c].astype(object).where(part[c].notna(), None).tolist() for c in columns]
+            # Already validated above, with the same checks
+            inserted += dm.insert_metric_rows(list(zip(*values)), validate=False, rollup=rollup)
+
+    return {'rows': inserted, 'skipped': skipped, 'chunks': chunks}
+
+
+def _metric_chunks(dm, experiment_ids: List[int], chunk_rows: int) -> Iterator[pd.DataFrame]:
+    """
+    Daily rows and retention rollups with variant names, streamed per
+    experiment (rollups are dated by their period start)
+    """
+    dims = ', '.join('m.' + d for d in DIMENSIONS)
+    query = f"""
+        SELECT m.experiment_id, v.variant_name, m.date, m.impressions, m.conversions,
+               m.revenue, m.unique_users, {dims}, 'day' as granularity, NULL as days_covered
+        FROM experiment_metrics m
+        JOIN variants v ON v.variant_id = m.variant_id
+        WHERE m.experiment_id = :experiment_id
+        UNION ALL
+        SELECT m.experiment_id, v.variant_name, m.period_start, m.impressions, m.conversions,
+               m.revenue, m.unique_users, {dims}, m.granularity, m.days_covered
+        FROM experiment_metrics_rollup m
+        JOIN variants v ON v.variant_id = m.variant_id
+        WHERE m.experiment_id = :experiment_id
+        ORDER BY 3, 2
+    """
+    for experiment_id in experiment_ids:
+        conn = dm.get_metrics_connection(experiment_id)
+        try:
+            yield from pd.read_sql(query, conn, params={'experiment_id': experiment_id}, chunksize=chunk_rows)
+        finally:
+            conn.close()
+
+
+def _results_frame(dm, experiment_ids: List[int]) -> pd.DataFrame:
+    totals = dm.get_experiment_totals(experiment_ids)
+    rows = [(experiment_id, *row) for experiment_id in experiment_ids for row in totals[experiment_id]]
+    return pd.DataFrame(rows, columns=('experiment_id',) + VariantTotals._fields)
+
+
+def _export_schema():
+    """Parquet schema of exported metric rows, fixed so that a chunk whose
+    optional columns are all NULL still matches the file"""
+    import pyarrow as pa
+
+    types = {'experiment_id': pa.int64(), 'revenue': pa.float64()}
+    types.update((c, pa.int64()) for c in COUNT_COLUMNS + ('days_covered',))
+    # Everything else (variant name, date, dimensions, granularity) is text
+    return pa.schema([(c, types.get(c, pa.string())) for c in EXPORT_COLUMNS])
+
+
+def import_experiments(dm, path: str) -> Dict:
+    """
+    Recreate the experiments in a `--what experiments` JSON export,
+    keeping their ids (all or nothing)
+
+    Returns:
+        {'rows': experiments created}
+    """
+    with open(path, encoding='utf-8') as f:
+        definitions = json.load(f)
+    return {'rows': dm.import_experiment_definitions(definitions)}
+
+
+def export_file(dm, path: str, experiment_ids: Optional[List[int]] = None,
+                what: str = 'metrics', chunk_rows: int = CHUNK_ROWS) -> Dict:
+    """
+    Write metric rows (streamed) or per-variant results to CSV/Parquet,
+    or experiment definitions to JSON (what='experiments')
+
+    Returns:
+        {'rows': written}
+    """
+    if experiment_ids is None:
+        conn = dm.get_connection()
+        experiment_ids = [row[0] for row in conn.execute("SELECT experiment_id FROM experiments ORDER BY experiment_id")]
+        conn.close()
+
+    if what == 'experiments':
+        if not path.lower().endswith('.json'):
+            raise ValueError("Experiment definitions are written as JSON; use a .json path")
+        definitions = dm.get_experiment_definitions(experiment_ids)
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(definitions, f, indent=2)
+        return {'rows': len(definitions)}
+
+    chunks = _metric_chunks(dm, experiment_ids, chunk_rows) if what == 'metrics' else [_results_frame(dm, experiment_ids)]
+    parquet = path.lower().endswith(('.parquet', '.pq'))
+    writer = None
+    written = 0
+
+    if os.path.exists(path):
+        os.remove(path)
+    finished = False
+    try:
+        for chunk in chunks:
+            if chunk.empty:
+                continue
+            if parquet:
+                import pyarrow as pa
+                import pyarrow.parquet as pq
+
+                schema = _export_schema() if what == 'metrics' else None
+                table = pa.Table.from_pandas(chunk, schema=schema, preserve_index=False)
+                if writer is None:
+                    writer = pq.ParquetWriter(path, table.schema)
+                writer.write_table(table.cast(writer.schema))
+            else:
+                chunk.to_csv(path, mode='a', header=written == 0, index=False)
+            written += len(chunk)
+        finished = True
+    finally:
+        if writer is not None:
+            writer.close()
+        # A partial export is worse than none
+        if not finished and os.path.exists(path):
+            os.remove(path)
+
+    if writer is None and written == 0 and not parquet:
+        pd.DataFrame(columns=EXPORT_COLUMNS if what == 'metrics' else None).to_csv(path, index=False)
+
+    return {'rows': written}
+
+
+def _report(action: str, rows: int, elapsed: float):
+    peak = peak_memory_bytes()
+    print(f"✅ {action} {rows:,} rows in {elapsed:.1f}s ({rows / elapsed if elapsed else 0:,.0f} rows/sec)")
+    if peak is not None:
+        print(f"💾 Peak memory: {peak / 1024 / 1024:,.0f} MB")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bulk import/export of experiment metrics")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    imp = commands.add_parser('import', help="Load metrics from a CSV or Parquet file, or experiment "
+                                             "definitions from a --what experiments JSON export")
+    imp.add_argument('path')
+    imp.add_argument('--experiment', type=int, help="Experiment id for files without an experiment_id column")
+    imp.add_argument('--chunk-rows', type=int, default=CHUNK_ROWS)
+    imp.add_argument('--skip-invalid', action='store_true', help="Drop invalid rows instead of stopping")
+
+    exp = commands.add_parser('export', help="Write metrics or results to a CSV or Parquet file, or "
+                                             "experiment definitions to JSON")
+    exp.add_argument('path')
+    exp.add_argument('--experiment', type=int, action='append', help="Experiment id (repeatable; default all)")
+    exp.add_argument('--what', choices=('metrics', 'results', 'experiments'), default='metrics',
+                     help="metrics (daily and rolled-up rows), per-variant results, or experiment "
+                          "definitions (import these first into a fresh database)")
+    exp.add_argument('--chunk-rows', type=int, default=CHUNK_ROWS)
+
+    args = parser.parse_args()
+    dm = open_data_manager()
+    started = time.perf_counter()
+
+    try:
+        if args.command == 'import':
+            print(f"📥 Importing {args.path}...")
+            if args.path.lower().endswith('.json'):
+                summary = import_experiments(dm, args.path)
+                print(f"✅ Created {summary['rows']:,} experiments")
+                return
+            summary = import_file(dm, args.path, args.experiment, args.chunk_rows, args.skip_invalid)
+            _report('Imported', summary['rows'], time.perf_counter() - started)
+            if summary['skipped']:
+                print(f"⚠️  Skipped {summary['skipped']:,} invalid rows")
+        else:
+            print(f"📤 Exporting {args.what} to {args.path}...")
+            summary = export_file(dm, args.path, args.experiment, args.what, args.chunk_rows)
+            _report('Exported', summary['rows'], time.perf_counter() - started)
+    except ValueError as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -4,98 +4,85 @@ No email password needed!
 """
 
 from datetime import datetime
-import json
 
-from core.data_manager import ExperimentDataManager
+from core.data_manager import open_data_manager
+from core.data_quality import srm_alerts
+from core.experiment_summary import get_current_summaries
+from core.metric_evaluation import get_current_metric_results
+from core.reports import build_sections, write_report
+from core.significance_cache import SignificanceCache
 from core.statistical_engine import ABTestCalculator
 
 
-def check_and_save_results():
-    """Check experiments and save significant results to a file"""
-    dm = ExperimentDataManager()
-    calc = ABTestCalculator()
+def check_and_save_results(dm=None, calc=None):
+    """
+    Check experiments and save significant results to a file
+    
+    Args:
+        dm, calc: Reused across runs by run_scheduler.py (keeps the
+            significance cache warm); opened fresh when omitted
+    """
+    dm = open_data_manager() if dm is None else dm
+    # In-memory only: stored snapshots already skip unchanged experiments,
+    # and loading the shared cache file costs more than it saves per run
+    calc = ABTestCalculator(cache=SignificanceCache()) if calc is None else calc
     
     timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
     print(f"\n🔍 Checking experiments at {timestamp}")
     
-    active_exps = dm.get_active_experiments()
+    # Plain tuples instead of DataFrames keeps pandas out of this script
+    active_exps = dm.get_active_experiment_rows()
     
     if len(active_exps) == 0:
         print("No active experiments found.")
         return
     
-    results = {
-        'timestamp': timestamp,
-        'significant_experiments': []
-    }
+    # Recompute only experiments whose data changed and store the snapshots
+    # so the app and the email notifier can reuse them
+    summaries = get_current_summaries(
+        dm, calc, [exp.experiment_id for exp in active_exps], save=True
+    )
     
-    for idx, exp in active_exps.iterrows():
-        results_df = dm.get_experiment_results(exp['experiment_id'])
-        
-        if len(results_df) >= 2 and results_df['total_impressions'].sum() > 0:
-            control = results_df[results_df['variant_name'] == 'control'].iloc[0]
-            variant = results_df[results_df['variant_name'] != 'control'].iloc[0]
-            
-            if control['total_impressions'] > 0 and variant['total_impressions'] > 0:
-                stats = calc.is_significant(
-                    control_conv=int(control['total_conversions']),
-                    control_imp=int(control['total_impressions']),
-                    variant_conv=int(variant['total_conversions']),
-                    variant_imp=int(variant['total_impressions'])
-                )
-                
-                if stats['is_significant']:
-                    result = {
-                        'experiment_name': exp['experiment_name'],
-                        'experiment_id': exp['experiment_id'],
-                        'control_rate': f"{stats['control_rate']:.2f}%",
-                        'variant_rate': f"{stats['variant_rate']:.2f}%",
-                        'lift': f"{stats['relative_lift']:.1f}%",
-                        'confidence': f"{stats['confidence']:.1f}%",
-                        'winner': stats['winner'],
-                        'control_impressions': int(control['total_impressions']),
-                        'control_conversions': int(control['total_conversions']),
-                        'variant_impressions': int(variant['total_impressions']),
-                        'variant_conversions': int(variant['total_conversions']),
-                        'recommendation': '🚀 Ship the variant!' if stats['winner'] == 'variant' else '⚠️ Keep current version'
-                    }
-                    results['significant_experiments'].append(result)
-                    print(f"✅ {exp['experiment_name']}: Significant result found!")
+    # All declared metrics, one scan per experiment whose data changed
+    metric_results = get_current_metric_results(
+        dm, calc, [exp.experiment_id for exp in active_exps], save=True
+    )
+    
+    if calc.cache is not None:
+        cache = calc.cache.stats()
+        print(f"♻️  Significance cache: {cache['hits']} hits, {cache['misses']} misses")
+    
+    # Traffic split check from the trigger-maintained totals (no metric scan)
+    mismatches = srm_alerts(dm, [exp.experiment_id for exp in active_exps])
+    
+    # One report section per experiment with anything to report
+    sections = build_sections(active_exps, summaries, metric_results, mismatches)
+    for section in sections:
+        if section.srm is not None:
+            print(f"⚠️  {section.experiment_name}: sample ratio mismatch (p = {section.srm.p_value:.2g})")
+        for regression in section.regressions:
+            print(f"🚨 {section.experiment_name}: guardrail {regression.metric_name} regressed "
+                  f"{regression.relative_change:.1f}% in {regression.variant_name}")
+        if section.stats is not None and section.stats.is_significant:
+            print(f"✅ {section.experiment_name}: Significant result found!")
     
     # Save to file
-    if results['significant_experiments']:
-        # JSON format
-        with open('experiment_results.json', 'w') as f:
-            json.dump(results, f, indent=2)
+    if sections:
+        # JSON format and human-readable format, streamed section by section
+        write_report('experiment_results.json', 'json', sections, timestamp)
+        write_report('experiment_results.txt', 'text', sections, timestamp)
         
-        # Human-readable format
-        with open('experiment_results.txt', 'w', encoding='utf-8') as f:
-            f.write("=" * 70 + "\n")
-            f.write(f"🎯 EXPERIMENT RESULTS - {timestamp}\n")
-            f.write("=" * 70 + "\n\n")
-            
-            for exp in results['significant_experiments']:
-                f.write(f"📊 {exp['experiment_name']}\n")
-                f.write("-" * 70 + "\n")
-                f.write(f"Status: {'✅ WINNER DETECTED!' if exp['winner'] == 'variant' else '📊 Significant Result'}\n\n")
-                
-                f.write("METRICS:\n")
-                f.write(f"  Control Rate:     {exp['control_rate']}\n")
-                f.write(f"  Variant Rate:     {exp['variant_rate']}\n")
-                f.write(f"  Lift:             {exp['lift']}\n")
-                f.write(f"  Confidence:       {exp['confidence']}\n\n")
-                
-                f.write("SAMPLE SIZE:\n")
-                f.write(f"  Control: {exp['control_impressions']:,} impressions, {exp['control_conversions']:,} conversions\n")
-                f.write(f"  Variant: {exp['variant_impressions']:,} impressions, {exp['variant_conversions']:,} conversions\n\n")
-                
-                f.write(f"RECOMMENDATION: {exp['recommendation']}\n")
-                f.write("=" * 70 + "\n\n")
+        significant_count = sum(1 for s in sections if s.stats is not None and s.stats.is_significant)
+        regression_count = sum(len(s.regressions) for s in sections)
         
         print(f"\n💾 Results saved to:")
         print(f"   - experiment_results.txt (readable)")
         print(f"   - experiment_results.json (data)")
-        print(f"\n🎉 Found {len(results['significant_experiments'])} significant result(s)!")
+        print(f"\n🎉 Found {significant_count} significant result(s)!")
+        if regression_count:
+            print(f"🚨 {regression_count} guardrail regression(s)!")
+        if mismatches:
+            print(f"⚠️  {len(mismatches)} sample ratio mismatch(es)!")
     else:
         print("No significant results yet. Keep running experiments!")
         
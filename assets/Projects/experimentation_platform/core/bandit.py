@@ -0,0 +1,285 @@
+"""
+Multi-armed bandit traffic allocation.
+
+Experiments created with allocation_mode 'thompson' or 'ucb' start with
+the configured split; every allocation cycle (`update_allocations`)
+recomputes it from the trigger-maintained per-variant totals
+(`get_variant_totals`, no metric scans) and writes the new
+`variants.traffic_allocation` values plus an `allocation_history` row
+per variant in one transaction.
+
+    thompson  each variant gets the posterior probability that its
+              conversion rate is the highest (Beta(1 + conversions,
+              1 + non-conversions) posteriors, estimated from
+              THOMPSON_DRAWS joint draws)
+    ucb       the variants whose upper confidence bound reaches the best
+              lower bound share the traffic equally; variants that are
+              clearly worse drop to the floor
+
+Every variant keeps at least MIN_SHARE of the traffic so the estimates
+stay current. All experiments of a mode are computed together on
+(experiments x variants) arrays, padded to the largest variant count.
+
+`simulate_regret` runs the same allocation rules on simulated traffic
+and compares the conversions lost to the worse variants with a fixed
+equal split.
+"""
+
+import argparse
+import time
+from typing import Dict, List, NamedTuple, Optional, Sequence
+
+import numpy as np
+
+from core.data_manager import VariantAllocation, VariantCounts, open_data_manager
+
+THOMPSON_DRAWS = 1_000
+MIN_SHARE = 0.01                # floor per variant, as a fraction of traffic
+# Posterior draws held in memory at once (experiments x variants x draws)
+CHUNK_VALUES = 2_000_000
+# Beta posteriors with both parameters at least this large are drawn from
+# their normal approximation (several times faster, same split to within
+# the sampling noise)
+NORMAL_APPROX_MIN = 30
+
+
+class AllocationCycle(NamedTuple):
+    experiments: int
+    variants: int
+    seconds: float
+
+
+class RegretResult(NamedTuple):
+    method: str
+    runs: int
+    days: int
+    expected_regret: float          # conversions lost vs. always showing the best variant, mean over runs
+    fixed_split_regret: float       # the same for an equal split
+    regret_by_day: List[float]      # cumulative expected regret after each day
+    best_variant_share: float       # traffic share of the best variant on the last day
+
+    @property
+    def regret_reduction(self) -> float:
+        """Share of the fixed split's regret avoided"""
+        return 1 - self.expected_regret / self.fixed_split_regret if self.fixed_split_regret else 0.0
+
+
+def _apply_floor(probabilities, mask, min_share: float):
+    """Mix in the floor: each of a row's k variants gets min_share + (1 - k * min_share) * p"""
+    k = mask.sum(axis=1, keepdims=True)
+    floor = np.minimum(min_share, 1 / k)
+    return np.where(mask, floor + (1 - k * floor) * probabilities, 0.0)
+
+
+def thompson_shares(impressions, conversions, mask, draws: int = THOMPSON_DRAWS,
+                    min_share: float = MIN_SHARE, rng=None):
+    """
+    Thompson sampling split for many experiments at once
+
+    Args:
+        impressions, conversions: (experiments, variants) arrays
+        mask: True where a variant exists (rows are padded with False)
+        draws: Joint posterior draws per experiment
+
+    Returns:
+        (experiments, variants) traffic shares; each row sums to 1
+    """
+    rng = np.random.default_rng() if rng is None else rng
+    impressions = np.asarray(impressions, dtype=float)
+    conversions = np.asarray(conversions, dtype=float)
+    n, k = impressions.shape
+    alpha = np.where(mask, 1 + conversions, 1.0)
+    beta = np.where(mask, 1 + np.maximum(impressions - conversions, 0), 1.0)
+
+    mean = alpha / (alpha + beta)
+    sd = np.sqrt(mean * (1 - mean) / (alpha + beta + 1))
+    exact = np.minimum(alpha, beta) < NORMAL_APPROX_MIN
+
+    wins = np.zeros((n, k))
+    step = max(1, CHUNK_VALUES // (k * draws))
+    for start in range(0, n, step):
+        rows = slice(start, start + step)
+        m = mean[rows].shape[0]
+        samples = rng.standard_normal((draws, m, k), dtype=np.float32)
+        samples *= sd[rows]
+        samples += mean[rows]
+        small = exact[rows]
+        if small.any():
+            samples[:, small] = rng.beta(alpha[rows][small], beta[rows][small], size=(draws, int(small.sum())))
+        samples[:, ~mask[rows]] = -np.inf
+        best = samples.argmax(axis=2) + k * np.arange(m)
+        wins[rows] = np.bincount(best.ravel(), minlength=m * k).reshape(m, k)
+    return _apply_floor(wins / draws, mask, min_share)
+
+
+def ucb_shares(impressions, conversions, mask, min_share: float = MIN_SHARE):
+    """
+    Confidence-bound split for many experiments at once
+
+    Bounds are p +/- sqrt(2 p (1 - p) ln N / n) + 3 ln N / n (empirical
+    Bernoulli variance; N is the experiment's total impressions).
+    Variants without impressions are always kept.
+
+    Returns:
+        (experiments, variants) traffic shares; each row sums to 1
+    """
+    impressions = np.asarray(impressions, dtype=float)
+    conversions = np.asarray(conversions, dtype=float)
+    total = np.where(mask, impressions, 0).sum(axis=1, keepdims=True)
+    log_total = np.log(np.maximum(total, 2))
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        rate = np.where(impressions > 0, conversions / impressions, 0.0)
+        radius = np.sqrt(2 * rate * (1 - rate) * log_total / impressions) + 3 * log_total / impressions
+    radius = np.where(mask & (impressions > 0), radius, np.inf)
+
+    best_lower = np.where(mask, rate - radius, -np.inf).max(axis=1, keepdims=True)
+    plausible = mask & (rate + radius >= best_lower)
+    return _apply_floor(plausible / plausible.sum(axis=1, keepdims=True), mask, min_share)
+
+
+SHARE_FUNCTIONS = {'thompson': thompson_shares, 'ucb': ucb_shares}
+
+
+def _pad(groups: List[List[VariantCounts]]):
+    """Flat variant lists -> (experiments, variants) impressions, conversions, mask"""
+    lengths = np.array([len(g) for g in groups])
+    k = int(lengths.max())
+    rows = np.repeat(np.arange(len(groups)), lengths)
+    cols = np.arange(lengths.sum()) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+
+    flat = [v for g in groups for v in g]
+    impressions = np.zeros((len(groups), k))
+    conversions = np.zeros((len(groups), k))
+    mask = np.zeros((len(groups), k), dtype=bool)
+    impressions[rows, cols] = [v.impressions for v in flat]
+    conversions[rows, cols] = [v.conversions for v in flat]
+    mask[rows, cols] = True
+    return impressions, conversions, mask, rows, cols, flat
+
+
+def compute_allocations(
+    totals: Dict[int, List[VariantCounts]],
+    modes: Dict[int, str],
+    rng=None
+) -> List[VariantAllocation]:
+    """
+    New traffic splits from per-variant totals
+
+    Args:
+        totals: get_variant_totals() output
+        modes: {experiment_id: 'thompson' | 'ucb'}
+
+    Returns:
+        One VariantAllocation per variant, traffic_allocation in percent
+    """
+    rng = np.random.default_rng() if rng is None else rng
+    allocations = []
+    for method, share_fn in SHARE_FUNCTIONS.items():
+        ids = [i for i, mode in modes.items() if mode == method and totals.get(i)]
+        if not ids:
+            continue
+        impressions, conversions, mask, rows, cols, flat = _pad([totals[i] for i in ids])
+        kwargs = {'rng': rng} if method == 'thompson' else {}
+        shares = share_fn(impressions, conversions, mask, **kwargs)[rows, cols]
+
+        experiment_ids = np.array(ids)[rows]
+        allocations.extend(
+            VariantAllocation(int(e), v.variant_id, method, round(float(s) * 100, 2),
+                              int(v.impressions), int(v.conversions))
+            for e, v, s in zip(experiment_ids, flat, shares)
+        )
+    return allocations
+
+
+def update_allocations(dm, seed: Optional[int] = None) -> AllocationCycle:
+    """
+    One allocation cycle over every running bandit experiment
+
+    Returns:
+        AllocationCycle with the experiments and variants updated
+    """
+    started = time.perf_counter()
+    modes = dm.get_bandit_experiments()
+    if not modes:
+        return AllocationCycle(0, 0, time.perf_counter() - started)
+
+    totals = dm.get_variant_totals(modes)
+    allocations = compute_allocations(totals, modes, np.random.default_rng(seed))
+    dm.save_allocations(allocations)
+    return AllocationCycle(len({a.experiment_id for a in allocations}), len(allocations),
+                           time.perf_counter() - started)
+
+
+def simulate_regret(
+    rates: Sequence[float],
+    method: str = 'thompson',
+    days: int = 28,
+    daily_traffic: int = 10_000,
+    runs: int = 1_000,
+    seed: Optional[int] = None
+) -> RegretResult:
+    """
+    Expected regret of a bandit split vs. a fixed equal split
+
+    Simulates `runs` independent experiments in one set of arrays. Each
+    day's traffic is split by the current allocation, conversions are
+    drawn at the true `rates`, and the allocation is recomputed from the
+    running totals, as one cycle a day would.
+
+    Args:
+        rates: True conversion rate of each variant
+        method: 'thompson' or 'ucb'
+    """
+    if method not in SHARE_FUNCTIONS:
+        raise ValueError(f"method must be one of {sorted(SHARE_FUNCTIONS)}")
+    rng = np.random.default_rng(seed)
+    rates = np.asarray(rates, dtype=float)
+    k = len(rates)
+    gaps = rates.max() - rates
+    mask = np.ones((runs, k), dtype=bool)
+    kwargs = {'rng': rng} if method == 'thompson' else {}
+
+    impressions = np.zeros((runs, k))
+    conversions = np.zeros((runs, k))
+    shares = np.full((runs, k), 1 / k)
+    regret_by_day = []
+    for _ in range(days):
+        shown = rng.multinomial(daily_traffic, shares)
+        impressions += shown
+        conversions += rng.binomial(shown, rates)
+        regret_by_day.append(float((impressions @ gaps).mean()))
+        shares = SHARE_FUNCTIONS[method](impressions, conversions, mask, **kwargs)
+
+    return RegretResult(
+        method=method,
+        runs=runs,
+        days=days,
+        expected_regret=regret_by_day[-1],
+        fixed_split_regret=float(days * daily_traffic * gaps.mean()),
+        regret_by_day=regret_by_day,
+        best_variant_share=float(shares[:, rates.argmax()].mean()),
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Update bandit traffic splits")
+    parser.add_argument('--simulate', action='store_true',
+                        help="Compare simulated regret with a fixed split instead")
+    args = parser.parse_args()
+
+    if args.simulate:
+        print("🎰 Simulating 28 days at 10,000 users/day (rates 10%, 11%, 12%)...\n")
+        for method in SHARE_FUNCTIONS:
+            result = simulate_regret([0.10, 0.11, 0.12], method=method, runs=500, seed=42)
+            print(f"{method:>8}: {result.expected_regret:,.0f} conversions lost vs. "
+                  f"{result.fixed_split_regret:,.0f} with a fixed split "
+                  f"({result.regret_reduction:.0%} less); best variant gets "
+                  f"{result.best_variant_share:.0%} of traffic on the last day")
+    else:
+        print("🎰 Updating bandit allocations...\n")
+        cycle = update_allocations(open_data_manager())
+        print(f"Experiments updated: {cycle.experiments:,}")
+        print(f"Variants updated:    {cycle.variants:,}")
+        print(f"Time:                {cycle.seconds * 1000:.0f} ms")
+        print("\n✅ Allocation cycle complete!")
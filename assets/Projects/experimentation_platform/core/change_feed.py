@@ -0,0 +1,131 @@
+"""
+Change feed for live views.
+
+Polling with full reruns re-runs every dashboard query each time. The
+ChangeFeed keeps one read connection per database file and asks SQLite
+`PRAGMA data_version`, which changes only when another connection
+commits to that file and costs no page reads. Only when it moved are
+the (small) `experiment_versions` table and an experiments fingerprint
+re-read, so a poll of an idle database touches no tables at all.
+
+One feed can be shared by every dashboard session in a process; each
+session keeps the FeedState it last rendered and asks `changes()` what
+is different now.
+"""
+
+import sqlite3
+import threading
+import time
+from typing import Dict, NamedTuple, Set
+
+from core.data_manager import ExperimentDataManager
+
+# Default seconds between dashboard polls
+REFRESH_SECONDS = 10
+
+# Changes when experiments are created or change status
+CATALOG_FINGERPRINT_QUERY = """
+    SELECT COUNT(*), TOTAL(status = 'running'), MAX(experiment_id) FROM experiments
+"""
+
+
+class FeedState(NamedTuple):
+    """What the database looked like at one poll"""
+    catalog_version: int        # bumped whenever the experiment list changes
+    versions: Dict[int, int]    # experiment_id -> data_version
+    checked_at: float
+
+
+class Changes(NamedTuple):
+    catalog_changed: bool
+    experiments: Set[int]       # experiments whose metrics changed
+
+    def __bool__(self):
+        return self.catalog_changed or bool(self.experiments)
+
+
+class ChangeFeed:
+    """Cheap change detection over the catalog and metrics databases"""
+
+    def __init__(self, dm: ExperimentDataManager):
+        self.dm = dm
+        self._lock = threading.Lock()
+        # Opening the data manager's connections first brings the schema up to date
+        dm.get_connection().close()
+        for conn in dm.get_metrics_connections():
+            conn.close()
+
+        self._catalog = self._open(dm.db_path)
+        self._metrics = [
+            self._catalog if path == dm.db_path else self._open(path)
+            for path in dm.get_metrics_paths()
+        ]
+        self._seen = {}              # id(connection) -> last PRAGMA data_version
+        self._fingerprint = None
+        self._catalog_version = 0
+        self._versions_by_db = [{} for _ in self._metrics]
+        self._state = None
+        self.polls = 0
+        self.reads = 0               # polls that had to read tables
+
+    @staticmethod
+    def _open(path: str) -> sqlite3.Connection:
+        # Shared by Streamlit's script threads; access is serialized by _lock
+        return sqlite3.connect(path, check_same_thread=False)
+
+    def _moved(self, conn: sqlite3.Connection) -> bool:
+        version = conn.execute("PRAGMA data_version").fetchone()[0]
+        moved = self._seen.get(id(conn)) != version
+        self._seen[id(conn)] = version
+        return moved
+
+    def current(self) -> FeedState:
+        """Poll the databases and return the current state"""
+        with self._lock:
+            self.polls += 1
+            read = False
+
+            if self._moved(self._catalog) or self._fingerprint is None:
+                fingerprint = self._catalog.execute(CATALOG_FINGERPRINT_QUERY).fetchone()
+                if fingerprint != self._fingerprint:
+                    self._fingerprint = fingerprint
+                    self._catalog_version += 1
+                read = True
+                # In single-file mode the metrics share this connection
+                if self._metrics[0] is self._catalog:
+                    self._versions_by_db[0] = dict(self._catalog.execute(
+                        "SELECT experiment_id, data_version FROM experiment_versions"
+                    ).fetchall())
+
+            for i, conn in enumerate(self._metrics):
+                if conn is self._catalog:
+                    continue
+                if self._moved(conn) or self._state is None:
+                    self._versions_by_db[i] = dict(conn.execute(
+                        "SELECT experiment_id, data_version FROM experiment_versions"
+                    ).fetchall())
+                    read = True
+
+            if read or self._state is None:
+                self.reads += 1
+                versions = {}
+                for part in self._versions_by_db:
+                    versions.update(part)
+                self._state = FeedState(self._catalog_version, versions, time.time())
+            else:
+                self._state = self._state._replace(checked_at=time.time())
+            return self._state
+
+    @staticmethod
+    def changes(before: FeedState, after: FeedState) -> Changes:
+        """What differs between two states (everything if before is None)"""
+        if before is None:
+            return Changes(True, set(after.versions))
+        changed = {i for i, v in after.versions.items() if before.versions.get(i) != v}
+        return Changes(before.catalog_version != after.catalog_version, changed)
+
+    def close(self):
+        with self._lock:
+            for conn in {id(c): c for c in [self._catalog] + self._metrics}.values():
+                conn.close()
+
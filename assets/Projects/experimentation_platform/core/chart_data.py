@@ -0,0 +1,395 @@
+"""
+Chart data for the app's Plotly figures.
+
+The Dashboard used to build a fresh `go.Figure` per experiment on every
+rerun, and a time series of a long experiment would send every daily
+point to the browser. This module prepares the figures instead:
+
+- Series come from `get_daily_totals` (one grouped query per database
+  for all experiments on screen): each variant's cumulative conversion
+  rate by day, in percent.
+- Series longer than the point budget are downsampled with
+  Largest-Triangle-Three-Buckets (LTTB), which keeps the first and last
+  points and the visually important peaks and turns.
+- Figures are plain dict specs (no plotly import), serialized to JSON
+  once and kept in a `ChartCache` keyed by experiment and data version.
+  A rerun where nothing changed serves the stored JSON; when one
+  experiment changes only its series are queried again.
+- `small_multiples` puts many experiments in one figure, one panel each,
+  instead of one figure per experiment.
+
+`RenderTracker` measures what each page run sends: figures, points,
+JSON payload bytes and the time spent building and drawing them.
+"""
+
+import json
+import threading
+import time
+from collections import OrderedDict, deque
+from typing import Callable, Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+
+from core.data_manager import DailyTotals
+
+POINT_BUDGET = 120          # points per line after downsampling
+MAX_ENTRIES = 2_000         # cached series and figures
+PANELS_PER_FIGURE = 12      # experiments in one small-multiples figure
+COLUMNS = 3                 # panels per row
+PANEL_HEIGHT = 180          # pixels
+RENDER_HISTORY = 50         # page runs kept per page by RenderLog
+
+COLORS = ('#636efa', '#00cc96', '#ef553b', '#ab63fa', '#ffa15a', '#19d3f3')
+
+
+class Series(NamedTuple):
+    """One line of a chart"""
+    name: str
+    x: List[str]                # ISO dates
+    y: List[float]
+    original_points: int        # before downsampling
+
+
+class ChartSpec(NamedTuple):
+    """A serialized figure, ready for st.plotly_chart(json.loads(spec.json))"""
+    json: str
+    points: int                 # points actually sent
+    original_points: int        # points before downsampling
+    build_seconds: float
+
+    @property
+    def payload_bytes(self) -> int:
+        return len(self.json.encode())
+
+
+class PageRender(NamedTuple):
+    """Charts drawn during one run of a page"""
+    page: str
+    figures: int
+    points: int
+    payload_bytes: int
+    cache_hits: int
+    build_seconds: float        # preparing specs (queries, downsampling, serializing)
+    render_seconds: float       # handing them to the UI
+
+
+def lttb(x, y, threshold: int) -> np.ndarray:
+    """
+    Indices of the points Largest-Triangle-Three-Buckets keeps
+
+    The first and last points are always kept; the points in between are
+    split into threshold - 2 buckets and from each bucket the point
+    forming the largest triangle with the previously kept point and the
+    average of the next bucket is kept.
+
+    Args:
+        x, y: Coordinates, x ascending
+        threshold: Points to keep (everything is kept when the series is
+            not longer)
+    """
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+
+    # Bucket i spans edges[i]:edges[i + 1]; the last "bucket" is the last point
+    edges = np.linspace(1, n - 1, threshold - 1).astype(int)
+    edges = np.append(edges, n)
+    kept = np.empty(threshold, dtype=int)
+    kept[0], kept[-1] = 0, n - 1
+
+    # Every bucket's average up front; only the choice within a bucket
+    # depends on the point kept before it
+    sizes = np.diff(edges)
+    avg_x = (np.add.reduceat(x, edges[:-1]) / sizes).tolist()
+    avg_y = (np.add.reduceat(y, edges[:-1]) / sizes).tolist()
+
+    a = 0
+    for i in range(threshold - 2):
+        start, end = edges[i], edges[i + 1]
+        ax, ay = x[a], y[a]
+        area = np.abs((ax - avg_x[i + 1]) * (y[start:end] - ay) - (ax - x[start:end]) * (avg_y[i + 1] - ay))
+        a = start + int(area.argmax())
+        kept[i + 1] = a
+    return kept
+
+
+def conversion_series(rows: Iterable[DailyTotals]) -> List[Series]:
+    """Cumulative conversion rate (%) by day for each variant, full resolution"""
+    by_variant: Dict[str, List[DailyTotals]] = {}
+    for row in rows:
+        by_variant.setdefault(row.variant_name, []).append(row)
+
+    series = []
+    for name, days in by_variant.items():
+        impressions = np.cumsum([d.impressions for d in days], dtype=float)
+        conversions = np.cumsum([d.conversions for d in days], dtype=float)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            rate = np.where(impressions > 0, conversions / impressions * 100, 0.0)
+        series.append(Series(name, [d.date for d in days], rate.round(4).tolist(), len(days)))
+    return series
+
+
+def downsample(series: Series, budget: Optional[int] = POINT_BUDGET) -> Series:
+    """The series with at most `budget` points (None keeps every point)"""
+    if budget is None or len(series.x) <= budget:
+        return series
+    days = np.array([d[:10] for d in series.x], dtype='datetime64[D]').astype(float)
+    kept = lttb(days, series.y, budget)
+    return series._replace(x=[series.x[i] for i in kept], y=[series.y[i] for i in kept])
+
+
+def _traces(series: Sequence[Series], axis: str = '', legend: bool = True) -> List[dict]:
+    return [
+        {
+            'type': 'scatter', 'mode': 'lines', 'name': s.name, 'x': s.x, 'y': s.y,
+            'xaxis': 'x' + axis, 'yaxis': 'y' + axis, 'legendgroup': s.name, 'showlegend': legend,
+            'line': {'color': COLORS[i % len(COLORS)], 'width': 1.5},
+        }
+        for i, s in enumerate(series)
+    ]
+
+
+def _spec(figure: dict, series: Iterable[Series], started: float) -> ChartSpec:
+    series = list(series)
+    return ChartSpec(
+        json=json.dumps(figure, separators=(',', ':')),
+        points=sum(len(s.x) for s in series),
+        original_points=sum(s.original_points for s in series),
+        build_seconds=time.perf_counter() - started,
+    )
+
+
+def line_figure(series: Sequence[Series], title: str = '', height: int = 300,
+                y_title: str = 'Cumulative conversion rate (%)') -> ChartSpec:
+    """One figure with a line per series"""
+    started = time.perf_counter()
+    figure = {
+        'data': _traces(series),
+        'layout': {
+            'title': {'text': title}, 'height': height, 'margin': {'l': 50, 'r': 20, 't': 40, 'b': 40},
+            'yaxis': {'title': {'text': y_title}}, 'xaxis': {'type': 'date'},
+        },
+    }
+    return _spec(figure, series, started)
+
+
+def small_multiples(panels: Sequence[Tuple[str, Sequence[Series]]], columns: int = COLUMNS,
+                    panel_height: int = PANEL_HEIGHT) -> ChartSpec:
+    """
+    One figure with a panel per (title, series) pair, laid out in a grid
+
+    Panels share the legend: the first panel's variants name the colors.
+    """
+    started = time.perf_counter()
+    rows = max(1, -(-len(panels) // columns))
+    gap_x, gap_y = 0.06, 0.12 / rows
+    width = (1 - gap_x * (columns - 1)) / columns
+    height = (1 - gap_y * (rows - 1)) / rows
+
+    data, layout, titles = [], {}, []
+    for i, (title, series) in enumerate(panels):
+        row, col = divmod(i, columns)
+        axis = '' if i == 0 else str(i + 1)
+        left = col * (width + gap_x)
+        top = 1 - row * (height + gap_y)
+        data.extend(_traces(series, axis, legend=i == 0))
+        layout['xaxis' + axis] = {'domain': [left, left + width], 'anchor': 'y' + axis, 'type': 'date',
+                                  'tickfont': {'size': 9}}
+        layout['yaxis' + axis] = {'domain': [top - height, top], 'anchor': 'x' + axis, 'tickfont': {'size': 9}}
+        titles.append({'text': title, 'x': left + width / 2, 'y': top, 'xref': 'paper', 'yref': 'paper',
+                       'xanchor': 'center', 'yanchor': 'bottom', 'showarrow': False, 'font': {'size': 12}})
+
+    layout.update({
+        'height': rows * panel_height + 60, 'annotations': titles,
+        'margin': {'l': 40, 'r': 20, 't': 40, 'b': 30},
+        'legend': {'orientation': 'h', 'y': 1.0, 'yanchor': 'bottom', 'x': 1, 'xanchor': 'right'},
+    })
+    return _spec({'data': data, 'layout': layout}, [s for _, series in panels for s in series], started)
+
+
+class ChartCache:
+    """Downsampled series and serialized figures, keyed by data version"""
+
+    def __init__(self, max_entries: int = MAX_ENTRIES, budget: Optional[int] = POINT_BUDGET):
+        """
+        Args:
+            max_entries: Series lists and figures kept (least recently
+                used are dropped first)
+            budget: Points per line (None keeps every point)
+        """
+        if max_entries < 1:
+            raise ValueError("max_entries must be at least 1")
+        self.max_entries = max_entries
+        self.budget = budget
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _get(self, key):
+        with self._lock:
+            value = self._entries.get(key)
+            if value is None:
+                self.misses += 1
+            else:
+                self._entries.move_to_end(key)
+                self.hits += 1
+            return value
+
+    def _put(self, key, value):
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            if len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def series(self, dm, versions: Dict[int, int]) -> Dict[int, List[Series]]:
+        """
+        Downsampled conversion series per experiment
+
+        Args:
+            dm: Data manager to query experiments missing from the cache
+            versions: {experiment_id: data_version} of the experiments wanted
+
+        Returns:
+            {experiment_id: [Series per variant]}
+        """
+        result, missing = {}, []
+        for experiment_id, version in versions.items():
+            cached = self._get(('series', experiment_id, version))
+            if cached is None:
+                missing.append(experiment_id)
+            else:
+                result[experiment_id] = cached
+
+        for experiment_id, rows in dm.get_daily_totals(missing).items():
+            series = [downsample(s, self.budget) for s in conversion_series(rows)]
+            self._put(('series', experiment_id, versions[experiment_id]), series)
+            result[experiment_id] = series
+        return result
+
+    def figure(self, key: tuple, build: Callable[[], ChartSpec]) -> Tuple[ChartSpec, bool]:
+        """
+        The figure stored under `key`, built with `build` on a miss
+
+        Keys should include the data version of every experiment shown.
+
+        Returns:
+            (spec, whether it came from the cache)
+        """
+        cached = self._get(('figure',) + key)
+        if cached is not None:
+            return cached, True
+        started = time.perf_counter()
+        spec = build()
+        # Count the queries and downsampling behind the figure too
+        spec = spec._replace(build_seconds=time.perf_counter() - started)
+        self._put(('figure',) + key, spec)
+        return spec, False
+
+    def stats(self) -> Dict:
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+            'entries': len(self._entries),
+        }
+
+
+def experiment_chart(dm, cache: ChartCache, experiment_id: int, data_version: int,
+                     title: str = '') -> Tuple[ChartSpec, bool]:
+    """Cumulative conversion rate of one experiment's variants"""
+    def build():
+        return line_figure(cache.series(dm, {experiment_id: data_version})[experiment_id], title)
+    return cache.figure(('experiment', experiment_id, data_version, title), build)
+
+
+def dashboard_charts(dm, cache: ChartCache, experiments: Sequence[Tuple[int, str, int]],
+                     per_figure: int = PANELS_PER_FIGURE) -> List[Tuple[ChartSpec, bool]]:
+    """
+    Small-multiples figures of many experiments
+
+    Args:
+        experiments: (experiment_id, title, data_version) per panel, in
+            display order; experiments without data should be left out
+
+    Returns:
+        One (spec, whether it came from the cache) per figure of up to
+        `per_figure` panels
+    """
+    charts = []
+    for start in range(0, len(experiments), per_figure):
+        page = list(experiments[start:start + per_figure])
+
+        def build(page=page):
+            series = cache.series(dm, {experiment_id: version for experiment_id, _, version in page})
+            return small_multiples([(title, series[experiment_id]) for experiment_id, title, _ in page])
+
+        charts.append(cache.figure(('grid', tuple(page)), build))
+    return charts
+
+
+class RenderTracker:
+    """Collects the charts drawn during one run of a page"""
+
+    def __init__(self, page: str):
+        self.page = page
+        self.figures = 0
+        self.points = 0
+        self.payload_bytes = 0
+        self.cache_hits = 0
+        self.build_seconds = 0.0
+        self.render_seconds = 0.0
+
+    def draw(self, chart: Tuple[ChartSpec, bool], draw: Callable[[dict], None]):
+        """
+        Hand a figure to the UI and count it
+
+        Args:
+            chart: (spec, cached) as returned by the chart functions
+            draw: Called with the figure dict (e.g. st.plotly_chart)
+        """
+        spec, cached = chart
+        started = time.perf_counter()
+        draw(json.loads(spec.json))
+        self.render_seconds += time.perf_counter() - started
+        self.figures += 1
+        self.points += spec.points
+        self.payload_bytes += spec.payload_bytes
+        if cached:
+            self.cache_hits += 1
+        else:
+            self.build_seconds += spec.build_seconds
+
+    def finish(self) -> PageRender:
+        return PageRender(self.page, self.figures, self.points, self.payload_bytes, self.cache_hits,
+                          self.build_seconds, self.render_seconds)
+
+
+class RenderLog:
+    """Recent PageRender records per page"""
+
+    def __init__(self, history: int = RENDER_HISTORY):
+        self.history = history
+        self._runs: Dict[str, deque] = {}
+        self._lock = threading.Lock()
+
+    def record(self, render: PageRender):
+        with self._lock:
+            self._runs.setdefault(render.page, deque(maxlen=self.history)).append(render)
+
+    def summary(self, page: str) -> Optional[Dict]:
+        """Last run and medians over the kept runs of a page (None before its first run)"""
+        with self._lock:
+            runs = list(self._runs.get(page, ()))
+        if not runs:
+            return None
+        return {
+            'runs': len(runs),
+            'last': runs[-1],
+            'median_payload_bytes': float(np.median([r.payload_bytes for r in runs])),
+            'median_seconds': float(np.median([r.build_seconds + r.render_seconds for r in runs])),
+        }
@@ -1,20 +1,310 @@
+import json
 import sqlite3
-import pandas as pd
+import threading
 from datetime import date
-from typing import List, Dict
+from typing import TYPE_CHECKING, Iterable, List, Dict, NamedTuple, Optional
 import os
 
+from core.data_quality import check_metric_rows, check_metric_values
+from database.db_setup import DAY_MOMENTS, DIMENSIONS, create_schema
+
+if TYPE_CHECKING:
+    # pandas is only needed by the DataFrame-returning methods and is
+    # imported inside them, so the checker scripts start quickly
+    import pandas as pd
+
 DB_PATH = os.path.join('data', 'experiments.db')
 
+# Numeric experiment_metrics columns that metric definitions may use
+METRIC_COLUMNS = ('impressions', 'conversions', 'revenue', 'unique_users')
+METRIC_TYPES = ('proportion', 'ratio', 'mean')
+METRIC_ROLES = ('primary', 'secondary', 'guardrail')
+# How variants' traffic_allocation is set (see core/bandit.py)
+ALLOCATION_MODES = ('fixed', 'thompson', 'ucb')
+
+# Experiment columns kept by get/import_experiment_definitions
+EXPERIMENT_FIELDS = ('experiment_id', 'experiment_name', 'description', 'start_date', 'end_date', 'status',
+                     'hypothesis', 'created_by', 'created_at', 'allocation_mode')
+
+# Column order of the tuples taken by insert_metric_rows
+METRIC_ROW_COLUMNS = (
+    'experiment_id', 'variant_id', 'date', 'impressions', 'conversions', 'revenue', 'unique_users'
+) + DIMENSIONS
+
+
+def _insert_query(table: str, columns: tuple) -> str:
+    # A missing unique_users is stored as 0 (the column default), as validation treats it
+    values = ', '.join('COALESCE(?, 0)' if c == 'unique_users' else '?' for c in columns)
+    return f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({values})"
+
+
+INSERT_METRICS_QUERY = _insert_query('experiment_metrics', METRIC_ROW_COLUMNS)
+
+# Column order of rolled-up rows for insert_metric_rows(rollup=True); the
+# metric values sit at the same positions as in METRIC_ROW_COLUMNS
+ROLLUP_ROW_COLUMNS = (
+    'experiment_id', 'variant_id', 'period_start', 'impressions', 'conversions', 'revenue', 'unique_users'
+) + DIMENSIONS + ('granularity', 'days_covered')
+
+INSERT_ROLLUP_QUERY = _insert_query('experiment_metrics_rollup', ROLLUP_ROW_COLUMNS)
+
+# Databases whose schema has been brought up to date in this process
+_SCHEMA_READY = set()
+# Held while a database is migrated, so threads opening it at the same time
+# (scheduler jobs, Streamlit sessions) do not add the same column twice
+_SCHEMA_LOCK = threading.Lock()
+
+
+def _check_dimensions(dimensions: Optional[Dict[str, str]]) -> tuple:
+    """Validate segment dimensions and return their values in DIMENSIONS order"""
+    dimensions = dimensions or {}
+    unknown = set(dimensions) - set(DIMENSIONS)
+    if unknown:
+        raise ValueError(f"Unknown dimensions: {sorted(unknown)} (expected {list(DIMENSIONS)})")
+    return tuple(dimensions.get(d) for d in DIMENSIONS)
+
+
+class ActiveExperiment(NamedTuple):
+    """One row of get_active_experiment_rows()"""
+    experiment_id: int
+    experiment_name: str
+    description: str
+    start_date: str
+    status: str
+    created_by: str
+    variant_count: int
+
+
+class VariantTotals(NamedTuple):
+    """One row of get_experiment_result_rows()"""
+    variant_name: str
+    total_impressions: int
+    total_conversions: int
+    total_revenue: float
+    days_running: int
+
+
+class VariantCounts(NamedTuple):
+    """Running totals of one variant from variant_totals (see get_variant_totals)"""
+    variant_id: int
+    variant_name: str
+    traffic_allocation: float
+    impressions: int
+    conversions: int
+    revenue: float
+
+
+class DailyTotals(NamedTuple):
+    """One variant's metrics for one day (see get_daily_totals)"""
+    variant_name: str
+    date: str                   # ISO date; rolled-up rows use their period start
+    impressions: int
+    conversions: int
+    revenue: float
+
+
+class VariantAllocation(NamedTuple):
+    """A traffic split chosen for one variant (see save_allocations)"""
+    experiment_id: int
+    variant_id: int
+    method: str                 # 'thompson' or 'ucb'
+    traffic_allocation: float   # percent
+    impressions: int            # totals the split was computed from
+    conversions: int
+
+
+class MetricDefinition(NamedTuple):
+    """A metric declared for an experiment (see core/metric_evaluation.py)"""
+    metric_name: str
+    metric_type: str            # 'proportion', 'ratio' or 'mean'
+    numerator: str              # a METRIC_COLUMNS entry
+    denominator: Optional[str]  # a METRIC_COLUMNS entry (None for 'mean')
+    role: str = 'primary'       # 'primary', 'secondary' or 'guardrail'
+    direction: str = 'increase' # which way is good
+    threshold: float = 0.0      # guardrails: tolerated relative change in %
+
+
+class ExperimentSnapshot(NamedTuple):
+    """Computed statistics for an experiment at a given data version"""
+    experiment_id: int
+    data_version: int
+    alpha: float
+    computed_at: Optional[str]
+    control_name: str
+    variant_name: str
+    control_impressions: int
+    control_conversions: int
+    control_revenue: float
+    variant_impressions: int
+    variant_conversions: int
+    variant_revenue: float
+    days_running: int
+    is_significant: bool
+    p_value: float
+    confidence: float
+    z_score: float
+    control_rate: float
+    variant_rate: float
+    absolute_lift: float
+    relative_lift: float
+    winner: str
+
+
+ACTIVE_EXPERIMENTS_QUERY = """
+    SELECT 
+        e.experiment_id,
+        e.experiment_name,
+        e.description,
+        e.start_date,
+        e.status,
+        e.created_by,
+        COUNT(DISTINCT v.variant_id) as variant_count
+    FROM experiments e
+    LEFT JOIN variants v ON e.experiment_id = v.experiment_id
+    WHERE e.status = 'running'
+    GROUP BY e.experiment_id
+    ORDER BY e.start_date DESC
+"""
+
+# Daily rows of completed experiments may have been rolled up by
+# core/retention.py, so totals combine both tables
+EXPERIMENT_RESULTS_QUERY = """
+    WITH totals AS (
+        SELECT variant_id, impressions, conversions, revenue, 0 as days, date
+        FROM experiment_metrics
+        WHERE experiment_id = :experiment_id
+        UNION ALL
+        SELECT variant_id, impressions, conversions, revenue, days_covered, NULL
+        FROM experiment_metrics_rollup
+        WHERE experiment_id = :experiment_id
+    )
+    SELECT 
+        v.variant_name,
+        COALESCE(SUM(t.impressions), 0) as total_impressions,
+        COALESCE(SUM(t.conversions), 0) as total_conversions,
+        COALESCE(SUM(t.revenue), 0) as total_revenue,
+        COUNT(DISTINCT t.date) + COALESCE(SUM(t.days), 0) as days_running
+    FROM variants v
+    LEFT JOIN totals t ON v.variant_id = t.variant_id
+    WHERE v.experiment_id = :experiment_id
+    GROUP BY v.variant_id, v.variant_name
+    ORDER BY v.variant_name
+"""
+
+# Totals for several experiments at once (see get_experiment_totals)
+EXPERIMENT_TOTALS_QUERY = """
+    WITH totals AS (
+        SELECT variant_id, impressions, conversions, revenue, 0 as days, date
+        FROM experiment_metrics
+        WHERE experiment_id IN ({ids})
+        UNION ALL
+        SELECT variant_id, impressions, conversions, revenue, days_covered, NULL
+        FROM experiment_metrics_rollup
+        WHERE experiment_id IN ({ids})
+    )
+    SELECT 
+        v.experiment_id,
+        v.variant_name,
+        COALESCE(SUM(t.impressions), 0) as total_impressions,
+        COALESCE(SUM(t.conversions), 0) as total_conversions,
+        COALESCE(SUM(t.revenue), 0) as total_revenue,
+        COUNT(DISTINCT t.date) + COALESCE(SUM(t.days), 0) as days_running
+    FROM variants v
+    LEFT JOIN totals t ON v.variant_id = t.variant_id
+    WHERE v.experiment_id IN ({ids})
+    GROUP BY v.variant_id, v.variant_name
+    ORDER BY v.experiment_id, v.variant_name
+"""
+
+
+def open_data_manager(
+    db_path: str = DB_PATH,
+    shard_dir: Optional[str] = None,
+    read_snapshot: bool = False
+) -> 'ExperimentDataManager':
+    """
+    Data manager for the local database
+    
+    Uses the sharded layout when `shard_dir` (default data/shards) holds
+    one created by database/reshard.py, otherwise the single file at
+    `db_path`. With read_snapshot, reads from the single file are served
+    from an in-memory copy (see core/read_snapshot.py).
+    """
+    from core.sharded_data_manager import SHARD_DIR, ShardedExperimentDataManager, has_shard_layout
+    
+    shard_dir = SHARD_DIR if shard_dir is None else shard_dir
+    if has_shard_layout(shard_dir):
+        return ShardedExperimentDataManager(shard_dir)
+    if read_snapshot:
+        from core.read_snapshot import ReadSnapshotDataManager
+        return ReadSnapshotDataManager(db_path)
+    return ExperimentDataManager(db_path)
+
+
 class ExperimentDataManager:
     """Handles all database operations"""
     
-    def __init__(self):
-        self.db_path = DB_PATH
+    def __init__(self, db_path: str = DB_PATH):
+        self.db_path = db_path
+    
+    def _connect(self, path: str, schema=create_schema) -> sqlite3.Connection:
+        conn = sqlite3.connect(path)
+        if path not in _SCHEMA_READY:
+            with _SCHEMA_LOCK:
+                if path not in _SCHEMA_READY:
+                    # Adds tables/triggers introduced after the database was created
+                    schema(conn)
+                    _SCHEMA_READY.add(path)
+        return conn
     
     def get_connection(self):
-        """Get database connection"""
-        return sqlite3.connect(self.db_path)
+        """Get database connection (experiments, variants, snapshots)"""
+        return self._connect(self.db_path)
+    
+    def get_metrics_connection(self, experiment_id: int) -> sqlite3.Connection:
+        """
+        Connection to the database holding an experiment's metric rows
+        
+        The catalog tables (experiments, variants) are readable through it
+        too. In single-file mode this is just get_connection().
+        """
+        return self.get_connection()
+    
+    def get_metrics_connections(self) -> List[sqlite3.Connection]:
+        """One connection per database holding metric rows"""
+        return [self.get_connection()]
+    
+    def get_metrics_paths(self) -> List[str]:
+        """Files of the databases holding metric rows"""
+        return [self.db_path]
+    
+    def get_read_connection(self) -> sqlite3.Connection:
+        """
+        Connection for read-only queries of the catalog tables
+        
+        Same as get_connection() here; core/read_snapshot.py serves reads
+        from an in-memory copy instead.
+        """
+        return self.get_connection()
+    
+    def get_read_metrics_connection(self, experiment_id: int) -> sqlite3.Connection:
+        """Connection for read-only queries of an experiment's metric rows"""
+        return self.get_metrics_connection(experiment_id)
+    
+    def refresh(self, force: bool = False) -> bool:
+        """Bring reads up to date with the files (they always are here)"""
+        return False
+    
+    def _map_experiments(self, experiment_ids: List[int], fn) -> Dict:
+        """
+        Run fn(conn, ids) -> dict (read-only) over the databases holding
+        the given experiments and merge the results
+        """
+        conn = self.get_read_metrics_connection(experiment_ids[0])
+        try:
+            return fn(conn, experiment_ids)
+        finally:
+            conn.close()
     
     def create_experiment(
         self,
@@ -23,9 +313,19 @@ class ExperimentDataManager:
         hypothesis: str,
         start_date: date,
         created_by: str,
-        variants: List[Dict]
+        variants: List[Dict],
+        metrics: Optional[List[MetricDefinition]] = None,
+        allocation_mode: str = 'fixed'
     ) -> int:
-        """Create a new experiment"""
+        """
+        Create a new experiment (optionally with its metric definitions)
+        
+        With allocation_mode 'thompson' or 'ucb' the variants' allocations
+        are only the starting split; core/bandit.py updates them.
+        """
+        if allocation_mode not in ALLOCATION_MODES:
+            raise ValueError(f"allocation_mode must be one of {ALLOCATION_MODES}")
+        
         conn = self.get_connection()
         cursor = conn.cursor()
         
@@ -36,9 +336,9 @@ class ExperimentDataManager:
         # Insert experiment
         cursor.execute("""
             INSERT INTO experiments 
-            (experiment_name, description, hypothesis, start_date, created_by)
-            VALUES (?, ?, ?, ?, ?)
-        """, (name, description, hypothesis, start_date_val, created_by))
+            (experiment_name, description, hypothesis, start_date, created_by, allocation_mode)
+            VALUES (?, ?, ?, ?, ?, ?)
+        """, (name, description, hypothesis, start_date_val, created_by, allocation_mode))
         
         experiment_id = cursor.lastrowid
         
@@ -55,57 +355,382 @@ class ExperimentDataManager:
                 variant['allocation']
             ))
         
+        for metric in metrics or []:
+            self._insert_metric_definition(cursor, experiment_id, metric)
+        
         conn.commit()
         conn.close()
         
         return experiment_id
     
-    def get_active_experiments(self) -> pd.DataFrame:
-        """Get all running experiments"""
-        query = """
-            SELECT 
-                e.experiment_id,
-                e.experiment_name,
-                e.description,
-                e.start_date,
-                e.status,
-                e.created_by,
-                COUNT(DISTINCT v.variant_id) as variant_count
-            FROM experiments e
-            LEFT JOIN variants v ON e.experiment_id = v.experiment_id
-            WHERE e.status = 'running'
-            GROUP BY e.experiment_id
-            ORDER BY e.start_date DESC
-        """
-
+    def _insert_metric_definition(self, cursor, experiment_id: int, metric: MetricDefinition):
+        if metric.metric_type not in METRIC_TYPES:
+            raise ValueError(f"metric_type must be one of {METRIC_TYPES}")
+        if metric.role not in METRIC_ROLES:
+            raise ValueError(f"role must be one of {METRIC_ROLES}")
+        if metric.direction not in ('increase', 'decrease'):
+            raise ValueError("direction must be 'increase' or 'decrease'")
+        columns = [metric.numerator] + ([metric.denominator] if metric.metric_type != 'mean' else [])
+        if any(c not in METRIC_COLUMNS for c in columns):
+            raise ValueError(f"numerator/denominator must be one of {METRIC_COLUMNS}")
+        
+        cursor.execute("""
+            INSERT OR REPLACE INTO experiment_metric_definitions
+            (experiment_id, metric_name, metric_type, numerator, denominator, role, direction, threshold)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        """, (experiment_id, *metric))
+    
+    def add_metric_definition(self, experiment_id: int, metric: MetricDefinition):
+        """Declare (or replace) a metric for an existing experiment"""
         conn = self.get_connection()
-        # Parse the start_date column as a date/time when loading into a DataFrame
-        df = pd.read_sql(query, conn, parse_dates=['start_date'])
+        cursor = conn.cursor()
+        self._insert_metric_definition(cursor, experiment_id, metric)
+        # The stored evaluation no longer covers the declared metrics
+        cursor.execute("DELETE FROM metric_snapshots WHERE experiment_id = ?", (experiment_id,))
+        conn.commit()
         conn.close()
-
-        return df
     
-    def get_experiment_results(self, experiment_id: int) -> pd.DataFrame:
-        """Get aggregated results for an experiment"""
-        query = """
-            SELECT 
-                v.variant_name,
-                COALESCE(SUM(em.impressions), 0) as total_impressions,
-                COALESCE(SUM(em.conversions), 0) as total_conversions,
-                COALESCE(SUM(em.revenue), 0) as total_revenue,
-                COUNT(DISTINCT em.date) as days_running
+    def get_metric_definitions(self, experiment_id: int) -> List[MetricDefinition]:
+        """Metrics declared for an experiment, primary first"""
+        conn = self.get_read_connection()
+        rows = conn.execute(f"""
+            SELECT {', '.join(MetricDefinition._fields)}
+            FROM experiment_metric_definitions
+            WHERE experiment_id = ?
+            ORDER BY CASE role WHEN 'primary' THEN 0 WHEN 'secondary' THEN 1 ELSE 2 END, definition_id
+        """, (experiment_id,)).fetchall()
+        conn.close()
+        
+        return [MetricDefinition(*row) for row in rows]
+    
+    def get_metric_sums(self, experiment_id: int, columns: Iterable[str], products: Iterable[tuple] = ()) -> Dict[str, Dict]:
+        """
+        Per-variant sufficient statistics for metric evaluation in one scan
+        
+        The unit of analysis is a variant-day: rows are first summed per
+        variant and date (over segments), so logging segments or running
+        retention does not change the statistics. For every column:
+        SUM(col) and the sum of squared daily totals; for every (a, b) pair
+        in `products`: the sum of products of daily totals; plus n, the
+        number of days. Rolled-up periods contribute the day-level sums
+        retention stored for them (estimated as equal days for rollups made
+        before those were kept).
+        
+        Returns:
+            {variant_name: {'n': ..., 'sum_revenue': ..., 'sumsq_revenue': ...,
+                            'sum_revenue_x_impressions': ...}, ...}
+        """
+        columns = list(dict.fromkeys(columns))
+        products = list(dict.fromkeys(products))
+        if any(c not in METRIC_COLUMNS for c in columns + [c for pair in products for c in pair]):
+            raise ValueError(f"columns must be in {METRIC_COLUMNS}")
+        
+        # (output name, first column, second column, rollup moment column)
+        moments = [(f"sumsq_{c}", c, c, f"day_sumsq_{c}") for c in columns]
+        for a, b in products:
+            stored = f"day_sum_{a}_x_{b}" if f"day_sum_{a}_x_{b}" in DAY_MOMENTS else f"day_sum_{b}_x_{a}"
+            moments.append((f"sum_{a}_x_{b}", a, b, stored))
+        
+        daily = ', '.join(f"SUM({c}) as {c}" for c in METRIC_COLUMNS)
+        raw_units = ', '.join([f"{c} as sum_{c}" for c in columns]
+                              + [f"{a} * {b} as {name}" for name, a, b, _ in moments])
+        rollup_units = ', '.join(
+            [f"SUM({c}) as sum_{c}" for c in columns]
+            + [f"COALESCE(SUM({stored}), SUM({a}) * SUM({b}) * 1.0 / NULLIF(SUM(days_covered), 0)) as {name}"
+               for name, a, b, stored in moments]
+        )
+        aggregates = ['COALESCE(SUM(u.days), 0) as n']
+        aggregates += [f"COALESCE(SUM(u.sum_{c}), 0) as sum_{c}" for c in columns]
+        aggregates += [f"COALESCE(SUM(u.{name}), 0) as {name}" for name, _, _, _ in moments]
+        
+        conn = self.get_read_metrics_connection(experiment_id)
+        cursor = conn.execute(f"""
+            WITH days AS (
+                SELECT variant_id, {daily}
+                FROM experiment_metrics
+                WHERE experiment_id = :experiment_id
+                GROUP BY variant_id, date
+            ),
+            units AS (
+                SELECT variant_id, 1 as days{', ' + raw_units if raw_units else ''}
+                FROM days
+                UNION ALL
+                SELECT variant_id, SUM(days_covered){', ' + rollup_units if rollup_units else ''}
+                FROM experiment_metrics_rollup
+                WHERE experiment_id = :experiment_id
+                GROUP BY variant_id, period_start
+            )
+            SELECT v.variant_name, {', '.join(aggregates)}
             FROM variants v
-            LEFT JOIN experiment_metrics em ON v.variant_id = em.variant_id
-            WHERE v.experiment_id = ?
+            LEFT JOIN units u ON u.variant_id = v.variant_id
+            WHERE v.experiment_id = :experiment_id
             GROUP BY v.variant_id, v.variant_name
             ORDER BY v.variant_name
+        """, {'experiment_id': experiment_id})
+        names = [d[0] for d in cursor.description][1:]
+        sums = {row[0]: dict(zip(names, row[1:])) for row in cursor.fetchall()}
+        conn.close()
+        
+        return sums
+    
+    def get_active_experiment_rows(self) -> List[ActiveExperiment]:
+        """Get all running experiments as plain tuples (no pandas needed)"""
+        conn = self.get_read_connection()
+        rows = conn.execute(ACTIVE_EXPERIMENTS_QUERY).fetchall()
+        conn.close()
+
+        return [ActiveExperiment(*row) for row in rows]
+
+    def get_active_experiments(self) -> 'pd.DataFrame':
+        """Get all running experiments"""
+        import pandas as pd
+
+        df = pd.DataFrame(self.get_active_experiment_rows(), columns=ActiveExperiment._fields)
+        # Parse the start_date column as a date/time for display and date math
+        df['start_date'] = pd.to_datetime(df['start_date'])
+
+        return df
+    
+    def get_experiment_result_rows(self, experiment_id: int) -> List[VariantTotals]:
+        """Get aggregated results for an experiment as plain tuples"""
+        conn = self.get_read_metrics_connection(experiment_id)
+        rows = conn.execute(EXPERIMENT_RESULTS_QUERY, {'experiment_id': experiment_id}).fetchall()
+        conn.close()
+
+        return [VariantTotals(*row) for row in rows]
+
+    def get_experiment_results(self, experiment_id: int) -> 'pd.DataFrame':
+        """Get aggregated results for an experiment"""
+        import pandas as pd
+
+        return pd.DataFrame(self.get_experiment_result_rows(experiment_id), columns=VariantTotals._fields)
+    
+    def get_experiment_totals(self, experiment_ids: Iterable[int]) -> Dict[int, List[VariantTotals]]:
+        """get_experiment_result_rows for many experiments with one query per database"""
+        ids = [int(i) for i in experiment_ids]
+        if not ids:
+            return {}
+        
+        def query(conn, ids):
+            totals = {i: [] for i in ids}
+            placeholders = ','.join('?' * len(ids))
+            rows = conn.execute(EXPERIMENT_TOTALS_QUERY.format(ids=placeholders), ids * 3).fetchall()
+            for row in rows:
+                totals[row[0]].append(VariantTotals(*row[1:]))
+            return totals
+        
+        return self._map_experiments(ids, query)
+    
+    def get_variant_totals(self, experiment_ids: Iterable[int]) -> Dict[int, List[VariantCounts]]:
+        """
+        Per-variant totals kept by triggers, without scanning metric rows
+        
+        Every variant is listed (with zeros before it has metrics), ordered
+        by variant_id.
+        """
+        ids = [int(i) for i in experiment_ids]
+        if not ids:
+            return {}
+        
+        def query(conn, ids):
+            totals = {i: [] for i in ids}
+            rows = conn.execute(f"""
+                SELECT v.experiment_id, v.variant_id, v.variant_name, v.traffic_allocation,
+                       COALESCE(t.impressions, 0), COALESCE(t.conversions, 0), COALESCE(t.revenue, 0)
+                FROM variants v
+                LEFT JOIN variant_totals t ON t.variant_id = v.variant_id
+                WHERE v.experiment_id IN ({','.join('?' * len(ids))})
+                ORDER BY v.experiment_id, v.variant_id
+            """, ids).fetchall()
+            for row in rows:
+                totals[row[0]].append(VariantCounts(*row[1:]))
+            return totals
+        
+        return self._map_experiments(ids, query)
+    
+    def get_daily_totals(self, experiment_ids: Iterable[int]) -> Dict[int, List[DailyTotals]]:
         """
+        Per-variant totals by day for many experiments, one query per database
+        
+        Rows are ordered by variant_id, then date. Rolled-up periods of
+        completed experiments (core/retention.py) appear as one row at
+        their period start.
+        """
+        ids = [int(i) for i in experiment_ids]
+        if not ids:
+            return {}
+        
+        def query(conn, ids):
+            placeholders = ','.join('?' * len(ids))
+            daily = {i: [] for i in ids}
+            rows = conn.execute(f"""
+                WITH days AS (
+                    SELECT variant_id, date, impressions, conversions, revenue
+                    FROM experiment_metrics
+                    WHERE experiment_id IN ({placeholders})
+                    UNION ALL
+                    SELECT variant_id, period_start, impressions, conversions, revenue
+                    FROM experiment_metrics_rollup
+                    WHERE experiment_id IN ({placeholders})
+                )
+                SELECT v.experiment_id, v.variant_name, d.date,
+                       SUM(d.impressions), SUM(d.conversions), SUM(d.revenue)
+                FROM days d
+                JOIN variants v ON v.variant_id = d.variant_id
+                GROUP BY v.variant_id, d.date
+                ORDER BY v.experiment_id, v.variant_id, d.date
+            """, ids * 2).fetchall()
+            for row in rows:
+                daily[row[0]].append(DailyTotals(*row[1:]))
+            return daily
+        
+        return self._map_experiments(ids, query)
+    
+    def get_allocation_modes(self, experiment_ids: Iterable[int]) -> Dict[int, str]:
+        """allocation_mode per experiment"""
+        ids = [int(i) for i in experiment_ids]
+        if not ids:
+            return {}
+        
+        conn = self.get_read_connection()
+        rows = conn.execute(f"""
+            SELECT experiment_id, allocation_mode FROM experiments
+            WHERE experiment_id IN ({','.join('?' * len(ids))})
+        """, ids).fetchall()
+        conn.close()
+        return dict(rows)
+    
+    def get_bandit_experiments(self) -> Dict[int, str]:
+        """{experiment_id: allocation_mode} of running experiments not on a fixed split"""
+        conn = self.get_read_connection()
+        rows = conn.execute("""
+            SELECT experiment_id, allocation_mode FROM experiments
+            WHERE status = 'running' AND allocation_mode != 'fixed'
+            ORDER BY experiment_id
+        """).fetchall()
+        conn.close()
+        return dict(rows)
+    
+    def save_allocations(self, allocations: Iterable[VariantAllocation]) -> int:
+        """
+        Write new traffic splits and their history in a single transaction
+        
+        Returns:
+            Number of variants updated
+        """
+        rows = list(allocations)
+        if not rows:
+            return 0
         
         conn = self.get_connection()
-        df = pd.read_sql(query, conn, params=(experiment_id,))
+        try:
+            conn.executemany(
+                "UPDATE variants SET traffic_allocation = ? WHERE variant_id = ?",
+                [(a.traffic_allocation, a.variant_id) for a in rows]
+            )
+            conn.executemany(f"""
+                INSERT INTO allocation_history ({', '.join(VariantAllocation._fields)})
+                VALUES ({', '.join('?' * len(VariantAllocation._fields))})
+            """, rows)
+            conn.commit()
+        finally:
+            conn.close()
+        
+        return len(rows)
+    
+    def get_allocation_history(self, experiment_id: int) -> 'pd.DataFrame':
+        """Every split written for an experiment, oldest first"""
+        import pandas as pd
+        
+        columns = ['computed_at', 'variant_name', 'method', 'traffic_allocation', 'impressions', 'conversions']
+        conn = self.get_read_connection()
+        rows = conn.execute("""
+            SELECT h.computed_at, v.variant_name, h.method, h.traffic_allocation,
+                   h.impressions, h.conversions
+            FROM allocation_history h
+            JOIN variants v ON v.variant_id = h.variant_id
+            WHERE h.experiment_id = ?
+            ORDER BY h.history_id
+        """, (int(experiment_id),)).fetchall()
         conn.close()
+        return pd.DataFrame(rows, columns=columns)
+    
+    def get_data_versions(self, experiment_ids: Iterable[int]) -> Dict[int, int]:
+        """Current data version per experiment (0 if it never had metrics)"""
+        ids = [int(i) for i in experiment_ids]
+        if not ids:
+            return {}
         
-        return df
+        def query(conn, ids):
+            versions = dict.fromkeys(ids, 0)
+            versions.update(conn.execute(f"""
+                SELECT experiment_id, data_version FROM experiment_versions
+                WHERE experiment_id IN ({','.join('?' * len(ids))})
+            """, ids).fetchall())
+            return versions
+        
+        return self._map_experiments(ids, query)
+    
+    def get_snapshots(self, experiment_ids: Iterable[int]) -> Dict[int, ExperimentSnapshot]:
+        """Stored snapshots for the given experiments, keyed by experiment_id"""
+        ids = list(experiment_ids)
+        if not ids:
+            return {}
+        
+        conn = self.get_read_connection()
+        rows = conn.execute(f"""
+            SELECT {', '.join(ExperimentSnapshot._fields)} FROM experiment_snapshots
+            WHERE experiment_id IN ({','.join('?' * len(ids))})
+        """, ids).fetchall()
+        conn.close()
+        
+        snapshots = {}
+        for row in rows:
+            snap = ExperimentSnapshot(*row)
+            snapshots[snap.experiment_id] = snap._replace(is_significant=bool(snap.is_significant))
+        return snapshots
+    
+    def save_snapshots(self, snapshots: Iterable[ExperimentSnapshot]):
+        """Insert or replace snapshots in a single transaction"""
+        fields = [f for f in ExperimentSnapshot._fields if f != 'computed_at']
+        conn = self.get_connection()
+        conn.executemany(f"""
+            INSERT OR REPLACE INTO experiment_snapshots ({', '.join(fields)})
+            VALUES ({', '.join('?' * len(fields))})
+        """, [tuple(getattr(s, f) for f in fields) for s in snapshots])
+        conn.commit()
+        conn.close()
+    
+    def get_metric_snapshots(self, experiment_ids: Iterable[int]) -> Dict[int, tuple]:
+        """
+        Stored metric evaluations for the given experiments
+        
+        Returns:
+            Dictionary of experiment_id -> (data_version, alpha, results),
+            results being the decoded JSON list of MetricResult fields
+        """
+        ids = list(experiment_ids)
+        if not ids:
+            return {}
+        
+        conn = self.get_read_connection()
+        rows = conn.execute(f"""
+            SELECT experiment_id, data_version, alpha, results FROM metric_snapshots
+            WHERE experiment_id IN ({','.join('?' * len(ids))})
+        """, ids).fetchall()
+        conn.close()
+        
+        return {row[0]: (row[1], row[2], json.loads(row[3])) for row in rows}
+    
+    def save_metric_snapshots(self, snapshots: Iterable[tuple]):
+        """Insert or replace (experiment_id, data_version, alpha, results) rows in a single transaction"""
+        conn = self.get_connection()
+        conn.executemany("""
+            INSERT OR REPLACE INTO metric_snapshots (experiment_id, data_version, alpha, results)
+            VALUES (?, ?, ?, ?)
+        """, [(i, version, alpha, json.dumps(results)) for i, version, alpha, results in snapshots])
+        conn.commit()
+        conn.close()
     
     def log_metrics(
         self,
@@ -114,10 +739,20 @@ class ExperimentDataManager:
         date_val: date,
         impressions: int,
         conversions: int,
-        revenue: float
+        revenue: float,
+        dimensions: Optional[Dict[str, str]] = None
     ):
-        """Log daily metrics for a variant"""
-        conn = self.get_connection()
+        """
+        Log daily metrics for a variant
+        
+        Args:
+            dimensions: Optional segment values, e.g.
+                {'platform': 'ios', 'country': 'US', 'user_type': 'new'}
+        """
+        dims = _check_dimensions(dimensions)
+        check_metric_values(impressions, conversions, revenue)
+        
+        conn = self.get_metrics_connection(experiment_id)
         cursor = conn.cursor()
         
         # Get variant_id
@@ -137,15 +772,246 @@ class ExperimentDataManager:
         date_val_norm = date_val.isoformat() if hasattr(date_val, 'isoformat') else date_val
 
         # Insert metrics (store date as ISO-formatted text)
-        cursor.execute("""
+        cursor.execute(f"""
             INSERT INTO experiment_metrics 
-            (experiment_id, variant_id, date, impressions, conversions, revenue)
-            VALUES (?, ?, ?, ?, ?, ?)
-        """, (experiment_id, variant_id, date_val_norm, impressions, conversions, revenue))
+            (experiment_id, variant_id, date, impressions, conversions, revenue, {', '.join(DIMENSIONS)})
+            VALUES (?, ?, ?, ?, ?, ?, {', '.join('?' * len(DIMENSIONS))})
+        """, (experiment_id, variant_id, date_val_norm, impressions, conversions, revenue, *dims))
         
         conn.commit()
         conn.close()
     
+    def log_metrics_batch(self, experiment_id: int, rows: Iterable[Dict]) -> int:
+        """
+        Log many metric rows for one experiment in a single transaction
+        
+        Each row is a dict with variant_name, date, impressions, conversions,
+        revenue and optionally unique_users and any of the DIMENSIONS keys.
+        Variant names are resolved with one query up front.
+        
+        Returns:
+            Number of rows inserted
+        """
+        variant_ids = {name: variant_id for (_, name), variant_id in self.get_variant_ids([experiment_id]).items()}
+        
+        params = []
+        for row in rows:
+            variant_id = variant_ids.get(row['variant_name'])
+            if variant_id is None:
+                raise ValueError(f"Variant '{row['variant_name']}' not found for experiment {experiment_id}")
+            date_val = row['date']
+            params.append((
+                experiment_id,
+                variant_id,
+                date_val.isoformat() if hasattr(date_val, 'isoformat') else date_val,
+                row['impressions'],
+                row['conversions'],
+                row['revenue'],
+                row.get('unique_users', 0),
+                *(row.get(d) for d in DIMENSIONS)
+            ))
+        
+        return self.insert_metric_rows(params)
+    
+    def get_variant_ids(self, experiment_ids: Iterable[int]) -> Dict[tuple, int]:
+        """(experiment_id, variant_name) -> variant_id for the given experiments, in one query"""
+        ids = [int(i) for i in experiment_ids]
+        if not ids:
+            return {}
+        
+        conn = self.get_connection()
+        rows = conn.execute(f"""
+            SELECT experiment_id, variant_name, variant_id FROM variants
+            WHERE experiment_id IN ({','.join('?' * len(ids))})
+        """, ids).fetchall()
+        conn.close()
+        
+        return {(experiment_id, name): variant_id for experiment_id, name, variant_id in rows}
+    
+    def insert_metric_rows(self, rows: List[tuple], validate: bool = True, rollup: bool = False) -> int:
+        """
+        Insert pre-resolved metric rows in a single transaction
+        
+        Rows are tuples in METRIC_ROW_COLUMNS order and must all belong to
+        experiments stored in the same database (always true in
+        single-file mode).
+        
+        Args:
+            validate: Check the values of all rows first (pass False only
+                for rows already checked with core.data_quality)
+            rollup: Rows are rolled-up periods in ROLLUP_ROW_COLUMNS order
+                (as exported by bulk_io.py) and go to
+                experiment_metrics_rollup
+        
+        Returns:
+            Number of rows inserted
+        """
+        if not rows:
+            return 0
+        if validate:
+            check_metric_rows(rows)
+        
+        conn = self.get_metrics_connection(rows[0][0])
+        try:
+            conn.executemany(INSERT_ROLLUP_QUERY if rollup else INSERT_METRICS_QUERY, rows)
+            if rollup:
+                # Only experiment_metrics has version triggers; snapshots of
+                # these experiments are stale now as well
+                conn.executemany("""
+                    INSERT INTO experiment_versions (experiment_id, data_version) VALUES (?, 1)
+                    ON CONFLICT(experiment_id) DO UPDATE SET data_version = data_version + 1
+                """, [(i,) for i in {row[0] for row in rows}])
+            conn.commit()
+        finally:
+            conn.close()
+        
+        return len(rows)
+    
+    def get_segment_cube(self, experiment_id: int, dimensions=DIMENSIONS) -> 'pd.DataFrame':
+        """
+        Per-variant totals for every segment of an experiment
+        
+        One grouped query returns totals at the finest grain (all
+        `dimensions` together). The coarser segments of the cube are then
+        rolled up from that small result in pandas, with 'all' standing for
+        "any value" - e.g. platform='ios', country='all', user_type='all'.
+        Rows without a value for a dimension are reported as 'unknown'.
+        
+        Returns:
+            DataFrame with the dimension columns, variant_name,
+            total_impressions, total_conversions and total_revenue
+        """
+        import pandas as pd
+        from itertools import combinations
+        
+        dims = list(dimensions)
+        unknown = set(dims) - set(DIMENSIONS)
+        if unknown:
+            raise ValueError(f"Unknown dimensions: {sorted(unknown)}")
+        
+        selected = ', '.join(f"COALESCE(m.{d}, 'unknown') as {d}" for d in dims)
+        grouping = ', '.join(['v.variant_id', 'v.variant_name'] + dims)
+        sources = ' UNION ALL '.join(
+            f"SELECT variant_id, impressions, conversions, revenue, {', '.join(DIMENSIONS)} "
+            f"FROM {table} WHERE experiment_id = :experiment_id"
+            for table in ('experiment_metrics', 'experiment_metrics_rollup')
+        )
+        query = f"""
+            SELECT 
+                {selected + ',' if dims else ''}
+                v.variant_name,
+                SUM(m.impressions) as total_impressions,
+                SUM(m.conversions) as total_conversions,
+                SUM(m.revenue) as total_revenue
+            FROM ({sources}) m
+            JOIN variants v ON v.variant_id = m.variant_id
+            GROUP BY {grouping}
+        """
+        
+        conn = self.get_read_metrics_connection(experiment_id)
+        finest = pd.read_sql(query, conn, params={'experiment_id': experiment_id})
+        conn.close()
+        
+        values = ['total_impressions', 'total_conversions', 'total_revenue']
+        levels = []
+        for size in range(len(dims), -1, -1):
+            for kept in combinations(dims, size):
+                level = finest.groupby(list(kept) + ['variant_name'], as_index=False)[values].sum()
+                for d in dims:
+                    if d not in kept:
+                        level[d] = 'all'
+                levels.append(level)
+        
+        return pd.concat(levels, ignore_index=True)[dims + ['variant_name'] + values]
+    
+    def get_experiment_definitions(self, experiment_ids: Iterable[int]) -> List[Dict]:
+        """
+        Everything needed to recreate the given experiments elsewhere
+        
+        Returns:
+            One dict per experiment with the EXPERIMENT_FIELDS, 'variants'
+            (name, description, allocation, as create_experiment takes them)
+            and 'metrics' (MetricDefinition fields)
+        """
+        ids = [int(i) for i in experiment_ids]
+        if not ids:
+            return []
+        placeholders = ','.join('?' * len(ids))
+        
+        conn = self.get_read_connection()
+        experiments = conn.execute(f"""
+            SELECT {', '.join(EXPERIMENT_FIELDS)} FROM experiments
+            WHERE experiment_id IN ({placeholders}) ORDER BY experiment_id
+        """, ids).fetchall()
+        variants = conn.execute(f"""
+            SELECT experiment_id, variant_name, description, traffic_allocation FROM variants
+            WHERE experiment_id IN ({placeholders}) ORDER BY variant_id
+        """, ids).fetchall()
+        metrics = conn.execute(f"""
+            SELECT experiment_id, {', '.join(MetricDefinition._fields)} FROM experiment_metric_definitions
+            WHERE experiment_id IN ({placeholders}) ORDER BY definition_id
+        """, ids).fetchall()
+        conn.close()
+        
+        definitions = {row[0]: dict(zip(EXPERIMENT_FIELDS, row), variants=[], metrics=[]) for row in experiments}
+        for experiment_id, name, description, allocation in variants:
+            definitions[experiment_id]['variants'].append(
+                {'name': name, 'description': description, 'allocation': allocation})
+        for experiment_id, *metric in metrics:
+            definitions[experiment_id]['metrics'].append(dict(zip(MetricDefinition._fields, metric)))
+        return list(definitions.values())
+    
+    def import_experiment_definitions(self, definitions: Iterable[Dict]) -> int:
+        """
+        Recreate experiments from get_experiment_definitions() output,
+        keeping their experiment ids, in a single transaction
+        
+        Raises:
+            ValueError: if an experiment id is already taken or a
+                definition is invalid; nothing is imported then
+        
+        Returns:
+            Number of experiments created
+        """
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        count = 0
+        try:
+            for definition in definitions:
+                experiment = {f: definition.get(f) for f in EXPERIMENT_FIELDS}
+                experiment['status'] = experiment['status'] or 'running'
+                experiment['allocation_mode'] = experiment['allocation_mode'] or 'fixed'
+                if experiment['allocation_mode'] not in ALLOCATION_MODES:
+                    raise ValueError(f"allocation_mode must be one of {ALLOCATION_MODES}")
+                if cursor.execute("SELECT 1 FROM experiments WHERE experiment_id = ?",
+                                  (experiment['experiment_id'],)).fetchone():
+                    raise ValueError(f"Experiment {experiment['experiment_id']} already exists")
+                
+                fields = [f for f in EXPERIMENT_FIELDS if experiment[f] is not None]
+                cursor.execute(f"""
+                    INSERT INTO experiments ({', '.join(fields)})
+                    VALUES ({', '.join('?' * len(fields))})
+                """, [experiment[f] for f in fields])
+                cursor.executemany("""
+                    INSERT INTO variants (experiment_id, variant_name, description, traffic_allocation)
+                    VALUES (?, ?, ?, ?)
+                """, [(experiment['experiment_id'], v['name'], v.get('description', ''), v['allocation'])
+                      for v in definition.get('variants', [])])
+                for metric in definition.get('metrics', []):
+                    self._insert_metric_definition(cursor, experiment['experiment_id'], MetricDefinition(**metric))
+                count += 1
+            conn.commit()
+        except ValueError:
+            conn.rollback()
+            raise
+        except (KeyError, TypeError, sqlite3.Error) as e:
+            conn.rollback()
+            raise ValueError(f"Invalid experiment definition: {e!r}") from e
+        finally:
+            conn.close()
+        
+        return count
+    
     def complete_experiment(self, experiment_id: int):
         """Mark experiment as completed"""
         conn = self.get_connection()
@@ -0,0 +1,223 @@
+"""
+Data quality: metric row validation and sample ratio mismatch (SRM).
+
+Validation runs on ingestion. `check_metric_values` checks one row (used
+by `log_metrics`); `metric_problems` checks whole columns at once with
+NumPy/pandas (used by `insert_metric_rows` and bulk_io.py). Either way a
+bad row raises ValueError before anything is written.
+
+SRM: when a variant configured for 50% of traffic gets 45% of the
+impressions, the split is broken and the experiment's results cannot be
+trusted. Triggers keep per-variant totals in `variant_totals` up to date
+as metric rows arrive (see database/db_setup.py), so `srm_checks` only
+reads a few rows per experiment and runs a chi-square goodness-of-fit
+test of observed impressions against `variants.traffic_allocation`.
+Bandit experiments (core/bandit.py) are skipped: their split moves, so
+cumulative impressions are not expected to match the current one.
+"""
+
+import math
+import numbers
+from operator import itemgetter
+from typing import Dict, Iterable, List, NamedTuple
+
+# An SRM alert needs strong evidence: checks run many times a day on every
+# experiment, and a real mismatch quickly drives p far below this
+SRM_P_THRESHOLD = 0.001
+SRM_MIN_IMPRESSIONS = 1000
+
+COUNT_FIELDS = ('impressions', 'conversions', 'unique_users')
+# May be left out (None, or a blank cell in bulk_io.py); counts as 0
+OPTIONAL_FIELDS = ('unique_users',)
+_NONE_TYPE = type(None)
+
+
+class SRMResult(NamedTuple):
+    experiment_id: int
+    variant_names: List[str]
+    observed: List[int]              # impressions per variant
+    expected_shares: List[float]     # from traffic_allocation, summing to 1
+    observed_shares: List[float]
+    chi2: float
+    p_value: float
+    is_mismatch: bool
+
+
+def check_metric_values(impressions, conversions, revenue, unique_users=0):
+    """
+    Validate one metric row
+
+    Raises:
+        ValueError: naming every problem found
+    """
+    problems = []
+    values = {'impressions': impressions, 'conversions': conversions,
+              'revenue': revenue, 'unique_users': unique_users or 0}
+    for name, value in values.items():
+        if isinstance(value, bool) or not isinstance(value, numbers.Real) or math.isnan(value):
+            problems.append(f"{name} is not a number ({value!r})")
+        elif value < 0:
+            problems.append(f"{name} is negative ({value})")
+        elif name in COUNT_FIELDS and value != int(value):
+            problems.append(f"{name} is not a whole number ({value})")
+    if not problems and conversions > impressions:
+        problems.append(f"conversions ({conversions}) exceed impressions ({impressions})")
+    if problems:
+        raise ValueError("Invalid metrics: " + "; ".join(problems))
+
+
+def metric_problems(impressions, conversions, revenue, unique_users) -> Dict:
+    """
+    Vectorized validation of metric columns
+
+    Args:
+        Equal-length arrays or Series; non-numeric values should be NaN,
+        missing OPTIONAL_FIELDS values 0 (as in check_metric_values)
+
+    Returns:
+        {problem: boolean array}, True where a row has that problem
+    """
+    import numpy as np
+
+    columns = {
+        'impressions': np.asarray(impressions, dtype=float),
+        'conversions': np.asarray(conversions, dtype=float),
+        'revenue': np.asarray(revenue, dtype=float),
+        'unique_users': np.asarray(unique_users, dtype=float),
+    }
+    with np.errstate(invalid='ignore'):
+        return {
+            'non-numeric value': np.logical_or.reduce([np.isnan(v) for v in columns.values()]),
+            'negative value': np.logical_or.reduce([v < 0 for v in columns.values()]),
+            'fractional count': np.logical_or.reduce([~np.isnan(v) & (v % 1 != 0)
+                                                      for n, v in columns.items() if n in COUNT_FIELDS]),
+            'conversions > impressions': columns['conversions'] > columns['impressions'],
+        }
+
+
+def check_metric_rows(rows: List[tuple], first: int = 3, last: int = 6):
+    """
+    Validate tuples in METRIC_ROW_COLUMNS order with one vectorized pass
+
+    Args:
+        rows: Metric row tuples
+        first, last: Positions of impressions ... unique_users in the tuples
+
+    Raises:
+        ValueError: naming the number of invalid rows and the first one
+    """
+    import numpy as np
+
+    def column(i):
+        values = list(map(itemgetter(i), rows))
+        kinds = set(map(type, values))
+        # np.array would quietly read '3' and True as numbers; leave
+        # anything but real numbers to the row check, which rejects them
+        if any(t is bool or not (t is _NONE_TYPE or issubclass(t, numbers.Real)) for t in kinds):
+            raise TypeError("non-numeric metric value")
+        if _NONE_TYPE in kinds:
+            # None is 0 for optional fields and invalid otherwise, as in check_metric_values
+            missing = 0.0 if i == last else np.nan
+            values = [missing if v is None else v for v in values]
+        return np.array(values, dtype=float)
+
+    try:
+        problems = metric_problems(*(column(i) for i in range(first, last + 1)))
+    except (TypeError, ValueError):
+        # Strings or other objects among the values; fall back to the row check
+        for row in rows:
+            check_metric_values(*row[first:last + 1])
+        return
+
+    invalid = np.logical_or.reduce(list(problems.values()))
+    if invalid.any():
+        index = int(invalid.argmax())
+        reasons = [name for name, mask in problems.items() if mask[index]]
+        raise ValueError(f"{int(invalid.sum())} invalid metric row(s); first is row {index + 1}: "
+                         f"{', '.join(reasons)}")
+
+
+def chi2_sf(x: float, df: int) -> float:
+    """
+    Chi-square survival function for integer df, in pure Python
+
+    Uses the recurrence Q(k + 2, x) = Q(k, x) + (x/2)^(k/2) e^(-x/2) / Gamma(k/2 + 1)
+    from Q(1, x) = erfc(sqrt(x / 2)) and Q(2, x) = e^(-x/2).
+    """
+    if df < 1:
+        raise ValueError("df must be at least 1")
+    if x <= 0:
+        return 1.0
+    half = x / 2
+    k = 2 - df % 2
+    q = math.exp(-half) if k == 2 else math.erfc(math.sqrt(half))
+    while k < df:
+        q += math.exp((k / 2) * math.log(half) - half - math.lgamma(k / 2 + 1))
+        k += 2
+    return min(q, 1.0)
+
+
+def srm_test(observed: List[float], expected_shares: List[float]):
+    """
+    Chi-square goodness-of-fit of observed counts against expected shares
+
+    Returns:
+        (chi2, p_value); (0.0, 1.0) without traffic or with a single variant
+    """
+    total = sum(observed)
+    share_total = sum(expected_shares)
+    if total <= 0 or len(observed) < 2 or share_total <= 0:
+        return 0.0, 1.0
+    chi2 = 0.0
+    for count, share in zip(observed, expected_shares):
+        expected = total * share / share_total
+        if expected > 0:
+            chi2 += (count - expected) ** 2 / expected
+        elif count > 0:
+            # Traffic on a variant configured for none
+            return math.inf, 0.0
+    return chi2, chi2_sf(chi2, len(observed) - 1)
+
+
+def srm_checks(
+    dm,
+    experiment_ids: Iterable[int],
+    p_threshold: float = SRM_P_THRESHOLD,
+    min_impressions: int = SRM_MIN_IMPRESSIONS
+) -> Dict[int, SRMResult]:
+    """
+    SRM test for each experiment from the trigger-maintained totals
+
+    Experiments with fewer than `min_impressions` impressions are tested
+    but never flagged.
+
+    Returns:
+        {experiment_id: SRMResult} for fixed-split experiments with at
+        least two variants
+    """
+    ids = list(experiment_ids)
+    modes = dm.get_allocation_modes(ids)
+    results = {}
+    for experiment_id, variants in dm.get_variant_totals(ids).items():
+        if len(variants) < 2 or modes.get(experiment_id, 'fixed') != 'fixed':
+            continue
+        observed = [int(v.impressions) for v in variants]
+        shares = [float(v.traffic_allocation or 0) for v in variants]
+        total, share_total = sum(observed), sum(shares)
+        chi2, p_value = srm_test(observed, shares)
+        results[experiment_id] = SRMResult(
+            experiment_id=experiment_id,
+            variant_names=[v.variant_name for v in variants],
+            observed=observed,
+            expected_shares=[s / share_total if share_total else 0.0 for s in shares],
+            observed_shares=[o / total if total else 0.0 for o in observed],
+            chi2=chi2,
+            p_value=p_value,
+            is_mismatch=total >= min_impressions and p_value < p_threshold,
+        )
+    return results
+
+
+def srm_alerts(dm, experiment_ids: Iterable[int], **kwargs) -> List[SRMResult]:
+    """The srm_checks() results that are mismatches"""
+    return [r for r in srm_checks(dm, experiment_ids, **kwargs).values() if r.is_mismatch]
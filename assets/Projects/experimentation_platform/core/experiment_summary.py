@@ -0,0 +1,109 @@
+"""
+Experiment summaries shared by the app and the checker scripts.
+
+The checker computes each experiment's control-vs-variant statistics once
+and stores them in `experiment_snapshots` together with the experiment's
+data version. The Dashboard, Results page and email notifier read those
+snapshots directly and only recompute an experiment whose data changed
+since its snapshot was written.
+"""
+
+from typing import Dict, Iterable, List, Optional
+
+from core.data_manager import ExperimentDataManager, ExperimentSnapshot, VariantTotals
+from core.statistical_engine import ABTestCalculator
+
+
+def pick_control_and_variant(rows: List[VariantTotals]):
+    """Return (control, variant) rows, or (None, None) if either is missing"""
+    control = next((r for r in rows if r.variant_name == 'control'), None)
+    variant = next((r for r in rows if r.variant_name != 'control'), None)
+    if control is None or variant is None:
+        return None, None
+    return control, variant
+
+
+def summarize(
+    calc: ABTestCalculator,
+    experiment_id: int,
+    data_version: int,
+    rows: List[VariantTotals]
+) -> Optional[ExperimentSnapshot]:
+    """Compute a snapshot from aggregated rows (None until both sides have traffic)"""
+    control, variant = pick_control_and_variant(rows)
+    if control is None or control.total_impressions <= 0 or variant.total_impressions <= 0:
+        return None
+
+    result = calc.evaluate(
+        int(control.total_conversions), int(control.total_impressions),
+        int(variant.total_conversions), int(variant.total_impressions)
+    )
+
+    return ExperimentSnapshot(
+        experiment_id=experiment_id,
+        data_version=data_version,
+        alpha=calc.alpha,
+        computed_at=None,
+        control_name=control.variant_name,
+        variant_name=variant.variant_name,
+        control_impressions=int(control.total_impressions),
+        control_conversions=int(control.total_conversions),
+        control_revenue=float(control.total_revenue),
+        variant_impressions=int(variant.total_impressions),
+        variant_conversions=int(variant.total_conversions),
+        variant_revenue=float(variant.total_revenue),
+        days_running=max(int(control.days_running), int(variant.days_running)),
+        is_significant=result.is_significant,
+        p_value=result.p_value,
+        confidence=result.confidence,
+        z_score=result.z_score,
+        control_rate=result.control_rate,
+        variant_rate=result.variant_rate,
+        absolute_lift=result.absolute_lift,
+        relative_lift=result.relative_lift,
+        winner=result.winner,
+    )
+
+
+def get_current_summaries(
+    dm: ExperimentDataManager,
+    calc: ABTestCalculator,
+    experiment_ids: Iterable[int],
+    save: bool = False
+) -> Dict[int, ExperimentSnapshot]:
+    """
+    Up-to-date snapshots for the given experiments.
+
+    Stored snapshots are used as-is when their data version and alpha
+    match; anything else is recomputed from the metrics. With save=True
+    (the checker) recomputed snapshots are written back.
+
+    Returns:
+        Dictionary of experiment_id -> snapshot; experiments without
+        enough data are left out
+    """
+    ids = [int(i) for i in experiment_ids]
+    versions = dm.get_data_versions(ids)
+    stored = dm.get_snapshots(ids)
+
+    stale = [i for i in ids
+             if i not in stored or stored[i].data_version != versions[i] or stored[i].alpha != calc.alpha]
+    # One totals query per database (per shard, in parallel, when sharded)
+    totals = dm.get_experiment_totals(stale)
+
+    summaries = {}
+    fresh = []
+    for experiment_id in ids:
+        if experiment_id in totals:
+            snap = summarize(calc, experiment_id, versions[experiment_id], totals[experiment_id])
+            if snap is not None:
+                fresh.append(snap)
+        else:
+            snap = stored[experiment_id]
+        if snap is not None:
+            summaries[experiment_id] = snap
+
+    if save and fresh:
+        dm.save_snapshots(fresh)
+
+    return summaries
@@ -0,0 +1,212 @@
+"""
+Heterogeneous treatment effects: which segments respond.
+
+Per-segment lifts from `ABTestCalculator.evaluate_segments` are noisy;
+small segments show the biggest lifts in both directions just by chance.
+This module shrinks them with empirical Bayes (a normal-normal
+hierarchical model). Within one experiment, variant and segment level
+(e.g. all `platform x country` segments):
+
+    observed effect d_s ~ N(theta_s, se_s^2)   difference in conversion rate
+    true effect theta_s ~ N(mu, tau^2)         segments share a distribution
+
+mu and tau^2 are estimated from the segments themselves (DerSimonian-
+Laird method of moments), and each segment's effect is pulled towards mu
+by B_s = tau^2 / (tau^2 + se_s^2): noisy segments move a lot, large
+segments keep their own estimate, and when segments do not differ beyond
+noise (tau^2 = 0) all collapse to the pooled effect.
+
+Everything is computed with grouped NumPy/pandas operations over all
+segments of all experiments at once. Building the segment cubes (one
+query per experiment) is the expensive part; `heterogeneous_effects` can
+spread it over a process pool.
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterable, List, Optional
+
+import numpy as np
+import pandas as pd
+from scipy.special import ndtr
+
+from core.data_manager import ExperimentDataManager
+from core.statistical_engine import ABTestCalculator, norm_ppf
+from database.db_setup import DIMENSIONS
+
+# Experiments per process-pool task
+CHUNK_SIZE = 10
+
+
+def segment_effects(
+    cube: pd.DataFrame,
+    calc: Optional[ABTestCalculator] = None,
+    control_name: str = 'control'
+) -> pd.DataFrame:
+    """
+    Shrunken per-segment effects for every experiment in a stacked cube
+
+    Args:
+        cube: get_segment_cube() output of one or more experiments, with
+            an experiment_id column
+        calc: Calculator whose alpha sets the credible interval (default
+            ABTestCalculator())
+        control_name: Variant treated as the baseline
+
+    Returns:
+        One row per experiment x segment x variant with the segment
+        columns, 'level' (the dimensions the segment is split by,
+        'overall' for the whole experiment), control_rate and
+        variant_rate (%), observed_lift and shrunk_lift (relative, %),
+        shrinkage (0 keeps the observed effect, 1 uses the pooled one),
+        the shrunk effect's credible interval bounds lift_low/lift_high
+        (relative, %), prob_positive and is_significant (interval
+        excludes 0). Segments without traffic on both sides are left out.
+    """
+    calc = calc or ABTestCalculator()
+    dims = [c for c in cube.columns if c not in
+            ('experiment_id', 'variant_name', 'total_impressions', 'total_conversions', 'total_revenue')]
+    pairs = calc.evaluate_segments(cube, control_name)
+    pairs = pairs[(pairs['control_impressions'] > 0) & (pairs['variant_impressions'] > 0)].reset_index(drop=True)
+
+    ci = pairs['control_impressions'].to_numpy(dtype=float)
+    vi = pairs['variant_impressions'].to_numpy(dtype=float)
+    pc = pairs['control_conversions'].to_numpy(dtype=float) / ci
+    pv = pairs['variant_conversions'].to_numpy(dtype=float) / vi
+
+    # Rates of 0 or 1 would give a zero standard error; shrink them slightly
+    # towards 1/2 for the variance only
+    pc_var = (pairs['control_conversions'].to_numpy() + 0.5) / (ci + 1)
+    pv_var = (pairs['variant_conversions'].to_numpy() + 0.5) / (vi + 1)
+    effect = pv - pc
+    variance = pc_var * (1 - pc_var) / ci + pv_var * (1 - pv_var) / vi
+
+    # Segments of one level (same dimensions split out) are exchangeable
+    level = pd.Series('', index=pairs.index)
+    for d in dims:
+        level = level + np.where(pairs[d] != 'all', ' x ' + d, '')
+    level = level.str[3:].replace('', 'overall')
+
+    # DerSimonian-Laird estimates of mu and tau^2 per group of exchangeable segments
+    weight = 1 / variance
+    group_keys = [pairs['experiment_id'], pairs['variant_name'], level]
+    frame = pd.DataFrame({'w': weight, 'wd': weight * effect, 'wdd': weight * effect * effect,
+                          'ww': weight * weight, 'k': 1.0})
+    totals = frame.groupby(group_keys).transform('sum')
+    sum_w, k = totals['w'].to_numpy(), totals['k'].to_numpy()
+    fixed_mean = totals['wd'].to_numpy() / sum_w
+    q = totals['wdd'].to_numpy() - sum_w * fixed_mean * fixed_mean
+    with np.errstate(divide='ignore', invalid='ignore'):
+        tau2 = np.where(k > 1, np.maximum(0.0, (q - (k - 1)) / (sum_w - totals['ww'].to_numpy() / sum_w)), 0.0)
+    tau2 = np.nan_to_num(tau2)
+
+    # Random-effects pooled mean uses weights 1 / (se^2 + tau^2)
+    frame = pd.DataFrame({'w': 1 / (variance + tau2), 'wd': effect / (variance + tau2)})
+    totals = frame.groupby(group_keys).transform('sum')
+    pooled = totals['wd'].to_numpy() / totals['w'].to_numpy()
+
+    shrinkage = np.where(k > 1, variance / (variance + tau2), 0.0)
+    shrunk = pooled + (1 - shrinkage) * (effect - pooled)
+    posterior_sd = np.sqrt(np.where(k > 1, (1 - shrinkage) * variance, variance))
+    z = norm_ppf(1 - calc.alpha / 2)
+    low, high = shrunk - z * posterior_sd, shrunk + z * posterior_sd
+
+    def relative(values):
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return np.where(pc > 0, values / pc * 100, 0.0)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        prob_positive = np.where(posterior_sd > 0, ndtr(shrunk / posterior_sd), (shrunk > 0).astype(float))
+
+    out = pairs[['experiment_id'] + dims + ['variant_name']].copy()
+    out['level'] = level.to_numpy()
+    out['control_impressions'] = pairs['control_impressions']
+    out['variant_impressions'] = pairs['variant_impressions']
+    out['control_rate'] = pc * 100
+    out['variant_rate'] = pv * 100
+    out['observed_lift'] = relative(effect)
+    out['shrunk_lift'] = relative(shrunk)
+    out['lift_low'] = relative(low)
+    out['lift_high'] = relative(high)
+    out['shrinkage'] = shrinkage
+    out['prob_positive'] = prob_positive
+    out['is_significant'] = (low > 0) | (high < 0)
+    return out
+
+
+def _experiment_cubes(dm: ExperimentDataManager, experiment_ids: List[int], dimensions) -> pd.DataFrame:
+    cubes = []
+    for experiment_id in experiment_ids:
+        cube = dm.get_segment_cube(experiment_id, dimensions)
+        cube.insert(0, 'experiment_id', experiment_id)
+        cubes.append(cube)
+    return pd.concat(cubes, ignore_index=True) if cubes else pd.DataFrame()
+
+
+def _effects_for(dm: ExperimentDataManager, experiment_ids: List[int], dimensions,
+                 calc: ABTestCalculator, control_name: str) -> pd.DataFrame:
+    cube = _experiment_cubes(dm, experiment_ids, dimensions)
+    return segment_effects(cube, calc, control_name) if not cube.empty else pd.DataFrame()
+
+
+def heterogeneous_effects(
+    dm: ExperimentDataManager,
+    experiment_ids: Iterable[int],
+    dimensions=None,
+    calc: Optional[ABTestCalculator] = None,
+    control_name: str = 'control',
+    workers: int = 1
+) -> pd.DataFrame:
+    """
+    segment_effects() for several experiments, read from the database
+
+    Args:
+        dm: Data manager (pickled to the worker processes when workers > 1)
+        experiment_ids: Experiments to analyse
+        dimensions: Dimensions to segment by (default all of DIMENSIONS)
+        calc: Calculator whose alpha sets the credible interval
+        control_name: Variant treated as the baseline
+        workers: Processes to spread the experiments over (1 runs in-process)
+
+    Returns:
+        segment_effects() rows for all experiments
+    """
+    ids = [int(i) for i in experiment_ids]
+    dimensions = DIMENSIONS if dimensions is None else tuple(dimensions)
+    calc = calc or ABTestCalculator()
+    # Workers test without the significance cache; it is per process anyway
+    worker_calc = ABTestCalculator(alpha=calc.alpha)
+
+    if workers > 1 and len(ids) > CHUNK_SIZE:
+        chunks = [ids[i:i + CHUNK_SIZE] for i in range(0, len(ids), CHUNK_SIZE)]
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            parts = list(pool.map(_effects_for, [dm] * len(chunks), chunks, [dimensions] * len(chunks),
+                                  [worker_calc] * len(chunks), [control_name] * len(chunks)))
+        parts = [part for part in parts if not part.empty]
+        return pd.concat(parts, ignore_index=True) if parts else pd.DataFrame()
+
+    return _effects_for(dm, ids, dimensions, worker_calc, control_name)
+
+
+def top_segments(
+    effects: pd.DataFrame,
+    n: int = 5,
+    min_impressions: int = 0,
+    ascending: bool = False
+) -> pd.DataFrame:
+    """
+    Segments with the largest shrunk lift (smallest with ascending=True)
+
+    The whole-experiment rows and segments whose values are all
+    'unknown' (metrics logged without dimensions) are left out. Adds a
+    readable 'segment' column, e.g. 'ios / C003'.
+    """
+    if effects.empty:
+        return effects.assign(segment=pd.Series(dtype=str))
+    dims = [d for d in DIMENSIONS if d in effects.columns]
+    values = effects[dims]
+    known = (values != 'all') & (values != 'unknown')
+    segments = effects[known.any(axis=1)
+                       & (effects[['control_impressions', 'variant_impressions']].min(axis=1) >= min_impressions)]
+    top = segments.sort_values('shrunk_lift', ascending=ascending).head(n).copy()
+    top['segment'] = [' / '.join(v for v in row if v != 'all') for row in top[dims].itertuples(index=False)]
+    return top
@@ -0,0 +1,90 @@
+"""
+Experiment lifecycle: completing experiments that reached a decision.
+
+Until now experiments were only completed by hand (`complete_experiment`).
+`auto_complete` completes every running experiment whose result is
+significant and whose control and variant both reached the sample size
+`calculate_sample_size` asks for, planned for a relative lift of
+AUTO_COMPLETE_MDE on the observed control rate (the Create page's
+default). Experiments with a sample ratio mismatch are never completed:
+their result cannot be trusted.
+
+Completed experiments stop appearing on the Dashboard and are picked up
+by retention (core/retention.py). run_scheduler.py runs this as its
+'complete' job.
+"""
+
+from typing import Dict, Iterable, List, NamedTuple, Optional
+
+from core.data_manager import ExperimentDataManager
+from core.data_quality import srm_checks
+from core.experiment_summary import get_current_summaries
+from core.statistical_engine import ABTestCalculator
+
+AUTO_COMPLETE_MDE = 0.10
+
+
+class CompletionCheck(NamedTuple):
+    experiment_id: int
+    is_significant: bool
+    required_per_variant: Optional[int]   # None without a usable control rate
+    control_impressions: int
+    variant_impressions: int
+    srm_mismatch: bool
+    ready: bool
+
+
+def completion_checks(
+    dm: ExperimentDataManager,
+    calc: ABTestCalculator,
+    experiment_ids: Iterable[int],
+    mde: float = AUTO_COMPLETE_MDE
+) -> Dict[int, CompletionCheck]:
+    """
+    Whether each experiment can be completed
+
+    Args:
+        mde: Relative lift the required sample size is planned for
+
+    Returns:
+        {experiment_id: CompletionCheck} for experiments with data
+    """
+    ids = [int(i) for i in experiment_ids]
+    summaries = get_current_summaries(dm, calc, ids)
+    srm = srm_checks(dm, list(summaries))
+
+    checks = {}
+    for experiment_id, snap in summaries.items():
+        baseline = snap.control_rate / 100
+        required = None
+        if 0 < baseline < 1:
+            required = calc.calculate_sample_size(baseline, baseline * mde, alpha=calc.alpha)
+        mismatch = experiment_id in srm and srm[experiment_id].is_mismatch
+        checks[experiment_id] = CompletionCheck(
+            experiment_id=experiment_id,
+            is_significant=snap.is_significant,
+            required_per_variant=required,
+            control_impressions=snap.control_impressions,
+            variant_impressions=snap.variant_impressions,
+            srm_mismatch=mismatch,
+            ready=(snap.is_significant and not mismatch and required is not None
+                   and min(snap.control_impressions, snap.variant_impressions) >= required),
+        )
+    return checks
+
+
+def auto_complete(dm: ExperimentDataManager, calc: ABTestCalculator, mde: float = AUTO_COMPLETE_MDE) -> List[int]:
+    """
+    Complete every running experiment that is ready
+
+    Returns:
+        The completed experiment ids
+    """
+    running = [exp.experiment_id for exp in dm.get_active_experiment_rows()]
+    if not running:
+        return []
+
+    ready = [c.experiment_id for c in completion_checks(dm, calc, running, mde).values() if c.ready]
+    for experiment_id in ready:
+        dm.complete_experiment(experiment_id)
+    return ready
@@ -0,0 +1,221 @@
+"""
+Multi-metric evaluation with guardrails.
+
+Every experiment has one primary metric (conversion rate unless declared
+otherwise) and any number of secondary and guardrail metrics stored in
+`experiment_metric_definitions`. `evaluate_metrics` computes all of them
+for every variant against control from a single grouped scan of the
+experiment's metric rows (`ExperimentDataManager.get_metric_sums`), so
+adding metrics does not add queries.
+
+Metric types:
+    proportion  numerator / denominator, pooled two-proportion z-test
+                (e.g. conversions / impressions)
+    ratio       SUM(numerator) / SUM(denominator), delta-method z-test
+                with variant-days as the unit (e.g. revenue / unique_users)
+    mean        per-day mean of numerator, Welch's t-test
+                (e.g. daily revenue)
+
+Ratio and mean metrics use a variant's daily totals (summed over segments)
+as observations, whether the rows are per segment, per day or rolled up
+by retention, so their variances do not depend on how metrics are logged.
+
+A guardrail regresses when it moves significantly in the wrong direction
+by more than its threshold (a relative change in %).
+"""
+
+import math
+from typing import Dict, Iterable, List, NamedTuple, Optional
+
+from core.data_manager import ExperimentDataManager, MetricDefinition
+from core.statistical_engine import ABTestCalculator, RunningStats
+
+_SQRT2 = math.sqrt(2.0)
+
+# Metrics offered in the app; 'role' and 'threshold' are set on creation
+PRESET_METRICS = {
+    'conversion_rate': MetricDefinition('conversion_rate', 'proportion', 'conversions', 'impressions'),
+    'revenue_per_impression': MetricDefinition('revenue_per_impression', 'ratio', 'revenue', 'impressions'),
+    'revenue_per_user': MetricDefinition('revenue_per_user', 'ratio', 'revenue', 'unique_users'),
+    'average_order_value': MetricDefinition('average_order_value', 'ratio', 'revenue', 'conversions'),
+    'conversions_per_user': MetricDefinition('conversions_per_user', 'ratio', 'conversions', 'unique_users'),
+    'daily_revenue': MetricDefinition('daily_revenue', 'mean', 'revenue', None),
+}
+
+DEFAULT_METRICS = [PRESET_METRICS['conversion_rate']]
+
+
+class MetricResult(NamedTuple):
+    """One metric for one variant compared with control"""
+    metric_name: str
+    role: str
+    variant_name: str
+    control_value: float
+    variant_value: float
+    relative_change: float   # in %
+    p_value: float
+    is_significant: bool
+    regression: bool         # guardrail moved the wrong way beyond its threshold
+
+
+def _ratio_stats(sums: Dict, numerator: str, denominator: str):
+    """(ratio, variance of the ratio) by the delta method"""
+    n = sums['n']
+    total_x, total_y = sums[f'sum_{numerator}'], sums[f'sum_{denominator}']
+    if n < 2 or total_y == 0:
+        return (total_x / total_y if total_y else 0.0), None
+
+    ratio = total_x / total_y
+    mean_y = total_y / n
+    var_x = (sums[f'sumsq_{numerator}'] - total_x * total_x / n) / (n - 1)
+    var_y = (sums[f'sumsq_{denominator}'] - total_y * total_y / n) / (n - 1)
+    cov_xy = (sums[f'sum_{numerator}_x_{denominator}'] - total_x * total_y / n) / (n - 1)
+    variance = (var_x - 2 * ratio * cov_xy + ratio * ratio * var_y) / (n * mean_y * mean_y)
+    return ratio, max(variance, 0.0)
+
+
+def _compare(calc: ABTestCalculator, metric: MetricDefinition, control: Dict, variant: Dict):
+    """(control_value, variant_value, p_value) for one metric"""
+    if metric.metric_type == 'proportion':
+        c_num, c_den = control[f'sum_{metric.numerator}'], control[f'sum_{metric.denominator}']
+        v_num, v_den = variant[f'sum_{metric.numerator}'], variant[f'sum_{metric.denominator}']
+        _, p_value = calc.calculate_z_score(c_num, c_den, v_num, v_den)
+        return (c_num / c_den if c_den else 0.0), (v_num / v_den if v_den else 0.0), p_value
+
+    if metric.metric_type == 'ratio':
+        c_value, c_var = _ratio_stats(control, metric.numerator, metric.denominator)
+        v_value, v_var = _ratio_stats(variant, metric.numerator, metric.denominator)
+        if c_var is None or v_var is None or c_var + v_var == 0:
+            return c_value, v_value, 1.0
+        z_score = (v_value - c_value) / math.sqrt(c_var + v_var)
+        return c_value, v_value, math.erfc(abs(z_score) / _SQRT2)
+
+    c_stats = RunningStats.from_sums(control['n'], control[f'sum_{metric.numerator}'],
+                                     control[f'sumsq_{metric.numerator}'])
+    v_stats = RunningStats.from_sums(variant['n'], variant[f'sum_{metric.numerator}'],
+                                     variant[f'sumsq_{metric.numerator}'])
+    if c_stats.count < 2 or v_stats.count < 2:
+        return c_stats.mean, v_stats.mean, 1.0
+    return c_stats.mean, v_stats.mean, calc.revenue_test(c_stats, v_stats)['p_value']
+
+
+def evaluate_metrics(
+    dm: ExperimentDataManager,
+    calc: ABTestCalculator,
+    experiment_id: int,
+    definitions: Optional[List[MetricDefinition]] = None,
+    control_name: str = 'control'
+) -> List[MetricResult]:
+    """
+    Evaluate every declared metric for every variant against control
+
+    Args:
+        dm: Data manager
+        calc: Calculator whose alpha decides significance
+        experiment_id: Experiment to evaluate
+        definitions: Metrics to evaluate (defaults to the experiment's
+            declared metrics); conversion rate is added as the primary
+            metric when none is declared
+        control_name: Name of the control variant
+
+    Returns:
+        MetricResults ordered by metric (primary first), then variant;
+        empty until control has traffic
+    """
+    if definitions is None:
+        definitions = dm.get_metric_definitions(experiment_id)
+    if not any(m.role == 'primary' for m in definitions):
+        definitions = DEFAULT_METRICS + list(definitions)
+
+    columns = []
+    products = []
+    for metric in definitions:
+        columns.append(metric.numerator)
+        if metric.metric_type != 'mean':
+            columns.append(metric.denominator)
+        if metric.metric_type == 'ratio':
+            products.append((metric.numerator, metric.denominator))
+
+    sums = dm.get_metric_sums(experiment_id, columns, products)
+    control = sums.get(control_name)
+    if control is None or control['n'] == 0:
+        return []
+
+    results = []
+    for metric in definitions:
+        for variant_name, variant in sums.items():
+            if variant_name == control_name or variant['n'] == 0:
+                continue
+
+            c_value, v_value, p_value = _compare(calc, metric, control, variant)
+            change = (v_value - c_value) / c_value * 100 if c_value else 0.0
+            significant = p_value < calc.alpha
+            worse = change < 0 if metric.direction == 'increase' else change > 0
+
+            results.append(MetricResult(
+                metric_name=metric.metric_name,
+                role=metric.role,
+                variant_name=variant_name,
+                control_value=c_value,
+                variant_value=v_value,
+                relative_change=change,
+                p_value=p_value,
+                is_significant=significant,
+                regression=(metric.role == 'guardrail' and significant and worse
+                            and abs(change) > (metric.threshold or 0)),
+            ))
+
+    return results
+
+
+def evaluate_experiments(
+    dm: ExperimentDataManager,
+    calc: ABTestCalculator,
+    experiment_ids: Iterable[int]
+) -> Dict[int, List[MetricResult]]:
+    """evaluate_metrics for several experiments (one scan each)"""
+    return {int(i): evaluate_metrics(dm, calc, int(i)) for i in experiment_ids}
+
+
+def get_current_metric_results(
+    dm: ExperimentDataManager,
+    calc: ABTestCalculator,
+    experiment_ids: Iterable[int],
+    save: bool = False
+) -> Dict[int, List[MetricResult]]:
+    """
+    Up-to-date metric results for the given experiments.
+
+    Like get_current_summaries (core/experiment_summary.py): stored
+    results are used as-is when their data version and alpha match, and
+    only the other experiments are scanned. With save=True (the checker)
+    recomputed results are written back. Declaring a metric drops the
+    experiment's stored results.
+
+    Returns:
+        Dictionary of experiment_id -> MetricResults (see evaluate_metrics)
+    """
+    ids = [int(i) for i in experiment_ids]
+    versions = dm.get_data_versions(ids)
+    stored = dm.get_metric_snapshots(ids)
+
+    results = {}
+    fresh = []
+    for experiment_id in ids:
+        snap = stored.get(experiment_id)
+        if snap is not None and snap[0] == versions[experiment_id] and snap[1] == calc.alpha:
+            results[experiment_id] = [MetricResult(*r) for r in snap[2]]
+        else:
+            results[experiment_id] = evaluate_metrics(dm, calc, experiment_id)
+            fresh.append((experiment_id, versions[experiment_id], calc.alpha,
+                          [list(r) for r in results[experiment_id]]))
+
+    if save and fresh:
+        dm.save_metric_snapshots(fresh)
+
+    return results
+
+
+def guardrail_regressions(results: List[MetricResult]) -> List[MetricResult]:
+    """The results that are guardrail regressions"""
+    return [r for r in results if r.regression]
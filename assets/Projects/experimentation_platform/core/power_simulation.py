@@ -0,0 +1,232 @@
+"""
+Monte Carlo power simulation for experiment planning.
+
+`calculate_sample_size` assumes one treatment, constant traffic and a
+single look at the end. Real experiments here have up to four variants,
+weekly traffic patterns, and are checked every day by check_results.py,
+which reports the first day anything looks significant. This module
+simulates many experiment trajectories day by day and applies the same
+decision rule at every check: control against the first other variant
+(`experiment_summary.pick_control_and_variant`), tested with
+`ABTestCalculator.is_significant_batch` at the calculator's alpha.
+Further variants are not tested by the checker; they only take their
+share of the traffic. The simulation gives:
+
+    power                share of trajectories that declare the tested
+                         variant the winner when it really is better
+    false_positive_rate  share that declare a result in an A/A test
+                         (no real difference)
+    decided_by_day       cumulative power by day, i.e. the
+                         time-to-decision distribution
+
+Trajectories are generated in NumPy batches (trajectories x variants x
+days) and batches can run on a process pool.
+"""
+
+import math
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import List, NamedTuple, Optional, Sequence
+
+import numpy as np
+
+from core.statistical_engine import ABTestCalculator
+
+BATCH_SIZE = 5_000
+
+
+@dataclass(frozen=True)
+class SimulationConfig:
+    """One planned experiment"""
+    baseline_rate: float = 0.10
+    relative_lift: float = 0.10         # true lift of every treatment variant
+    variants: int = 2                   # including control, equal traffic split
+    daily_traffic: int = 10_000         # users per day over all variants
+    days: int = 28                      # longest the experiment may run
+    # Day-of-week multipliers (day 0 is the start day) for traffic and for
+    # the conversion rate
+    traffic_pattern: Sequence[float] = (1.0,) * 7
+    rate_pattern: Sequence[float] = (1.0,) * 7
+    peek_every: int = 1                 # days between checks; 0 checks only at the end
+    trajectories: int = 10_000
+    seed: Optional[int] = None
+
+
+class SimulationResult(NamedTuple):
+    trajectories: int
+    power: float                        # with peeking, as the checker decides
+    false_positive_rate: float
+    wrong_winner_rate: float            # control declared better despite a real lift
+    fixed_horizon_power: float          # one look on the last day only
+    fixed_horizon_false_positive_rate: float
+    decided_by_day: List[float]         # cumulative power after each day
+    false_positives_by_day: List[float]
+
+    def days_to_power(self, target: float = 0.8) -> Optional[int]:
+        """First day by which `target` of trajectories found the winner"""
+        return next((d + 1 for d, share in enumerate(self.decided_by_day) if share >= target), None)
+
+    def days_to_decision(self, quantile: float = 0.5) -> Optional[int]:
+        """Decision day quantile among trajectories that found the winner"""
+        return self.days_to_power(self.power * quantile) if self.power > 0 else None
+
+
+def _check_days(config: SimulationConfig):
+    """0-based days on which the checker looks"""
+    if config.peek_every <= 0:
+        return np.array([config.days - 1])
+    days = np.arange(config.peek_every - 1, config.days, config.peek_every)
+    if days.size == 0 or days[-1] != config.days - 1:
+        days = np.append(days, config.days - 1)
+    return days
+
+
+def _simulate_batch(config: SimulationConfig, alpha: float, lift: float, size: int, seed) -> dict:
+    """
+    Simulate `size` trajectories; returns summed counts
+
+    Counts: 'decided' and 'correct' per check day (first decisions only),
+    'wrong', 'fixed_decided' and 'fixed_correct'.
+    """
+    rng = np.random.default_rng(seed)
+    calc = ABTestCalculator(alpha=alpha)
+    k, d = config.variants, config.days
+
+    weekday = np.arange(d) % 7
+    traffic = config.daily_traffic * np.asarray(config.traffic_pattern, dtype=float)[weekday] / k
+    # Only control and the first treatment are tested (as by the checker),
+    # so only those two arms are drawn; the others just dilute traffic
+    arm_lift = np.array([0.0, lift])
+    rates = np.clip(
+        config.baseline_rate * (1 + arm_lift)[:, None] * np.asarray(config.rate_pattern, dtype=float)[weekday],
+        0.0, 1.0
+    )
+
+    impressions = rng.poisson(traffic, size=(size, 2, d))
+    conversions = rng.binomial(impressions, rates)
+
+    checks = _check_days(config)
+    cum_imp = impressions.cumsum(axis=2)[:, :, checks]
+    cum_conv = conversions.cumsum(axis=2)[:, :, checks]
+    del impressions, conversions
+
+    # The treatment against control at every check, in one call
+    shape = (size, checks.size)
+    results = calc.is_significant_batch(
+        cum_conv[:, 0].ravel(), cum_imp[:, 0].ravel(),
+        cum_conv[:, 1].ravel(), cum_imp[:, 1].ravel()
+    )
+    significant = results['is_significant'].reshape(shape)
+    winner = significant & (results['absolute_lift'].reshape(shape) > 0)
+
+    decided = significant.any(axis=1)
+    first = significant.argmax(axis=1)
+    correct = decided & winner[np.arange(size), first]
+
+    return {
+        'decided': np.bincount(first[decided], minlength=checks.size),
+        'correct': np.bincount(first[correct], minlength=checks.size),
+        'wrong': int((decided & ~correct).sum()),
+        'fixed_decided': int(significant[:, -1].sum()),
+        'fixed_correct': int(winner[:, -1].sum()),
+    }
+
+
+def _run(config: SimulationConfig, alpha: float, lift: float, seeds, workers: int) -> dict:
+    sizes = [BATCH_SIZE] * (config.trajectories // BATCH_SIZE)
+    if config.trajectories % BATCH_SIZE:
+        sizes.append(config.trajectories % BATCH_SIZE)
+    args = [(config, alpha, lift, size, seed) for size, seed in zip(sizes, seeds)]
+
+    if workers > 1 and len(args) > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            parts = list(pool.map(_simulate_batch, *zip(*args)))
+    else:
+        parts = [_simulate_batch(*a) for a in args]
+
+    totals = parts[0]
+    for part in parts[1:]:
+        for key in totals:
+            totals[key] = totals[key] + part[key]
+    return totals
+
+
+def _by_day(config: SimulationConfig, counts) -> List[float]:
+    """Cumulative share of trajectories decided by each calendar day"""
+    daily = np.zeros(config.days)
+    daily[_check_days(config)] = counts
+    return (daily.cumsum() / config.trajectories).tolist()
+
+
+def simulate_power(
+    config: SimulationConfig,
+    calc: Optional[ABTestCalculator] = None,
+    workers: int = 1
+) -> SimulationResult:
+    """
+    Simulate `config.trajectories` experiments with the configured lift
+    and as many A/A experiments for the false-positive rate
+
+    Args:
+        config: Experiment to plan
+        calc: Calculator whose alpha is the decision rule (default
+            ABTestCalculator())
+        workers: Processes to spread the batches over (1 runs in-process)
+
+    Returns:
+        SimulationResult
+    """
+    if config.variants < 2:
+        raise ValueError("need at least two variants (control and one treatment)")
+    if config.days < 1 or config.trajectories < 1:
+        raise ValueError("days and trajectories must be positive")
+    if len(config.traffic_pattern) != 7 or len(config.rate_pattern) != 7:
+        raise ValueError("traffic_pattern and rate_pattern need one factor per weekday")
+
+    alpha = (calc or ABTestCalculator()).alpha
+    batches = math.ceil(config.trajectories / BATCH_SIZE)
+    seeds = np.random.SeedSequence(config.seed).spawn(2 * batches)
+
+    real = _run(config, alpha, config.relative_lift, seeds[:batches], workers)
+    null = _run(config, alpha, 0.0, seeds[batches:], workers)
+    n = config.trajectories
+
+    return SimulationResult(
+        trajectories=n,
+        power=int(real['correct'].sum()) / n,
+        false_positive_rate=int(null['decided'].sum()) / n,
+        wrong_winner_rate=real['wrong'] / n,
+        fixed_horizon_power=real['fixed_correct'] / n,
+        fixed_horizon_false_positive_rate=null['fixed_decided'] / n,
+        decided_by_day=_by_day(config, real['correct']),
+        false_positives_by_day=_by_day(config, null['decided']),
+    )
+
+
+def weekly_pattern(weekend_factor: float, start_weekday: int = 0) -> tuple:
+    """Day-of-week factors with Saturday/Sunday at `weekend_factor` (start_weekday 0 = Monday)"""
+    return tuple(weekend_factor if (start_weekday + d) % 7 >= 5 else 1.0 for d in range(7))
+
+
+# Compare the simulation with the closed-form estimate
+if __name__ == "__main__":
+    import time
+
+    calc = ABTestCalculator()
+    config = SimulationConfig(baseline_rate=0.10, relative_lift=0.05, daily_traffic=5000,
+                              days=28, traffic_pattern=weekly_pattern(0.6), seed=42)
+
+    print("🎲 Simulating experiment trajectories...\n")
+    started = time.perf_counter()
+    result = simulate_power(config, calc)
+    elapsed = time.perf_counter() - started
+
+    print(f"Trajectories:            {result.trajectories:,} (+ as many A/A) in {elapsed:.2f}s")
+    print(f"Power (daily checks):    {result.power:.1%}")
+    print(f"Power (one final look):  {result.fixed_horizon_power:.1%}")
+    print(f"False positives (daily): {result.false_positive_rate:.1%}  (alpha = {calc.alpha:.0%})")
+    print(f"False positives (final): {result.fixed_horizon_false_positive_rate:.1%}")
+    print(f"Median days to decision: {result.days_to_decision()}")
+    print(f"Days to 80% power:       {result.days_to_power(0.8) or 'not within ' + str(config.days)}")
+    print(f"Closed-form estimate:    "
+          f"{calc.estimate_time_to_significance(config.daily_traffic, config.baseline_rate, config.relative_lift, alpha=calc.alpha)} days")
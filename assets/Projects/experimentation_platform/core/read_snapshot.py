@@ -0,0 +1,120 @@
+"""
+In-memory read snapshot for the app.
+
+In single-file mode the app's readers and the collectors/checker scripts
+share `experiments.db`. SQLite's rollback journal lets a writer commit
+only when no reader holds the file, so every dashboard query can stall a
+writer, and every query reads pages from disk.
+
+`ReadSnapshotDataManager` serves all read methods (`get_active_experiments`,
+`get_experiment_results`, totals, snapshots, segment cubes, ...) from an
+in-memory copy of the database made with the SQLite backup API. Writes
+still go to the file. Before a read the manager asks SQLite
+`PRAGMA data_version` whether anything was committed since the last copy
+(no page reads) and copies the file again only when it was, at most
+once per `refresh_seconds`. The copy is double-buffered: readers keep
+using the previous copy until the new one is complete.
+
+Sharded layouts use WAL, where readers never block writers, so the
+snapshot is only offered for the single file (see `open_data_manager`).
+"""
+
+import itertools
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict
+
+from core.data_manager import DB_PATH, ExperimentDataManager
+
+# Minimum seconds between copies while the file keeps changing
+REFRESH_SECONDS = 1.0
+
+_names = itertools.count()
+
+
+class ReadSnapshotDataManager(ExperimentDataManager):
+    """ExperimentDataManager whose reads come from an in-memory copy of the file"""
+
+    def __init__(self, db_path: str = DB_PATH, refresh_seconds: float = REFRESH_SECONDS):
+        """
+        Args:
+            db_path: Database file (single-file mode)
+            refresh_seconds: Reads may be this many seconds behind the file
+                while it is being written to; 0 copies after every commit
+        """
+        super().__init__(db_path)
+        self.refresh_seconds = refresh_seconds
+        self.refreshes = 0
+        self.refresh_time = 0.0      # seconds spent copying, in total
+
+        self._lock = threading.Lock()
+        # Bring the schema up to date before the first copy
+        self._connect(db_path).close()
+        self._source = sqlite3.connect(db_path, check_same_thread=False)
+        self._uri = None
+        self._anchor = None          # keeps the current in-memory copy alive
+        self._copied_version = None
+        self._copied_at = float('-inf')
+        self._written = False
+        self.refresh(force=True)
+
+    def refresh(self, force: bool = False) -> bool:
+        """
+        Copy the file into memory if it changed since the last copy
+
+        Returns:
+            True if a new copy was made
+        """
+        with self._lock:
+            version = self._source.execute("PRAGMA data_version").fetchone()[0]
+            if not force and version == self._copied_version:
+                return False
+
+            started = time.perf_counter()
+            uri = f"file:experiments_snapshot_{os.getpid()}_{next(_names)}?mode=memory&cache=shared"
+            anchor = sqlite3.connect(uri, uri=True, check_same_thread=False)
+            self._source.backup(anchor)
+
+            previous = self._anchor
+            self._uri, self._anchor, self._copied_version = uri, anchor, version
+            self._copied_at = time.monotonic()
+            # Readers still connected to the previous copy keep it alive
+            if previous is not None:
+                previous.close()
+
+            self.refreshes += 1
+            self.refresh_time += time.perf_counter() - started
+            return True
+
+    def get_connection(self) -> sqlite3.Connection:
+        # Connections to the file are for writes: the next read checks for
+        # changes without waiting out the interval, so this manager's own
+        # writes are visible to its next read
+        self._written = True
+        return super().get_connection()
+
+    def get_read_connection(self) -> sqlite3.Connection:
+        if self._written or time.monotonic() - self._copied_at >= self.refresh_seconds:
+            self._written = False
+            self.refresh()
+        with self._lock:
+            return sqlite3.connect(self._uri, uri=True)
+
+    def get_read_metrics_connection(self, experiment_id: int) -> sqlite3.Connection:
+        return self.get_read_connection()
+
+    def snapshot_stats(self) -> Dict:
+        return {
+            'refreshes': self.refreshes,
+            'refresh_time': self.refresh_time,
+            'age_seconds': time.monotonic() - self._copied_at,
+        }
+
+    def close(self):
+        with self._lock:
+            if self._anchor is not None:
+                self._anchor.close()
+                self._anchor = None
+            self._source.close()
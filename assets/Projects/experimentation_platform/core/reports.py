@@ -0,0 +1,502 @@
+"""
+Report rendering for check_results.py and email_results.py.
+
+Both scripts describe what they found as a list of `ReportSection`s (one
+per experiment, chosen by `build_sections` so the file report and the
+email always cover the same experiments) and render it in one of
+REPORT_FORMATS:
+
+    html  the email body sent by email_results.py
+    text  experiment_results.txt written by check_results.py
+    json  experiment_results.json written by check_results.py
+
+The templates are str.format strings compiled once, at import, into
+functions that evaluate a single f-string (no format parsing per call).
+Reports are produced as a stream of chunks (`iter_report`): `write_report`
+writes them straight to a file (through a temporary file, so readers
+never see half a report) and `render_report` joins them for an SMTP
+payload. With `workers` > 1, batches of at least PARALLEL_MIN_SECTIONS
+sections are rendered in CHUNK_SIZE chunks on a process pool, still
+written in order.
+
+Status labels and recommendations are decided in one place
+(`section_status`, `recommendation`) for every format.
+"""
+
+import html
+import json
+import keyword
+import math
+import os
+import re
+from json.encoder import encode_basestring_ascii
+from string import Formatter
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Optional
+
+from core.metric_evaluation import guardrail_regressions
+
+REPORT_FORMATS = ('html', 'text', 'json')
+
+PARALLEL_MIN_SECTIONS = 2_000
+CHUNK_SIZE = 500
+
+DASHBOARD_URL = 'http://localhost:8501'
+RULE = '=' * 70
+
+_HTML_SPECIAL = re.compile('[&<>"\']')
+
+
+class ReportSection(NamedTuple):
+    """Everything a report says about one experiment"""
+    experiment_id: int
+    experiment_name: str
+    stats: Optional[object]       # ExperimentSnapshot, None before any data
+    metrics: List                 # MetricResult per declared metric and variant
+    regressions: List             # the guardrail regressions among them
+    srm: Optional[object]         # SRMResult when the traffic split is broken
+
+
+class Template:
+    """A str.format template compiled into a function"""
+
+    def __init__(self, source: str, name: str = 'template'):
+        """
+        Args:
+            source: str.format syntax with field names and attribute
+                access ({name}, {stats.control_rate:.2f}, {label!r}); no
+                indexing or nested fields
+            name: Used in error messages
+
+        Raises:
+            ValueError: if the template uses anything else
+        """
+        self.source = source
+        self.name = name
+
+        parts, fields = [], []
+        for literal, field, spec, conversion in Formatter().parse(source):
+            parts.append(literal.replace('{', '{{').replace('}', '}}'))
+            if field is None:
+                continue
+            names = field.split('.')
+            if (not all(n.isidentifier() and not keyword.iskeyword(n) for n in names)
+                    or field.startswith('_') or '{' in (spec or '')):
+                raise ValueError(f"Template {name!r}: unsupported field {{{field}}}")
+            fields.append(names[0])
+            parts.append('{' + field + (f'!{conversion}' if conversion else '') + (f':{spec}' if spec else '') + '}')
+        self.fields = tuple(dict.fromkeys(fields))
+
+        # def render(_values): a, b = _values['a'], _values['b']; return f"..."
+        unpack = ''.join(f"    {f} = _values[{f!r}]\n" for f in self.fields)
+        code = f"def render(_values):\n{unpack}    return f{''.join(parts)!r}\n"
+        namespace = {}
+        exec(compile(code, f'<template {name}>', 'exec'), namespace)
+        # render(values) -> str; a missing value raises KeyError naming it
+        self.render = namespace['render']
+
+
+_TEMPLATE_SOURCES = {
+    'html_head': """
+    <html>
+    <head>
+        <style>
+            body {{ font-family: Arial, sans-serif; }}
+            .header {{ background-color: #4CAF50; color: white; padding: 20px; text-align: center; }}
+            .experiment {{ border: 1px solid #ddd; margin: 20px; padding: 20px; border-radius: 5px; }}
+            .metric {{ display: inline-block; margin: 10px; padding: 10px; background: #f5f5f5; border-radius: 5px; }}
+            .winner {{ color: #4CAF50; font-weight: bold; font-size: 24px; }}
+            .stats {{ background: #e3f2fd; padding: 15px; margin: 10px 0; border-radius: 5px; }}
+            .guardrail {{ background: #ffebee; color: #c62828; padding: 15px; margin: 10px 0; border-radius: 5px; }}
+        </style>
+    </head>
+    <body>
+        <div class="header">
+            <h1>🎉 Experiment Results Ready!</h1>
+            <p>Significant results detected at {timestamp}</p>
+        </div>
+    """,
+    'html_section': """
+        <div class="experiment">
+            <h2>{experiment_name}</h2>
+            <p class="winner">{status}</p>
+
+            {stats_block}
+
+            {alerts}
+
+            {sample_size}
+
+            <p><strong>Recommendation:</strong>
+            {recommendation}
+            </p>
+
+            <p><a href="{dashboard_url}">View in Dashboard →</a></p>
+        </div>
+        """,
+    'html_stats': """<div class="stats">
+                <div class="metric">
+                    <strong>Control Rate:</strong><br>
+                    {stats.control_rate:.2f}%
+                </div>
+                <div class="metric">
+                    <strong>Variant Rate:</strong><br>
+                    {stats.variant_rate:.2f}%
+                </div>
+                <div class="metric">
+                    <strong>Lift:</strong><br>
+                    {stats.relative_lift:.1f}%
+                </div>
+                <div class="metric">
+                    <strong>Confidence:</strong><br>
+                    {stats.confidence:.1f}%
+                </div>
+            </div>""",
+    'html_sample_size': """<p><strong>Sample Size:</strong></p>
+            <ul>
+                <li>Control: {stats.control_impressions:,} impressions, {stats.control_conversions:,} conversions</li>
+                <li>Variant: {stats.variant_impressions:,} impressions, {stats.variant_conversions:,} conversions</li>
+            </ul>""",
+    'html_regressions': '<div class="guardrail"><strong>🚨 Guardrail regressions:</strong><ul>{items}</ul></div>',
+    'html_regression': "<li>{metric_name} ({variant_name}): {r.relative_change:+.1f}%, p = {r.p_value:.4f}</li>",
+    'html_srm': ('<div class="guardrail"><strong>⚠️ Sample ratio mismatch (p = {p_value:.2g}):</strong> '
+                 'the traffic split is broken, so these results cannot be trusted.<ul>{items}</ul></div>'),
+    'html_srm_variant': "<li>{name}: {observed:.1%} of impressions (expected {expected:.1%})</li>",
+    'html_foot': """
+    </body>
+    </html>
+    """,
+
+    'text_head': "{rule}\n🎯 EXPERIMENT RESULTS - {timestamp}\n{rule}\n\n",
+    'text_regressions': "🚨 GUARDRAIL REGRESSIONS:\n",
+    'text_regression': "  {experiment_name} / {r.variant_name}: {r.metric_name} {r.relative_change:+.1f}% (p = {r.p_value:.4f})\n",
+    'text_srms': "⚠️ SAMPLE RATIO MISMATCH (traffic split broken, results unreliable):\n",
+    'text_srm': "  {experiment_name}: {split}; p = {p_value:.2g}\n",
+    'text_srm_variant': "{name} {observed:.1%} (expected {expected:.1%})",
+    'text_block_end': "\n{rule}\n\n",
+    'text_section': """📊 {experiment_name}
+{dashes}
+Status: {status}
+
+METRICS:
+  Control Rate:     {stats.control_rate:.2f}%
+  Variant Rate:     {stats.variant_rate:.2f}%
+  Lift:             {stats.relative_lift:.1f}%
+  Confidence:       {stats.confidence:.1f}%
+
+""",
+    'text_metrics': "ALL METRICS:\n",
+    'text_metric': "  {m.metric_name:<24} {m.role:<10} {m.relative_change:+7.1f}%  p = {m.p_value:.4f}{flag}\n",
+    'text_section_end': """SAMPLE SIZE:
+  Control: {stats.control_impressions:,} impressions, {stats.control_conversions:,} conversions
+  Variant: {stats.variant_impressions:,} impressions, {stats.variant_conversions:,} conversions
+
+RECOMMENDATION: {recommendation}
+{rule}
+
+""",
+}
+
+TEMPLATES = {name: Template(source, name) for name, source in _TEMPLATE_SOURCES.items()}
+
+
+def section_status(section: ReportSection) -> str:
+    """Headline of an experiment's section"""
+    if section.srm is not None:
+        return '⚠️ Sample Ratio Mismatch'
+    if section.stats is not None and section.stats.is_significant:
+        return '✅ WINNER DETECTED!' if section.stats.winner == 'variant' else '📊 Significant Result'
+    return '🚨 Guardrail Alert'
+
+
+def recommendation(section: ReportSection) -> str:
+    if section.srm is not None:
+        return '🛑 Fix the traffic split (sample ratio mismatch)'
+    if section.regressions:
+        return '🛑 Investigate guardrail regressions'
+    if section.stats is not None and section.stats.winner == 'variant':
+        return '🚀 Ship the variant!'
+    return '⚠️ Keep current version'
+
+
+def build_sections(experiments: Iterable, summaries: Dict, metric_results: Dict,
+                   mismatches: Iterable) -> List[ReportSection]:
+    """
+    One section per experiment with something to report: a significant
+    result, a guardrail regression or a sample ratio mismatch
+
+    An experiment without a snapshot (e.g. an arm with no impressions at
+    all) is still reported for its regressions or mismatch.
+
+    Args:
+        experiments: Rows with experiment_id and experiment_name
+            (get_active_experiment_rows)
+        summaries: experiment_id -> snapshot (get_current_summaries)
+        metric_results: experiment_id -> MetricResults
+            (get_current_metric_results)
+        mismatches: SRMResults of broken splits (srm_alerts)
+    """
+    srm = {result.experiment_id: result for result in mismatches}
+    sections = []
+    for exp in experiments:
+        snap = summaries.get(exp.experiment_id)
+        metrics = metric_results.get(exp.experiment_id, [])
+        regressions = guardrail_regressions(metrics)
+        mismatch = srm.get(exp.experiment_id)
+        if (snap is not None and snap.is_significant) or regressions or mismatch is not None:
+            sections.append(ReportSection(exp.experiment_id, exp.experiment_name, snap, metrics,
+                                          regressions, mismatch))
+    return sections
+
+
+def _is_significant(section: ReportSection) -> bool:
+    return section.stats is not None and section.stats.is_significant
+
+
+def _srm_variants(srm):
+    return [{'name': name, 'observed': observed, 'expected': expected}
+            for name, observed, expected in zip(srm.variant_names, srm.observed_shares, srm.expected_shares)]
+
+
+def _escape(text: str) -> str:
+    return html.escape(text) if _HTML_SPECIAL.search(text) else text
+
+
+def _html_section(section: ReportSection) -> str:
+    t = TEMPLATES
+    alerts = ''
+    if section.regressions:
+        items = ''.join(t['html_regression'].render({
+            'r': r, 'metric_name': _escape(r.metric_name), 'variant_name': _escape(r.variant_name)
+        }) for r in section.regressions)
+        alerts = t['html_regressions'].render({'items': items})
+    if section.srm is not None:
+        items = ''.join(t['html_srm_variant'].render({**v, 'name': _escape(v['name'])})
+                        for v in _srm_variants(section.srm))
+        alerts += t['html_srm'].render({'p_value': section.srm.p_value, 'items': items})
+
+    # Sections reported only for alerts may have no snapshot to show
+    stats = {'stats': section.stats} if section.stats is not None else None
+    return t['html_section'].render({
+        'stats_block': t['html_stats'].render(stats) if stats else '',
+        'sample_size': t['html_sample_size'].render(stats) if stats else '',
+        'experiment_name': _escape(section.experiment_name),
+        'status': section_status(section),
+        'alerts': alerts,
+        'recommendation': recommendation(section),
+        'dashboard_url': DASHBOARD_URL,
+    })
+
+
+def _text_section(section: ReportSection) -> str:
+    t = TEMPLATES
+    values = {
+        'stats': section.stats,
+        'experiment_name': section.experiment_name,
+        'dashes': '-' * 70,
+        'rule': RULE,
+        'status': section_status(section),
+        'recommendation': recommendation(section),
+    }
+    chunks = [t['text_section'].render(values)]
+    if len(section.metrics) > 1:
+        chunks.append(t['text_metrics'].render({}))
+        chunks.extend(t['text_metric'].render({'m': m, 'flag': ' 🚨' if m.regression else ''})
+                      for m in section.metrics)
+        chunks.append('\n')
+    chunks.append(t['text_section_end'].render(values))
+    return ''.join(chunks)
+
+
+def significant_entry(section: ReportSection) -> dict:
+    """A significant experiment as stored in experiment_results.json"""
+    stats = section.stats
+    return {
+        'experiment_name': section.experiment_name,
+        'experiment_id': section.experiment_id,
+        'data_version': stats.data_version,
+        'control_rate': stats.control_rate,
+        'variant_rate': stats.variant_rate,
+        'absolute_lift': stats.absolute_lift,
+        'lift': stats.relative_lift,
+        'confidence': stats.confidence,
+        'p_value': stats.p_value,
+        'z_score': stats.z_score,
+        'winner': stats.winner,
+        'control_impressions': stats.control_impressions,
+        'control_conversions': stats.control_conversions,
+        'control_revenue': stats.control_revenue,
+        'variant_impressions': stats.variant_impressions,
+        'variant_conversions': stats.variant_conversions,
+        'variant_revenue': stats.variant_revenue,
+        'metrics': [m._asdict() for m in section.metrics],
+        'recommendation': recommendation(section),
+    }
+
+
+def _json_item(item: dict) -> str:
+    """One list item laid out as json.dump(..., indent=2) lays it out inside the report"""
+    # JSON strings never contain a raw newline, so this only indents lines
+    return '    ' + json.dumps(item, indent=2).replace('\n', '\n    ')
+
+
+def _json_value(value) -> str:
+    """A scalar encoded exactly as json.dumps encodes it"""
+    if isinstance(value, str):
+        return encode_basestring_ascii(value)
+    if value is None or isinstance(value, bool):
+        return 'null' if value is None else 'true' if value else 'false'
+    if isinstance(value, int):
+        return int.__repr__(value)
+    if isinstance(value, float):
+        if math.isfinite(value):
+            return float.__repr__(value)
+        return 'NaN' if value != value else 'Infinity' if value > 0 else '-Infinity'
+    return json.dumps(value)
+
+
+def _json_object_template(name: str, keys, indent: int) -> Template:
+    """Template of a JSON object with pre-encoded values, laid out like json.dump(..., indent=2)"""
+    members = ',\n'.join(f"{' ' * (indent + 2)}{json.dumps(k)}: {{{k}}}" for k in keys)
+    return Template('{{\n' + members + '\n' + ' ' * indent + '}}', name)
+
+
+_SIGNIFICANT_JSON = _json_object_template('json_significant', (
+    'experiment_name', 'experiment_id', 'data_version', 'control_rate', 'variant_rate', 'absolute_lift',
+    'lift', 'confidence', 'p_value', 'z_score', 'winner', 'control_impressions', 'control_conversions',
+    'control_revenue', 'variant_impressions', 'variant_conversions', 'variant_revenue', 'metrics',
+    'recommendation'
+), indent=4)
+_METRIC_JSON = _json_object_template('json_metric', (
+    'metric_name', 'role', 'variant_name', 'control_value', 'variant_value', 'relative_change',
+    'p_value', 'is_significant', 'regression'
+), indent=8)
+
+
+def _json_section(section: ReportSection) -> str:
+    entry = significant_entry(section)
+    metrics = [_METRIC_JSON.render({k: _json_value(v) for k, v in m.items()}) for m in entry.pop('metrics')]
+    values = {k: _json_value(v) for k, v in entry.items()}
+    values['metrics'] = '[\n' + ',\n'.join(' ' * 8 + m for m in metrics) + '\n      ]' if metrics else '[]'
+    return '    ' + _SIGNIFICANT_JSON.render(values)
+
+
+_SECTION_RENDERERS = {'html': _html_section, 'text': _text_section, 'json': _json_section}
+
+
+def _render_chunk(fmt: str, sections: List[ReportSection]) -> List[str]:
+    render = _SECTION_RENDERERS[fmt]
+    return [render(s) for s in sections]
+
+
+def _render_sections(fmt: str, sections: List[ReportSection], workers: int) -> Iterator[str]:
+    """Rendered body sections in order, on a process pool for large batches"""
+    if workers > 1 and len(sections) >= PARALLEL_MIN_SECTIONS:
+        from concurrent.futures import ProcessPoolExecutor
+
+        chunks = [sections[i:i + CHUNK_SIZE] for i in range(0, len(sections), CHUNK_SIZE)]
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            for rendered in pool.map(_render_chunk, [fmt] * len(chunks), chunks):
+                yield from rendered
+    else:
+        render = _SECTION_RENDERERS[fmt]
+        for section in sections:
+            yield render(section)
+
+
+def _iter_html(sections, timestamp, workers):
+    yield TEMPLATES['html_head'].render({'timestamp': timestamp})
+    yield from _render_sections('html', list(sections), workers)
+    yield TEMPLATES['html_foot'].render({})
+
+
+def _iter_text(sections, timestamp, workers):
+    t = TEMPLATES
+    yield t['text_head'].render({'rule': RULE, 'timestamp': timestamp})
+
+    regressed = [s for s in sections if s.regressions]
+    if regressed:
+        yield t['text_regressions'].render({})
+        for s in regressed:
+            for r in s.regressions:
+                yield t['text_regression'].render({'r': r, 'experiment_name': s.experiment_name})
+        yield t['text_block_end'].render({'rule': RULE})
+
+    mismatched = [s for s in sections if s.srm is not None]
+    if mismatched:
+        yield t['text_srms'].render({})
+        for s in mismatched:
+            split = ', '.join(t['text_srm_variant'].render(v) for v in _srm_variants(s.srm))
+            yield t['text_srm'].render({'experiment_name': s.experiment_name, 'split': split,
+                                        'p_value': s.srm.p_value})
+        yield t['text_block_end'].render({'rule': RULE})
+
+    yield from _render_sections('text', [s for s in sections if _is_significant(s)], workers)
+
+
+def _iter_json_list(items: Iterator[str]) -> Iterator[str]:
+    first = True
+    for item in items:
+        yield '[\n' + item if first else ',\n' + item
+        first = False
+    yield '[]' if first else '\n  ]'
+
+
+def _iter_json(sections, timestamp, workers):
+    yield '{\n  "timestamp": ' + json.dumps(timestamp) + ',\n  "significant_experiments": '
+    yield from _iter_json_list(_render_sections('json', [s for s in sections if _is_significant(s)], workers))
+
+    yield ',\n  "guardrail_alerts": '
+    yield from _iter_json_list(
+        _json_item({'experiment_name': s.experiment_name, 'experiment_id': s.experiment_id, **r._asdict()})
+        for s in sections for r in s.regressions
+    )
+
+    yield ',\n  "srm_alerts": '
+    yield from _iter_json_list(
+        _json_item({'experiment_name': s.experiment_name, **s.srm._asdict()})
+        for s in sections if s.srm is not None
+    )
+    yield '\n}'
+
+
+_REPORTS = {'html': _iter_html, 'text': _iter_text, 'json': _iter_json}
+
+
+def iter_report(fmt: str, sections: Iterable[ReportSection], timestamp: str, workers: int = 1) -> Iterator[str]:
+    """
+    A report as a stream of string chunks
+
+    Args:
+        fmt: 'html' (every section, alerts inline), 'text' or 'json'
+            (significant experiments plus every guardrail and SRM alert)
+        sections: One per experiment with something to report
+        timestamp: Shown in the report header
+        workers: Processes for rendering large batches
+
+    Raises:
+        ValueError: for an unknown format
+    """
+    if fmt not in REPORT_FORMATS:
+        raise ValueError(f"fmt must be one of {REPORT_FORMATS}")
+    return _REPORTS[fmt](list(sections), timestamp, workers)
+
+
+def render_report(fmt: str, sections: Iterable[ReportSection], timestamp: str, workers: int = 1) -> str:
+    """The whole report as one string (e.g. an email body)"""
+    return ''.join(iter_report(fmt, sections, timestamp, workers))
+
+
+def write_report(path: str, fmt: str, sections: Iterable[ReportSection], timestamp: str, workers: int = 1) -> int:
+    """
+    Stream a report to a file, replacing it only once complete
+
+    Returns:
+        Number of characters written
+    """
+    tmp_path = path + '.tmp'
+    written = 0
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        for chunk in iter_report(fmt, sections, timestamp, workers):
+            written += f.write(chunk)
+    os.replace(tmp_path, path)
+    return written
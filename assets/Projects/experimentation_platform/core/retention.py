@@ -0,0 +1,210 @@
+"""
+Retention for completed experiments.
+
+Once an experiment is marked completed (`complete_experiment`), its daily
+rows in `experiment_metrics` are no longer needed at full resolution.
+`RetentionManager` rolls them up into weekly or monthly rows in
+`experiment_metrics_rollup`, optionally copies the raw rows into an
+archive database first, deletes them from the hot table and then
+returns the freed pages to the OS with an incremental vacuum.
+
+`get_experiment_results` reads both tables, so its answers do not change:
+impressions, conversions and days_running are exact, revenue is equal up
+to floating-point summation order.
+"""
+
+import os
+import sqlite3
+from typing import Dict, List, Optional
+
+from core.data_manager import ExperimentDataManager, open_data_manager
+from database.db_setup import DAY_MOMENTS, DIMENSIONS, create_schema
+
+ARCHIVE_PATH = os.path.join('data', 'experiments_archive.db')
+
+# SQL expression giving the first day of the period a daily row belongs to
+PERIOD_START = {
+    'week': "date(date, 'weekday 0', '-6 days')",   # ISO weeks, Monday start
+    'month': "date(date, 'start of month')",
+}
+
+
+class RetentionManager:
+    """Rolls up and archives metric rows of completed experiments"""
+
+    def __init__(
+        self,
+        dm: ExperimentDataManager,
+        granularity: str = 'week',
+        archive_path: Optional[str] = ARCHIVE_PATH,
+        vacuum_pages: int = 0
+    ):
+        """
+        Args:
+            dm: Data manager for the database to clean up
+            granularity: 'week' or 'month'
+            archive_path: Database that receives a copy of the raw rows
+                before they are deleted (None to skip archiving)
+            vacuum_pages: Pages to free per run (0 frees everything)
+        """
+        if granularity not in PERIOD_START:
+            raise ValueError(f"granularity must be one of {sorted(PERIOD_START)}")
+        self.dm = dm
+        self.granularity = granularity
+        self.archive_path = archive_path
+        self.vacuum_pages = vacuum_pages
+
+    def _pending(self, conn: sqlite3.Connection) -> List[int]:
+        rows = conn.execute("""
+            SELECT e.experiment_id
+            FROM experiments e
+            WHERE e.status = 'completed'
+              AND EXISTS (SELECT 1 FROM experiment_metrics em WHERE em.experiment_id = e.experiment_id)
+            ORDER BY e.experiment_id
+        """).fetchall()
+        return [row[0] for row in rows]
+
+    def pending_experiments(self) -> List[int]:
+        """Completed experiments that still have daily rows in the hot table"""
+        pending = []
+        for conn in self.dm.get_metrics_connections():
+            pending += self._pending(conn)
+            conn.close()
+        return sorted(pending)
+
+    def rollup_experiment(self, conn: sqlite3.Connection, experiment_id: int) -> int:
+        """Archive, roll up and delete one experiment's daily rows (caller commits)"""
+        dims = ', '.join(DIMENSIONS)
+
+        if self.archive_path:
+            # metric_id is left out: it is only unique within one shard
+            columns = f"experiment_id, variant_id, date, impressions, conversions, revenue, unique_users, {dims}"
+            conn.execute(f"""
+                INSERT INTO archive.experiment_metrics ({columns})
+                SELECT {columns} FROM main.experiment_metrics WHERE experiment_id = ?
+            """, (experiment_id,))
+
+        # Segments are kept so segment breakdowns stay identical too. The
+        # period's distinct-day count goes on one row per variant/period so
+        # that summing days_covered still gives days_running; the squares and
+        # products of the daily totals go on the same row, so per-day metric
+        # variances (core/metric_evaluation.py) do not change either.
+        moments = ', '.join(f"SUM({a} * {b}) as {name}" for name, (a, b) in DAY_MOMENTS.items())
+        conn.execute(f"""
+            WITH daily AS (
+                SELECT *, {PERIOD_START[self.granularity]} as period_start
+                FROM experiment_metrics
+                WHERE experiment_id = ?
+            ),
+            day_totals AS (
+                SELECT variant_id, period_start,
+                       SUM(impressions) as impressions, SUM(conversions) as conversions,
+                       SUM(revenue) as revenue, SUM(unique_users) as unique_users
+                FROM daily
+                GROUP BY variant_id, period_start, date
+            ),
+            period_days AS (
+                SELECT variant_id, period_start, COUNT(*) as days, {moments}
+                FROM day_totals
+                GROUP BY variant_id, period_start
+            ),
+            grouped AS (
+                SELECT
+                    experiment_id, variant_id, period_start, {dims},
+                    SUM(impressions) as impressions,
+                    SUM(conversions) as conversions,
+                    SUM(revenue) as revenue,
+                    SUM(unique_users) as unique_users,
+                    ROW_NUMBER() OVER (PARTITION BY variant_id, period_start ORDER BY {dims}) as rn
+                FROM daily
+                GROUP BY experiment_id, variant_id, period_start, {dims}
+            )
+            INSERT INTO experiment_metrics_rollup
+            (experiment_id, variant_id, granularity, period_start, {dims},
+             impressions, conversions, revenue, unique_users, days_covered, {', '.join(DAY_MOMENTS)})
+            SELECT
+                g.experiment_id, g.variant_id, ?, g.period_start, {', '.join('g.' + d for d in DIMENSIONS)},
+                g.impressions, g.conversions, g.revenue, g.unique_users,
+                CASE WHEN g.rn = 1 THEN p.days ELSE 0 END,
+                {', '.join(f"CASE WHEN g.rn = 1 THEN p.{name} END" for name in DAY_MOMENTS)}
+            FROM grouped g
+            JOIN period_days p ON p.variant_id = g.variant_id AND p.period_start = g.period_start
+        """, (experiment_id, self.granularity))
+
+        cursor = conn.execute("DELETE FROM experiment_metrics WHERE experiment_id = ?", (experiment_id,))
+        return cursor.rowcount
+
+    def vacuum(self) -> int:
+        """Return free pages to the OS; returns the number of pages freed"""
+        freed = 0
+        # Every database holding metric rows (each shard when sharded)
+        for conn in self.dm.get_metrics_connections():
+            if conn.execute("PRAGMA auto_vacuum").fetchone()[0] != 2:
+                # Database predates incremental auto-vacuum: convert it once
+                conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+                conn.execute("VACUUM")
+
+            before = conn.execute("PRAGMA freelist_count").fetchone()[0]
+            pages = f"({int(self.vacuum_pages)})" if self.vacuum_pages else ""
+            # execute() steps the statement only once (one page); executescript
+            # runs it to completion
+            conn.executescript(f"PRAGMA incremental_vacuum{pages};")
+            freed += before - conn.execute("PRAGMA freelist_count").fetchone()[0]
+            conn.close()
+        return freed
+
+    def run(self) -> Dict:
+        """
+        Process every pending completed experiment.
+
+        Each experiment is handled in its own transaction, so an
+        interrupted run leaves every experiment either fully rolled up
+        or untouched.
+
+        Returns:
+            {'experiments': [...], 'rows_removed': n, 'pages_freed': n}
+        """
+        experiment_ids = []
+        removed = 0
+
+        if self.archive_path:
+            archive = sqlite3.connect(self.archive_path)
+            create_schema(archive)
+            archive.close()
+
+        # One pass per database holding metric rows (each shard when sharded)
+        for conn in self.dm.get_metrics_connections():
+            pending = self._pending(conn)
+            if pending and self.archive_path:
+                conn.execute("ATTACH DATABASE ? AS archive", (self.archive_path,))
+
+            for experiment_id in pending:
+                try:
+                    removed += self.rollup_experiment(conn, experiment_id)
+                    conn.commit()
+                except sqlite3.Error:
+                    conn.rollback()
+                    conn.close()
+                    raise
+
+            experiment_ids += pending
+            conn.close()
+
+        return {
+            'experiments': sorted(experiment_ids),
+            'rows_removed': removed,
+            'pages_freed': self.vacuum(),
+        }
+
+
+# Run retention on the local database
+if __name__ == "__main__":
+    print("🧹 Running retention for completed experiments...\n")
+
+    retention = RetentionManager(open_data_manager())
+    summary = retention.run()
+
+    print(f"Experiments rolled up: {summary['experiments'] or 'none'}")
+    print(f"Daily rows moved:      {summary['rows_removed']:,}")
+    print(f"Pages freed:           {summary['pages_freed']:,}")
+    print("\n✅ Retention complete!")
@@ -0,0 +1,245 @@
+"""
+In-process job scheduler.
+
+start_auto_check.ps1 and start_email_alerts.ps1 used to start a new
+Python process every 5 minutes, paying for interpreter start-up, imports
+and a cold significance cache on every cycle (and only on Windows).
+`Scheduler` runs the same work as jobs inside one long-lived process
+(see run_scheduler.py):
+
+- Jobs wait in a heap ordered by their next due time; the asyncio loop
+  sleeps until the earliest one is due (or `stop()` is called).
+- Each run happens on a worker thread, so a slow job never delays the
+  others. A job that is still running when it is due again is skipped
+  for that round (overlap protection) and counted in `skipped`.
+- Every wait gets a random 0..jitter seconds added, so several
+  schedulers do not all hit the database at the same moment.
+- Runs are scheduled from the previous due time, not from when the run
+  finished, so intervals do not drift.
+
+Each job's state (runs, failures, last result or error, next run) is
+kept in the `job_status` table of data/scheduler.db, written at the start
+and end of every run; `read_job_status` feeds the app's status view.
+Several schedulers (e.g. one per PowerShell script) can share the file.
+"""
+
+import asyncio
+import heapq
+import itertools
+import os
+import random
+import sqlite3
+import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Callable, Dict, Iterable, List, NamedTuple, Optional
+
+STATUS_PATH = os.path.join('data', 'scheduler.db')
+
+
+@dataclass(frozen=True)
+class Job:
+    """Something to run every `interval` seconds"""
+    name: str
+    func: Callable[[], object]     # may return a short summary for the status view
+    interval: float                # seconds between runs
+    jitter: float = 0.0            # up to this many seconds added to every wait
+    run_at_start: bool = True      # first run right away instead of after one interval
+
+
+class JobStatus(NamedTuple):
+    """One row of the job_status table"""
+    job: str
+    pid: int
+    interval_seconds: float
+    running: bool
+    runs: int
+    failures: int
+    skipped: int
+    last_started: Optional[str]
+    last_finished: Optional[str]
+    last_duration: Optional[float]     # seconds
+    last_result: Optional[str]
+    last_error: Optional[str]
+    next_run: Optional[str]            # None once the scheduler stopped
+    updated_at: str
+
+
+def _create_status_table(conn: sqlite3.Connection):
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS job_status (
+            job TEXT PRIMARY KEY,
+            pid INTEGER,
+            interval_seconds REAL,
+            running INTEGER,
+            runs INTEGER,
+            failures INTEGER,
+            skipped INTEGER,
+            last_started TEXT,
+            last_finished TEXT,
+            last_duration REAL,
+            last_result TEXT,
+            last_error TEXT,
+            next_run TEXT,
+            updated_at TEXT
+        )
+    """)
+    conn.commit()
+
+
+def read_job_status(path: str = STATUS_PATH) -> List[JobStatus]:
+    """Status of every job any scheduler has run, by job name"""
+    if not os.path.exists(path):
+        return []
+    conn = sqlite3.connect(path)
+    try:
+        _create_status_table(conn)
+        rows = conn.execute(f"SELECT {', '.join(JobStatus._fields)} FROM job_status ORDER BY job").fetchall()
+    finally:
+        conn.close()
+    return [JobStatus(*row)._replace(running=bool(row[3])) for row in rows]
+
+
+def _now() -> str:
+    return datetime.now().isoformat(sep=' ', timespec='seconds')
+
+
+def _summary(result) -> Optional[str]:
+    if result is None:
+        return None
+    text = str(result)
+    return text if len(text) <= 200 else text[:197] + '...'
+
+
+class Scheduler:
+    """Runs jobs at their intervals until stopped"""
+
+    def __init__(self, jobs: Iterable[Job], status_path: Optional[str] = STATUS_PATH, seed: Optional[int] = None):
+        """
+        Args:
+            jobs: Jobs with distinct names
+            status_path: SQLite file for the job_status table (None to keep
+                the status in memory only)
+            seed: Seed for the jitter
+        """
+        self.jobs = {}
+        for job in jobs:
+            if job.name in self.jobs:
+                raise ValueError(f"Duplicate job name: {job.name}")
+            if job.interval <= 0 or job.jitter < 0:
+                raise ValueError(f"Job {job.name}: interval must be positive and jitter non-negative")
+            self.jobs[job.name] = job
+        self.status_path = status_path
+        self.status: Dict[str, JobStatus] = {
+            job.name: JobStatus(job.name, os.getpid(), job.interval, False, 0, 0, 0,
+                                None, None, None, None, None, None, _now())
+            for job in self.jobs.values()
+        }
+
+        self._random = random.Random(seed)
+        self._queue = []                    # (due, seq, job name), due on the loop clock
+        self._seq = itertools.count()
+        self._running: Dict[str, asyncio.Task] = {}
+        self._stop: Optional[asyncio.Event] = None
+        self._conn: Optional[sqlite3.Connection] = None
+
+    def _delay(self, job: Job) -> float:
+        return job.interval + (self._random.uniform(0, job.jitter) if job.jitter else 0.0)
+
+    def _update(self, name: str, **changes):
+        status = self.status[name]._replace(updated_at=_now(), **changes)
+        self.status[name] = status
+        if self._conn is not None:
+            self._conn.execute(f"""
+                INSERT OR REPLACE INTO job_status ({', '.join(JobStatus._fields)})
+                VALUES ({', '.join('?' * len(JobStatus._fields))})
+            """, status)
+            self._conn.commit()
+
+    def _schedule(self, job: Job, due: float, loop: asyncio.AbstractEventLoop):
+        heapq.heappush(self._queue, (due, next(self._seq), job.name))
+        next_run = datetime.now() + timedelta(seconds=max(0.0, due - loop.time()))
+        self._update(job.name, next_run=next_run.isoformat(sep=' ', timespec='seconds'))
+
+    async def _execute(self, job: Job, executor: ThreadPoolExecutor):
+        loop = asyncio.get_running_loop()
+        status = self.status[job.name]
+        self._update(job.name, running=True, last_started=_now())
+        started = time.perf_counter()
+        try:
+            result = await loop.run_in_executor(executor, job.func)
+        except Exception:
+            self._update(job.name, running=False, runs=status.runs + 1, failures=status.failures + 1,
+                         last_finished=_now(), last_duration=time.perf_counter() - started,
+                         last_error=traceback.format_exc(limit=3))
+        else:
+            self._update(job.name, running=False, runs=status.runs + 1, last_finished=_now(),
+                         last_duration=time.perf_counter() - started, last_result=_summary(result),
+                         last_error=None)
+        finally:
+            self._running.pop(job.name, None)
+
+    def stop(self):
+        """Ask run() to return once the running jobs finished (call from the loop)"""
+        if self._stop is not None:
+            self._stop.set()
+
+    async def run(self, duration: Optional[float] = None):
+        """
+        Run the jobs until stop() is called or `duration` seconds passed
+
+        Jobs that are running at that point are waited for.
+        """
+        loop = asyncio.get_running_loop()
+        self._stop = asyncio.Event()
+        if self.status_path is not None:
+            directory = os.path.dirname(self.status_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._conn = sqlite3.connect(self.status_path)
+            _create_status_table(self._conn)
+
+        start = loop.time()
+        deadline = None if duration is None else start + duration
+        for job in self.jobs.values():
+            self._schedule(job, start if job.run_at_start else start + self._delay(job), loop)
+
+        executor = ThreadPoolExecutor(max_workers=len(self.jobs), thread_name_prefix='scheduler')
+        try:
+            while not self._stop.is_set():
+                due, _, name = self._queue[0]
+                wake = due if deadline is None else min(due, deadline)
+                wait = wake - loop.time()
+                if wait > 0:
+                    try:
+                        await asyncio.wait_for(self._stop.wait(), wait)
+                    except asyncio.TimeoutError:
+                        pass
+                    continue
+                if deadline is not None and loop.time() >= deadline and due > deadline:
+                    break
+
+                heapq.heappop(self._queue)
+                job = self.jobs[name]
+                if name in self._running:
+                    self._update(name, skipped=self.status[name].skipped + 1)
+                else:
+                    self._running[name] = asyncio.create_task(self._execute(job, executor))
+
+                # Keep the rhythm; after a long stall continue from now
+                now = loop.time()
+                next_due = due + self._delay(job)
+                self._schedule(job, next_due if next_due > now else now + self._delay(job), loop)
+                # Let finished runs report back even when the next job is already due
+                await asyncio.sleep(0)
+        finally:
+            if self._running:
+                await asyncio.gather(*self._running.values(), return_exceptions=True)
+            executor.shutdown(wait=True)
+            for name in self.jobs:
+                self._update(name, running=False, next_run=None)
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
@@ -0,0 +1,159 @@
+"""
+Sharded storage: metric rows spread over several SQLite files.
+
+SQLite allows one writer per database file, so with a single
+`experiments.db` every experiment's ingestion waits for every other's.
+In sharded mode the files live in one directory:
+
+    data/shards/catalog.db      experiments, variants, metric definitions,
+                                snapshots (written rarely)
+    data/shards/shard_00.db     experiment_metrics, experiment_metrics_rollup,
+    data/shards/shard_01.db     experiment_versions for the experiments
+    ...                         with experiment_id % shard_count == n
+
+Writers to experiments on different shards no longer block each other.
+Every shard connection ATTACHes the catalog, so the data manager's
+queries that join `variants` work unchanged. Queries over many
+experiments are split by shard and run in parallel threads (SQLite
+releases the GIL while it works).
+
+Create or change the layout with `python -m database.reshard`;
+`open_data_manager()` picks it up automatically.
+"""
+
+import os
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+
+from core.data_manager import ExperimentDataManager
+from core.data_quality import check_metric_rows
+from database.db_setup import create_catalog_schema, create_metrics_schema
+
+SHARD_DIR = os.path.join('data', 'shards')
+CATALOG_NAME = 'catalog.db'
+
+
+def shard_path(shard_dir: str, shard: int) -> str:
+    return os.path.join(shard_dir, f"shard_{shard:02d}.db")
+
+
+def read_shard_count(shard_dir: str) -> Optional[int]:
+    """Shard count recorded in a layout's catalog (None if there is no layout)"""
+    catalog = os.path.join(shard_dir, CATALOG_NAME)
+    if not os.path.exists(catalog):
+        return None
+    conn = sqlite3.connect(catalog)
+    try:
+        row = conn.execute("SELECT shard_count FROM shard_layout").fetchone()
+    except sqlite3.OperationalError:
+        row = None
+    conn.close()
+    return row[0] if row else None
+
+
+def has_shard_layout(shard_dir: str) -> bool:
+    return read_shard_count(shard_dir) is not None
+
+
+class ShardedExperimentDataManager(ExperimentDataManager):
+    """ExperimentDataManager whose metric rows are routed to shards by experiment_id"""
+
+    def __init__(self, shard_dir: str = SHARD_DIR, shard_count: Optional[int] = None, workers: Optional[int] = None):
+        """
+        Args:
+            shard_dir: Directory holding catalog.db and the shard files
+            shard_count: Number of shards; required for a new layout and
+                must match an existing one (use database/reshard.py to
+                change it)
+            workers: Threads used for cross-shard queries (default: one
+                per shard)
+        """
+        stored = read_shard_count(shard_dir)
+        if shard_count is None:
+            if stored is None:
+                raise ValueError(f"No shard layout in {shard_dir}; pass shard_count to create one")
+            shard_count = stored
+        elif stored is not None and stored != shard_count:
+            raise ValueError(f"{shard_dir} has {stored} shards, not {shard_count}; "
+                             "use database/reshard.py to change the shard count")
+        if shard_count < 1:
+            raise ValueError("shard_count must be at least 1")
+
+        super().__init__(os.path.join(shard_dir, CATALOG_NAME))
+        self.shard_dir = shard_dir
+        self.shard_count = shard_count
+        self.shard_paths = [shard_path(shard_dir, i) for i in range(shard_count)]
+        self.workers = workers or shard_count
+
+        if stored is None:
+            self._create_layout()
+
+    def _create_layout(self):
+        os.makedirs(self.shard_dir, exist_ok=True)
+        # WAL lets readers (the app) run while a shard is being written
+        for path, schema in [(self.db_path, create_catalog_schema)] + [(p, create_metrics_schema) for p in self.shard_paths]:
+            conn = sqlite3.connect(path)
+            conn.execute("PRAGMA journal_mode = WAL")
+            schema(conn)
+            conn.close()
+
+        conn = sqlite3.connect(self.db_path)
+        conn.execute("CREATE TABLE IF NOT EXISTS shard_layout (shard_count INTEGER NOT NULL)")
+        conn.execute("INSERT INTO shard_layout (shard_count) VALUES (?)", (self.shard_count,))
+        conn.commit()
+        conn.close()
+
+    def shard_for(self, experiment_id: int) -> int:
+        return int(experiment_id) % self.shard_count
+
+    def get_connection(self):
+        """Catalog connection (experiments, variants, snapshots)"""
+        return self._connect(self.db_path, create_catalog_schema)
+
+    def _connect_shard(self, shard: int) -> sqlite3.Connection:
+        conn = self._connect(self.shard_paths[shard], create_metrics_schema)
+        # Safe with WAL: a crash can lose the last commits but never corrupts
+        conn.execute("PRAGMA synchronous = NORMAL")
+        conn.execute("ATTACH DATABASE ? AS catalog", (self.db_path,))
+        return conn
+
+    def get_metrics_connection(self, experiment_id: int) -> sqlite3.Connection:
+        return self._connect_shard(self.shard_for(experiment_id))
+
+    def get_metrics_connections(self) -> List[sqlite3.Connection]:
+        return [self._connect_shard(i) for i in range(self.shard_count)]
+
+    def get_metrics_paths(self) -> List[str]:
+        return list(self.shard_paths)
+
+    def insert_metric_rows(self, rows: List[tuple], validate: bool = True, rollup: bool = False) -> int:
+        """One transaction per shard the rows belong to"""
+        if validate:
+            check_metric_rows(rows)
+        by_shard = {}
+        for row in rows:
+            by_shard.setdefault(self.shard_for(row[0]), []).append(row)
+        insert = super().insert_metric_rows
+        return sum(insert(part, validate=False, rollup=rollup) for part in by_shard.values())
+
+    def _map_experiments(self, experiment_ids: List[int], fn) -> Dict:
+        by_shard = {}
+        for experiment_id in experiment_ids:
+            by_shard.setdefault(self.shard_for(experiment_id), []).append(experiment_id)
+
+        def run(shard):
+            conn = self._connect_shard(shard)
+            try:
+                return fn(conn, by_shard[shard])
+            finally:
+                conn.close()
+
+        merged = {}
+        if len(by_shard) == 1:
+            merged.update(run(next(iter(by_shard))))
+        else:
+            with ThreadPoolExecutor(max_workers=min(self.workers, len(by_shard))) as pool:
+                for part in pool.map(run, by_shard):
+                    merged.update(part)
+        return merged
@@ -0,0 +1,183 @@
+"""
+Shared cache of two-proportion test results.
+
+The same (control_conv, control_imp, variant_conv, variant_imp) counts
+are tested by the Dashboard, the Results page, check_results.py and
+email_results.py until new metrics arrive. `SignificanceCache` keeps the
+(z_score, p_value) of each count tuple in a bounded LRU with an optional
+time-to-live; `ABTestCalculator(cache=...)` consults it before testing.
+Results do not depend on alpha, so calculators with different alphas
+share entries.
+
+With a `path`, entries are also kept in a small SQLite file, so the app
+starts warm after a restart. The file is read in one query on first use
+and new entries are written back in batches (and at exit), so lookups
+never wait on disk. The scripts leave it off: a short run pays more to
+load the file than it saves, and their stored snapshots already skip
+experiments whose data did not change.
+"""
+
+import atexit
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+CACHE_PATH = os.path.join('data', 'significance_cache.db')
+MAX_ENTRIES = 50_000
+FLUSH_EVERY = 256           # new entries buffered before writing to the file
+
+Key = Tuple[int, int, int, int]
+
+
+class SignificanceCache:
+    """Bounded LRU of (z_score, p_value) by aggregated counts"""
+
+    def __init__(self, max_entries: int = MAX_ENTRIES, ttl_seconds: Optional[float] = None,
+                 path: Optional[str] = None):
+        """
+        Args:
+            max_entries: Entries kept in memory (and in the file)
+            ttl_seconds: Entries older than this are recomputed (None keeps
+                them until evicted)
+            path: SQLite file shared between processes (None keeps the
+                cache in this process only)
+        """
+        if max_entries < 1:
+            raise ValueError("max_entries must be at least 1")
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.path = path
+        self.hits = 0
+        self.misses = 0
+
+        self._entries = OrderedDict()   # key -> (z_score, p_value, stored_at)
+        self._pending = []
+        self._loaded = path is None
+        self._lock = threading.Lock()
+        if path is not None:
+            atexit.register(self.flush)
+
+    def get(self, key: Key) -> Optional[Tuple[float, float]]:
+        """(z_score, p_value) for the counts, or None on a miss"""
+        # Lookups take no lock (single OrderedDict operations are atomic
+        # under the GIL); with one, a hit costs more than the test itself
+        if not self._loaded:
+            with self._lock:
+                if not self._loaded:
+                    self._load()
+        entry = self._entries.get(key)
+        if entry is not None and self.ttl_seconds is not None and time.time() - entry[2] > self.ttl_seconds:
+            self._entries.pop(key, None)
+            entry = None
+        if entry is None:
+            self.misses += 1
+            return None
+        try:
+            self._entries.move_to_end(key)
+        except KeyError:
+            pass    # evicted by another thread meanwhile
+        self.hits += 1
+        return entry[0], entry[1]
+
+    def put(self, key: Key, z_score: float, p_value: float):
+        with self._lock:
+            entry = (z_score, p_value, time.time())
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            if len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            if self.path is not None:
+                self._pending.append(key + entry)
+                if len(self._pending) >= FLUSH_EVERY:
+                    self._write()
+
+    def flush(self):
+        """Write buffered entries to the file"""
+        with self._lock:
+            self._write()
+
+    def clear(self):
+        """Drop every entry (and the file's contents) and reset the counters"""
+        with self._lock:
+            self._entries.clear()
+            self._pending = []
+            self.hits = self.misses = 0
+            if self.path is not None and os.path.exists(self.path):
+                conn = self._connect()
+                conn.execute("DELETE FROM significance_cache")
+                conn.commit()
+                conn.close()
+
+    def stats(self) -> Dict:
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+            'entries': len(self._entries),
+        }
+
+    def _connect(self) -> sqlite3.Connection:
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        conn = sqlite3.connect(self.path, timeout=10)
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS significance_cache (
+                control_conv INTEGER NOT NULL,
+                control_imp INTEGER NOT NULL,
+                variant_conv INTEGER NOT NULL,
+                variant_imp INTEGER NOT NULL,
+                z_score REAL NOT NULL,
+                p_value REAL NOT NULL,
+                stored_at REAL NOT NULL,
+                PRIMARY KEY (control_conv, control_imp, variant_conv, variant_imp)
+            ) WITHOUT ROWID
+        """)
+        return conn
+
+    def _load(self):
+        """Read the newest unexpired entries from the file (oldest first, so LRU order holds)"""
+        self._loaded = True
+        if not os.path.exists(self.path):
+            return
+        oldest = time.time() - self.ttl_seconds if self.ttl_seconds is not None else 0
+        try:
+            conn = self._connect()
+            rows = conn.execute("""
+                SELECT * FROM (
+                    SELECT control_conv, control_imp, variant_conv, variant_imp, z_score, p_value, stored_at
+                    FROM significance_cache WHERE stored_at >= ?
+                    ORDER BY stored_at DESC LIMIT ?
+                ) ORDER BY stored_at
+            """, (oldest, self.max_entries)).fetchall()
+            conn.close()
+        except sqlite3.DatabaseError:
+            # A damaged cache file is not worth failing for; it is rebuilt on write
+            return
+        for row in rows:
+            self._entries[row[:4]] = row[4:]
+
+    def _write(self):
+        if not self._pending:
+            return
+        rows, self._pending = self._pending, []
+        try:
+            conn = self._connect()
+            conn.executemany("INSERT OR REPLACE INTO significance_cache VALUES (?, ?, ?, ?, ?, ?, ?)", rows)
+            # Keep the file as bounded as the memory cache
+            conn.execute("""
+                DELETE FROM significance_cache WHERE stored_at < (
+                    SELECT stored_at FROM significance_cache ORDER BY stored_at DESC LIMIT 1 OFFSET ?
+                )
+            """, (self.max_entries - 1,))
+            if self.ttl_seconds is not None:
+                conn.execute("DELETE FROM significance_cache WHERE stored_at < ?", (time.time() - self.ttl_seconds,))
+            conn.commit()
+            conn.close()
+        except sqlite3.OperationalError:
+            # Another process holds the lock for too long; these results are cheap to recompute
+            pass
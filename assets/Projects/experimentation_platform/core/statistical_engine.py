@@ -1,44 +1,536 @@
 """Core statistical engine module.
 
-This file is a small starter module for statistical utilities used
-by the experimentation platform. Add functions and classes here as
-you build out analysis and modeling pipelines.
+Statistical utilities used by the experimentation platform:
+
+- `RunningStats` and `TDigest` are one-pass, mergeable accumulators.
+  They consume generators of numbers or NumPy chunks without holding
+  the data in memory, and partial results computed in different
+  processes or partitions can be merged.
+- `StatisticalEngine` wraps them in simple one-call helpers.
+- `ABTestCalculator` runs the A/B significance tests.
 """
 
-from typing import Iterable
+import math
+from typing import Iterable, List, Optional, Sequence
+
+
+class RunningStats:
+    """Streaming weighted moments, min and max.
+
+    Uses Welford-style updates generalised to the third and fourth
+    moments (Pébay, 2008), so mean, variance, skewness and kurtosis are
+    numerically stable in a single pass. Weights are frequency weights:
+    adding x with weight 3 is the same as adding x three times.
+    """
+
+    __slots__ = ('count', 'mean', 'm2', 'm3', 'm4', 'min', 'max')
+
+    def __init__(self):
+        self.count = 0.0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.m3 = 0.0
+        self.m4 = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def add(self, x: float, weight: float = 1.0) -> 'RunningStats':
+        """Add one value"""
+        if weight <= 0:
+            return self
+        n_a = self.count
+        n = n_a + weight
+        delta = x - self.mean
+        delta_n = delta / n
+        term = delta * delta_n * n_a * weight   # = delta^2 * n_a * w / n
+
+        self.mean += delta_n * weight
+        self.m4 += (term * delta_n * delta_n * (n_a * n_a - n_a * weight + weight * weight)
+                    + 6 * delta_n * delta_n * weight * weight * self.m2
+                    - 4 * delta_n * weight * self.m3)
+        self.m3 += term * delta_n * (n_a - weight) - 3 * delta_n * weight * self.m2
+        self.m2 += term
+        self.count = n
+        if x < self.min:
+            self.min = x
+        if x > self.max:
+            self.max = x
+        return self
+
+    def update(self, values: Iterable[float]) -> 'RunningStats':
+        """Add every value of an iterable (consumed lazily)"""
+        for x in values:
+            self.add(x)
+        return self
+
+    def update_array(self, values, weights=None) -> 'RunningStats':
+        """Add a NumPy chunk (or anything np.asarray accepts) in one vectorized step"""
+        import numpy as np
+
+        x = np.asarray(values, dtype=float).ravel()
+        if x.size == 0:
+            return self
+        if weights is None:
+            n = float(x.size)
+            mean = float(x.mean())
+            d = x - mean
+            d2 = d * d
+            chunk = RunningStats._from_moments(
+                n, mean, float(d2.sum()), float((d2 * d).sum()), float((d2 * d2).sum()),
+                float(x.min()), float(x.max())
+            )
+        else:
+            w = np.asarray(weights, dtype=float).ravel()
+            keep = w > 0
+            x, w = x[keep], w[keep]
+            if x.size == 0:
+                return self
+            n = float(w.sum())
+            mean = float((w * x).sum() / n)
+            d = x - mean
+            d2 = d * d
+            chunk = RunningStats._from_moments(
+                n, mean, float((w * d2).sum()), float((w * d2 * d).sum()), float((w * d2 * d2).sum()),
+                float(x.min()), float(x.max())
+            )
+        return self.merge(chunk)
+
+    def merge(self, other: 'RunningStats') -> 'RunningStats':
+        """Combine with stats computed over another partition (in place)"""
+        if other.count == 0:
+            return self
+        if self.count == 0:
+            for name in self.__slots__:
+                setattr(self, name, getattr(other, name))
+            return self
+
+        n_a, n_b = self.count, other.count
+        n = n_a + n_b
+        delta = other.mean - self.mean
+        delta2 = delta * delta
+
+        m4 = (self.m4 + other.m4
+              + delta2 * delta2 * n_a * n_b * (n_a * n_a - n_a * n_b + n_b * n_b) / (n ** 3)
+              + 6 * delta2 * (n_a * n_a * other.m2 + n_b * n_b * self.m2) / (n * n)
+              + 4 * delta * (n_a * other.m3 - n_b * self.m3) / n)
+        m3 = (self.m3 + other.m3
+              + delta2 * delta * n_a * n_b * (n_a - n_b) / (n * n)
+              + 3 * delta * (n_a * other.m2 - n_b * self.m2) / n)
+
+        self.m2 = self.m2 + other.m2 + delta2 * n_a * n_b / n
+        self.m3 = m3
+        self.m4 = m4
+        self.mean += delta * n_b / n
+        self.count = n
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        return self
+
+    @classmethod
+    def _from_moments(cls, count, mean, m2, m3, m4, min_, max_) -> 'RunningStats':
+        stats = cls()
+        stats.count, stats.mean, stats.m2, stats.m3, stats.m4 = count, mean, m2, m3, m4
+        stats.min, stats.max = min_, max_
+        return stats
+
+    @classmethod
+    def from_sums(cls, count: float, total: float, total_sq: float) -> 'RunningStats':
+        """
+        Accumulator from SQL-style aggregates COUNT(x), SUM(x), SUM(x * x)
+        
+        Only count, mean and variance are meaningful; higher moments and
+        min/max are unknown and left at their defaults.
+        """
+        stats = cls()
+        if count > 0:
+            stats.count = count
+            stats.mean = total / count
+            stats.m2 = max(total_sq - total * total / count, 0.0)
+        return stats
+
+    @property
+    def sum(self) -> float:
+        return self.mean * self.count
+
+    def variance(self, sample: bool = True) -> float:
+        """Sample (n - 1) or population (n) variance"""
+        denominator = self.count - 1 if sample else self.count
+        if denominator <= 0:
+            raise ValueError("not enough data for variance")
+        return self.m2 / denominator
+
+    def std(self, sample: bool = True) -> float:
+        return math.sqrt(self.variance(sample))
+
+    @property
+    def skewness(self) -> float:
+        if self.m2 == 0:
+            return 0.0
+        return math.sqrt(self.count) * self.m3 / self.m2 ** 1.5
+
+    @property
+    def kurtosis(self) -> float:
+        """Excess kurtosis (0 for a normal distribution)"""
+        if self.m2 == 0:
+            return 0.0
+        return self.count * self.m4 / (self.m2 * self.m2) - 3.0
+
+    def __getstate__(self):
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    def __setstate__(self, state):
+        for name, value in state.items():
+            setattr(self, name, value)
+
+    def __repr__(self):
+        return f"RunningStats(count={self.count:g}, mean={self.mean:.6g}, min={self.min:.6g}, max={self.max:.6g})"
+
+
+class TDigest:
+    """Mergeable quantile sketch (merging t-digest, k1 scale function).
+
+    Keeps at most roughly `compression` centroids, with more resolution
+    in the tails, so quantiles of an unbounded stream are estimated in
+    constant memory. Relative error is typically well below 1% for
+    compression=100.
+    """
+
+    def __init__(self, compression: float = 100):
+        self.compression = compression
+        self.means: List[float] = []
+        self.weights: List[float] = []
+        self.count = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+        self._buffer: List[tuple] = []
+        self._buffer_limit = int(5 * compression)
+
+    def add(self, x: float, weight: float = 1.0) -> 'TDigest':
+        """Add one value"""
+        self._buffer.append((x, weight))
+        self.count += weight
+        if x < self.min:
+            self.min = x
+        if x > self.max:
+            self.max = x
+        if len(self._buffer) >= self._buffer_limit:
+            self._flush()
+        return self
+
+    def update(self, values: Iterable[float]) -> 'TDigest':
+        """Add every value of an iterable (consumed lazily)"""
+        for x in values:
+            self.add(x)
+        return self
+
+    def update_array(self, values) -> 'TDigest':
+        """Add a NumPy chunk: sorted and pre-binned with NumPy, then merged"""
+        import numpy as np
+
+        x = np.sort(np.asarray(values, dtype=float).ravel())
+        if x.size == 0:
+            return self
+
+        # Bin the sorted chunk by the k1 scale, one centroid per unit of k
+        q = (np.arange(x.size) + 0.5) / x.size
+        k = np.floor(self.compression * (np.arcsin(2 * q - 1) / math.pi + 0.5)).astype(np.int64)
+        starts = np.flatnonzero(np.r_[True, k[1:] != k[:-1]])
+        weights = np.diff(np.r_[starts, x.size]).astype(float)
+        means = np.add.reduceat(x, starts) / weights
+
+        self._buffer.extend(zip(means.tolist(), weights.tolist()))
+        self.count += float(x.size)
+        self.min = min(self.min, float(x[0]))
+        self.max = max(self.max, float(x[-1]))
+        self._flush()
+        return self
+
+    def merge(self, other: 'TDigest') -> 'TDigest':
+        """Combine with a digest built over another partition (in place)"""
+        self._buffer.extend(zip(other.means, other.weights))
+        self._buffer.extend(other._buffer)
+        self.count += other.count
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        self._flush()
+        return self
+
+    def _q_to_k(self, q: float) -> float:
+        return self.compression * (math.asin(2 * q - 1) / math.pi + 0.5)
+
+    def _k_to_q(self, k: float) -> float:
+        if k >= self.compression:
+            return 1.0
+        return (math.sin(math.pi * (k / self.compression - 0.5)) + 1) / 2
+
+    def _flush(self):
+        """Merge buffered points into the centroids, respecting the size limit"""
+        if not self._buffer:
+            return
+        points = sorted(list(zip(self.means, self.weights)) + self._buffer)
+        self._buffer = []
+
+        total = sum(w for _, w in points)
+        means, weights = [], []
+        cur_mean, cur_weight = points[0]
+        so_far = 0.0
+        q_limit = self._k_to_q(self._q_to_k(0.0) + 1)
+
+        for mean, weight in points[1:]:
+            if (so_far + cur_weight + weight) / total <= q_limit:
+                cur_weight += weight
+                cur_mean += (mean - cur_mean) * weight / cur_weight
+            else:
+                means.append(cur_mean)
+                weights.append(cur_weight)
+                so_far += cur_weight
+                q_limit = self._k_to_q(self._q_to_k(so_far / total) + 1)
+                cur_mean, cur_weight = mean, weight
+
+        means.append(cur_mean)
+        weights.append(cur_weight)
+        self.means, self.weights = means, weights
+
+    def quantile(self, q: float) -> float:
+        """Estimate the q-th quantile (0 <= q <= 1)"""
+        self._flush()
+        if not self.means:
+            raise ValueError("data is empty")
+        if q <= 0:
+            return self.min
+        if q >= 1:
+            return self.max
+
+        target = q * self.count
+        cumulative = 0.0
+        prev_center, prev_mean = 0.0, self.min
+        for mean, weight in zip(self.means, self.weights):
+            center = cumulative + weight / 2
+            if target < center:
+                span = center - prev_center
+                frac = (target - prev_center) / span if span > 0 else 0.0
+                return prev_mean + frac * (mean - prev_mean)
+            prev_center, prev_mean = center, mean
+            cumulative += weight
+
+        span = self.count - prev_center
+        frac = (target - prev_center) / span if span > 0 else 1.0
+        return prev_mean + frac * (self.max - prev_mean)
+
+
+def _is_chunk(item) -> bool:
+    """True for NumPy arrays / sequences that should be added in bulk"""
+    return hasattr(item, '__len__') and not isinstance(item, (str, bytes))
 
 
 class StatisticalEngine:
     """Small helper class providing basic statistical utilities.
 
-    This is intentionally minimal — expand with additional methods
-    (variance, std, weighted metrics, robust statistics, etc.) as
-    you need them.
+    Every helper makes a single pass over `data`, which may be a list,
+    a generator of numbers, or a generator of NumPy chunks (e.g. the
+    batches of a large file), so nothing is materialized in memory.
     """
 
+    @staticmethod
+    def describe(data: Iterable, weights: Optional[Iterable[float]] = None) -> RunningStats:
+        """Return a RunningStats over `data` (scalars or NumPy chunks).
+
+        `weights`, if given, must yield one weight (or weight chunk) per
+        item of `data`.
+        """
+        stats = RunningStats()
+        if weights is None:
+            for item in data:
+                if _is_chunk(item):
+                    stats.update_array(item)
+                else:
+                    stats.add(item)
+        else:
+            for item, weight in zip(data, weights):
+                if _is_chunk(item):
+                    stats.update_array(item, weight)
+                else:
+                    stats.add(item, weight)
+        return stats
+
     @staticmethod
     def mean(data: Iterable[float]) -> float:
         """Return the arithmetic mean of `data`.
 
         Raises ValueError if `data` is empty.
         """
-        data_list = list(data)
-        if not data_list:
+        stats = StatisticalEngine.describe(data)
+        if stats.count == 0:
             raise ValueError("data is empty")
-        return sum(data_list) / len(data_list)
-import numpy as np
-from scipy import stats
-from typing import Dict, Tuple
+        return stats.mean
+
+    @staticmethod
+    def variance(data: Iterable[float], sample: bool = True) -> float:
+        """Return the sample (default) or population variance of `data`."""
+        return StatisticalEngine.describe(data).variance(sample)
+
+    @staticmethod
+    def std(data: Iterable[float], sample: bool = True) -> float:
+        """Return the sample (default) or population standard deviation of `data`."""
+        return StatisticalEngine.describe(data).std(sample)
+
+    @staticmethod
+    def quantiles(data: Iterable, qs: Sequence[float], compression: float = 100) -> List[float]:
+        """Estimate several quantiles of `data` in one pass with a t-digest."""
+        digest = TDigest(compression)
+        for item in data:
+            if _is_chunk(item):
+                digest.update_array(item)
+            else:
+                digest.add(item)
+        return [digest.quantile(q) for q in qs]
+
+from typing import TYPE_CHECKING, Dict, Tuple
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+    from core.significance_cache import SignificanceCache
+
+# The normal CDF/PPF below are pure Python so the checker scripts do not
+# pay for importing NumPy/SciPy on every run. They agree with
+# scipy.stats.norm to ~1e-15.
+_SQRT2 = math.sqrt(2.0)
+
+# Coefficients for Acklam's rational approximation of the inverse normal CDF
+_PPF_A = (-3.969683028665376e+01, 2.209460984245205e+02, -2.759285104469687e+02,
+          1.383577518672690e+02, -3.066479806614716e+01, 2.506628277459239e+00)
+_PPF_B = (-5.447609879822406e+01, 1.615858368580409e+02, -1.556989798598866e+02,
+          6.680131188771972e+01, -1.328068155288572e+01)
+_PPF_C = (-7.784894002430293e-03, -3.223964580411365e-01, -2.400758277161838e+00,
+          -2.549732539343734e+00, 4.374664141464968e+00, 2.938163982698783e+00)
+_PPF_D = (7.784695709041462e-03, 3.224671290700398e-01, 2.445134137142996e+00,
+          3.754408661907416e+00)
+_PPF_LOW = 0.02425
+
+
+def norm_cdf(x: float) -> float:
+    """Standard normal cumulative distribution function"""
+    return 0.5 * math.erfc(-x / _SQRT2)
+
+
+def norm_ppf(q: float) -> float:
+    """Inverse of norm_cdf (percent point function)"""
+    if not 0.0 < q < 1.0:
+        if q == 0.0:
+            return -math.inf
+        if q == 1.0:
+            return math.inf
+        raise ValueError("q must be between 0 and 1")
+
+    # Work in the lower half, where the CDF can be evaluated precisely
+    if q > 0.5:
+        return -norm_ppf(1.0 - q)
+
+    if q < _PPF_LOW:
+        r = math.sqrt(-2 * math.log(q))
+        x = (((((_PPF_C[0]*r + _PPF_C[1])*r + _PPF_C[2])*r + _PPF_C[3])*r + _PPF_C[4])*r + _PPF_C[5]) / \
+            ((((_PPF_D[0]*r + _PPF_D[1])*r + _PPF_D[2])*r + _PPF_D[3])*r + 1)
+    else:
+        r = q - 0.5
+        t = r * r
+        x = (((((_PPF_A[0]*t + _PPF_A[1])*t + _PPF_A[2])*t + _PPF_A[3])*t + _PPF_A[4])*t + _PPF_A[5])*r / \
+            (((((_PPF_B[0]*t + _PPF_B[1])*t + _PPF_B[2])*t + _PPF_B[3])*t + _PPF_B[4])*t + 1)
+
+    # One Halley step brings the approximation to full double precision
+    e = norm_cdf(x) - q
+    u = e * math.sqrt(2 * math.pi) * math.exp(x * x / 2)
+    return x - u / (1 + x * u / 2)
+
+
+def norm_sf(x: float) -> float:
+    """Standard normal survival function, 1 - norm_cdf(x) without cancellation"""
+    return 0.5 * math.erfc(x / _SQRT2)
+
+
+def two_proportion_test(
+    control_conv: int,
+    control_imp: int,
+    variant_conv: int,
+    variant_imp: int
+) -> Tuple[float, float]:
+    """
+    Pooled two-proportion z-test on scalars.
+
+    The two-tailed p-value is erfc(|z| / sqrt(2)), which stays accurate
+    far into the tail where 2 * (1 - cdf) rounds to 0. Degenerate inputs
+    (no impressions on either side, or a pooled rate of 0 or 1) return
+    (0.0, 1.0) instead of dividing by zero.
+
+    Returns:
+        (z_score, p_value)
+    """
+    if control_imp <= 0 or variant_imp <= 0:
+        return 0.0, 1.0
+
+    p_pool = (control_conv + variant_conv) / (control_imp + variant_imp)
+    variance = p_pool * (1 - p_pool) * (1 / control_imp + 1 / variant_imp)
+    if variance <= 0:
+        return 0.0, 1.0
+
+    z_score = (variant_conv / variant_imp - control_conv / control_imp) / math.sqrt(variance)
+    return z_score, math.erfc(abs(z_score) / _SQRT2)
+
+
+class SignificanceResult:
+    """
+    Result of ABTestCalculator.evaluate().
+
+    Uses __slots__ so creating one per comparison is cheap. Supports
+    result['p_value'] style access so code written against the dict
+    returned by is_significant() keeps working.
+    """
+
+    __slots__ = (
+        'is_significant', 'p_value', 'confidence', 'z_score', 'control_rate',
+        'variant_rate', 'absolute_lift', 'relative_lift', 'winner'
+    )
+
+    def __init__(self, is_significant, p_value, confidence, z_score, control_rate,
+                 variant_rate, absolute_lift, relative_lift, winner):
+        self.is_significant = is_significant
+        self.p_value = p_value
+        self.confidence = confidence
+        self.z_score = z_score
+        self.control_rate = control_rate
+        self.variant_rate = variant_rate
+        self.absolute_lift = absolute_lift
+        self.relative_lift = relative_lift
+        self.winner = winner
+
+    def __getitem__(self, key: str):
+        try:
+            return getattr(self, key)
+        except AttributeError:
+            raise KeyError(key) from None
+
+    def keys(self):
+        return self.__slots__
+
+    def to_dict(self) -> Dict:
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    def __repr__(self):
+        return f"SignificanceResult(winner={self.winner!r}, p_value={self.p_value:.4g}, relative_lift={self.relative_lift:.2f})"
+
 
 class ABTestCalculator:
     """Statistical calculations for A/B tests"""
     
-    def __init__(self, alpha: float = 0.20):
+    def __init__(self, alpha: float = 0.20, cache: Optional['SignificanceCache'] = None):
         """
         Args:
             alpha: Significance level (default 0.20 for 80% confidence - lowered for faster demo results)
+            cache: Optional core.significance_cache.SignificanceCache shared
+                by the scalar tests (evaluate, is_significant, calculate_z_score)
         """
         self.alpha = alpha
+        self.cache = cache
     
     def calculate_conversion_rate(self, conversions: int, impressions: int) -> float:
         """Calculate conversion rate with safety check"""
@@ -59,26 +551,55 @@ class ABTestCalculator:
         Returns:
             (z_score, p_value)
         """
-        # Conversion rates
-        p1 = control_conv / control_imp if control_imp > 0 else 0
-        p2 = variant_conv / variant_imp if variant_imp > 0 else 0
-        
-        # Pooled probability
-        p_pool = (control_conv + variant_conv) / (control_imp + variant_imp)
+        if self.cache is None:
+            return two_proportion_test(control_conv, control_imp, variant_conv, variant_imp)
         
-        # Standard error
-        se = np.sqrt(p_pool * (1 - p_pool) * (1/control_imp + 1/variant_imp))
+        key = (control_conv, control_imp, variant_conv, variant_imp)
+        cached = self.cache.get(key)
+        if cached is not None:
+            return cached
+        z_score, p_value = two_proportion_test(control_conv, control_imp, variant_conv, variant_imp)
+        self.cache.put(key, z_score, p_value)
+        return z_score, p_value
+    
+    def evaluate(
+        self,
+        control_conv: int,
+        control_imp: int,
+        variant_conv: int,
+        variant_imp: int
+    ) -> SignificanceResult:
+        """
+        Fast scalar significance test
         
-        if se == 0:
-            return 0.0, 1.0
+        Same numbers as is_significant() but returns a SignificanceResult
+        and avoids building a dict. Use this in loops.
+        """
+        z_score, p_value = self.calculate_z_score(control_conv, control_imp, variant_conv, variant_imp)
         
-        # Z-score
-        z_score = (p2 - p1) / se
+        control_rate = control_conv / control_imp if control_imp > 0 else 0.0
+        variant_rate = variant_conv / variant_imp if variant_imp > 0 else 0.0
+        lift = variant_rate - control_rate
+        significant = p_value < self.alpha
         
-        # Two-tailed p-value
-        p_value = 2 * (1 - stats.norm.cdf(abs(z_score)))
+        if significant and lift > 0:
+            winner = 'variant'
+        elif significant and lift < 0:
+            winner = 'control'
+        else:
+            winner = 'inconclusive'
         
-        return z_score, p_value
+        return SignificanceResult(
+            significant,
+            p_value,
+            (1 - p_value) * 100,
+            z_score,
+            control_rate * 100,
+            variant_rate * 100,
+            lift * 100,
+            (lift / control_rate * 100) if control_rate > 0 else 0,
+            winner
+        )
     
     def is_significant(
         self, 
@@ -93,18 +614,89 @@ class ABTestCalculator:
         Returns:
             Dictionary with test results
         """
-        z_score, p_value = self.calculate_z_score(
-            control_conv, control_imp, variant_conv, variant_imp
-        )
+        return self.evaluate(control_conv, control_imp, variant_conv, variant_imp).to_dict()
+    
+    def revenue_test(self, control: RunningStats, variant: RunningStats) -> Dict:
+        """
+        Welch's t-test on per-user values (e.g. revenue) from two accumulators
+        
+        The accumulators can be built from streams or merged across
+        partitions, so the raw values never need to be in memory.
+        
+        Returns:
+            Dictionary with means, lift, t statistic, df, p-value and winner
+        """
+        if control.count < 2 or variant.count < 2:
+            raise ValueError("need at least two values per group")
+        
+        se2_c = control.variance() / control.count
+        se2_v = variant.variance() / variant.count
+        diff = variant.mean - control.mean
+        se = math.sqrt(se2_c + se2_v)
+        
+        if se == 0:
+            t_stat, df, p_value = 0.0, control.count + variant.count - 2, 1.0
+        else:
+            t_stat = diff / se
+            # Welch-Satterthwaite degrees of freedom
+            df = (se2_c + se2_v) ** 2 / (se2_c ** 2 / (control.count - 1) + se2_v ** 2 / (variant.count - 1))
+            if df > 10_000:
+                # Student's t is indistinguishable from normal here; skip SciPy
+                p_value = math.erfc(abs(t_stat) / _SQRT2)
+            else:
+                from scipy.stats import t as student_t
+                p_value = float(2 * student_t.sf(abs(t_stat), df))
+        
+        significant = p_value < self.alpha
+        return {
+            'is_significant': significant,
+            'p_value': p_value,
+            'confidence': (1 - p_value) * 100,
+            't_stat': t_stat,
+            'df': df,
+            'control_mean': control.mean,
+            'variant_mean': variant.mean,
+            'absolute_lift': diff,
+            'relative_lift': (diff / control.mean * 100) if control.mean else 0,
+            'winner': 'variant' if (significant and diff > 0) else 'control' if (significant and diff < 0) else 'inconclusive'
+        }
+    
+    def is_significant_batch(self, control_conv, control_imp, variant_conv, variant_imp) -> Dict:
+        """
+        Vectorized is_significant() over equal-length arrays
+        
+        Same rules and edge cases as two_proportion_test(), evaluated for
+        every element at once with NumPy.
+        
+        Returns:
+            Dictionary of NumPy arrays with the same keys as is_significant()
+        """
+        import numpy as np
+        from scipy.special import erfc
         
-        control_rate = self.calculate_conversion_rate(control_conv, control_imp)
-        variant_rate = self.calculate_conversion_rate(variant_conv, variant_imp)
+        cc = np.asarray(control_conv, dtype=float)
+        ci = np.asarray(control_imp, dtype=float)
+        vc = np.asarray(variant_conv, dtype=float)
+        vi = np.asarray(variant_imp, dtype=float)
         
+        with np.errstate(divide='ignore', invalid='ignore'):
+            valid = (ci > 0) & (vi > 0)
+            control_rate = np.where(ci > 0, cc / ci, 0.0)
+            variant_rate = np.where(vi > 0, vc / vi, 0.0)
+            p_pool = (cc + vc) / (ci + vi)
+            variance = p_pool * (1 - p_pool) * (1 / ci + 1 / vi)
+            valid &= variance > 0
+            z_score = np.where(valid, (variant_rate - control_rate) / np.sqrt(variance), 0.0)
+            relative_lift = np.where(control_rate > 0, (variant_rate - control_rate) / control_rate * 100, 0.0)
+        
+        p_value = np.where(valid, erfc(np.abs(z_score) / _SQRT2), 1.0)
         lift = variant_rate - control_rate
-        relative_lift = (lift / control_rate * 100) if control_rate > 0 else 0
+        significant = p_value < self.alpha
+        winner = np.where(significant & (lift > 0), 'variant',
+                          np.where(significant & (lift < 0), 'control', 'inconclusive'))
         
         return {
-            'is_significant': p_value < self.alpha,
+            'is_significant': significant,
             'p_value': p_value,
             'confidence': (1 - p_value) * 100,
             'z_score': z_score,
@@ -112,9 +704,47 @@ class ABTestCalculator:
             'variant_rate': variant_rate * 100,
             'absolute_lift': lift * 100,
             'relative_lift': relative_lift,
-            'winner': 'variant' if (p_value < self.alpha and lift > 0) else 'control' if (p_value < self.alpha and lift < 0) else 'inconclusive'
+            'winner': winner
         }
     
+    def evaluate_segments(self, cube: 'pd.DataFrame', control_name: str = 'control') -> 'pd.DataFrame':
+        """
+        Compare every non-control variant with control in every segment
+        
+        Args:
+            cube: Output of ExperimentDataManager.get_segment_cube()
+            control_name: Variant treated as the baseline
+        
+        Returns:
+            One row per segment x variant with the segment columns,
+            variant_name, the four counts and the is_significant() fields
+        """
+        import pandas as pd
+        
+        dims = [c for c in cube.columns
+                if c not in ('variant_name', 'total_impressions', 'total_conversions', 'total_revenue')]
+        control = cube[cube['variant_name'] == control_name]
+        variants = cube[cube['variant_name'] != control_name]
+        
+        pairs = variants.merge(
+            control[dims + ['total_impressions', 'total_conversions']],
+            on=dims, how='left', suffixes=('', '_control')
+        ).fillna({'total_impressions_control': 0, 'total_conversions_control': 0})
+        
+        results = self.is_significant_batch(
+            pairs['total_conversions_control'].to_numpy(),
+            pairs['total_impressions_control'].to_numpy(),
+            pairs['total_conversions'].to_numpy(),
+            pairs['total_impressions'].to_numpy()
+        )
+        
+        out = pairs[dims + ['variant_name']].copy()
+        out['control_impressions'] = pairs['total_impressions_control'].astype('int64')
+        out['control_conversions'] = pairs['total_conversions_control'].astype('int64')
+        out['variant_impressions'] = pairs['total_impressions'].astype('int64')
+        out['variant_conversions'] = pairs['total_conversions'].astype('int64')
+        return pd.concat([out.reset_index(drop=True), pd.DataFrame(results)], axis=1)
+    
     def calculate_sample_size(
         self,
         baseline_rate: float,
@@ -125,8 +755,8 @@ class ABTestCalculator:
         """Calculate required sample size per variant"""
         effect_size = minimum_detectable_effect / baseline_rate
         
-        z_alpha = stats.norm.ppf(1 - alpha/2)
-        z_beta = stats.norm.ppf(power)
+        z_alpha = norm_ppf(1 - alpha/2)
+        z_beta = norm_ppf(power)
         
         p1 = baseline_rate
         p2 = baseline_rate * (1 + effect_size)
@@ -134,7 +764,7 @@ class ABTestCalculator:
         
         n = (2 * (z_alpha + z_beta)**2 * p_avg * (1 - p_avg)) / (p2 - p1)**2
         
-        return int(np.ceil(n))
+        return int(math.ceil(n))
     
     def estimate_time_to_significance(
         self,
@@ -153,7 +783,7 @@ class ABTestCalculator:
         )
         
         total_sample = required_sample * 2
-        days = int(np.ceil(total_sample / daily_traffic))
+        days = int(math.ceil(total_sample / daily_traffic))
         
         return days
 
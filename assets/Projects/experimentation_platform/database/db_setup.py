@@ -1,18 +1,48 @@
 import sqlite3
 import os
+from itertools import combinations
 
 # Path to database
 DB_PATH = os.path.join('data', 'experiments.db')
 
-def init_database():
-    """Initialize database with schema"""
-    
-    # Create connection
-    conn = sqlite3.connect(DB_PATH)
+# Segment dimensions stored on every metrics row (NULL when unknown)
+DIMENSIONS = ('platform', 'country', 'user_type')
+
+# Sums of squares and cross products of a variant's daily totals over a
+# rolled-up period (rollup column -> the two metric columns multiplied),
+# so per-day variances for metric evaluation survive retention
+DAY_MOMENT_COLUMNS = ('impressions', 'conversions', 'revenue', 'unique_users')
+DAY_MOMENTS = {f'day_sumsq_{c}': (c, c) for c in DAY_MOMENT_COLUMNS}
+DAY_MOMENTS.update({f'day_sum_{a}_x_{b}': (a, b) for a, b in combinations(DAY_MOMENT_COLUMNS, 2)})
+
+
+def _add_missing_columns(cursor, table: str, columns: dict):
+    """ALTER TABLE ... ADD COLUMN for each column the table does not have yet"""
+    existing = {row[1] for row in cursor.execute(f"PRAGMA table_info({table})")}
+    for name, decl in columns.items():
+        if name not in existing:
+            cursor.execute(f"ALTER TABLE {table} ADD COLUMN {name} {decl}")
+
+
+def create_schema(conn: sqlite3.Connection):
+    """Create all tables on an open connection (safe to run repeatedly)"""
+    create_catalog_schema(conn)
+    create_metrics_schema(conn)
+
+
+def create_catalog_schema(conn: sqlite3.Connection):
+    """
+    Experiment definitions and computed results: experiments, variants,
+    metric definitions, snapshots and metric snapshots (the catalog in
+    sharded mode)
+    """
     cursor = conn.cursor()
-    
-    print("📊 Creating database tables...")
-    
+
+    # Lets retention hand freed pages back to the OS with incremental_vacuum.
+    # Only takes effect on a brand-new file; core/retention.py converts
+    # older databases with a one-off VACUUM.
+    cursor.execute("PRAGMA auto_vacuum = INCREMENTAL")
+
     # Create experiments table
     cursor.execute("""
         CREATE TABLE IF NOT EXISTS experiments (
@@ -28,6 +58,10 @@ def init_database():
         )
     """)
     
+    # 'fixed' keeps the configured split; 'thompson' and 'ucb' let
+    # core/bandit.py move traffic towards the better variants
+    _add_missing_columns(cursor, 'experiments', {'allocation_mode': "TEXT NOT NULL DEFAULT 'fixed'"})
+    
     # Create variants table
     cursor.execute("""
         CREATE TABLE IF NOT EXISTS variants (
@@ -40,6 +74,97 @@ def init_database():
         )
     """)
     
+    # Metrics evaluated per experiment: one primary metric plus optional
+    # secondary and guardrail metrics (see core/metric_evaluation.py)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS experiment_metric_definitions (
+            definition_id INTEGER PRIMARY KEY AUTOINCREMENT,
+            experiment_id INTEGER NOT NULL,
+            metric_name TEXT NOT NULL,
+            metric_type TEXT NOT NULL,
+            numerator TEXT NOT NULL,
+            denominator TEXT,
+            role TEXT NOT NULL DEFAULT 'primary',
+            direction TEXT NOT NULL DEFAULT 'increase',
+            threshold REAL DEFAULT 0.00,
+            UNIQUE (experiment_id, metric_name),
+            FOREIGN KEY (experiment_id) REFERENCES experiments(experiment_id)
+        )
+    """)
+    
+    # Every traffic split written by a bandit allocation cycle
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS allocation_history (
+            history_id INTEGER PRIMARY KEY AUTOINCREMENT,
+            experiment_id INTEGER NOT NULL,
+            variant_id INTEGER NOT NULL,
+            computed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            method TEXT NOT NULL,
+            traffic_allocation REAL NOT NULL,
+            impressions INTEGER,
+            conversions INTEGER,
+            FOREIGN KEY (experiment_id) REFERENCES experiments(experiment_id),
+            FOREIGN KEY (variant_id) REFERENCES variants(variant_id)
+        )
+    """)
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_allocation_history_experiment
+        ON allocation_history (experiment_id, history_id)
+    """)
+    
+    # Latest computed statistics per experiment, stored as raw numbers
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS experiment_snapshots (
+            experiment_id INTEGER PRIMARY KEY,
+            data_version INTEGER NOT NULL,
+            alpha REAL NOT NULL,
+            computed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            control_name TEXT,
+            variant_name TEXT,
+            control_impressions INTEGER,
+            control_conversions INTEGER,
+            control_revenue REAL,
+            variant_impressions INTEGER,
+            variant_conversions INTEGER,
+            variant_revenue REAL,
+            days_running INTEGER,
+            is_significant INTEGER,
+            p_value REAL,
+            confidence REAL,
+            z_score REAL,
+            control_rate REAL,
+            variant_rate REAL,
+            absolute_lift REAL,
+            relative_lift REAL,
+            winner TEXT,
+            FOREIGN KEY (experiment_id) REFERENCES experiments(experiment_id)
+        )
+    """)
+    
+    # Latest metric evaluation per experiment (core/metric_evaluation.py),
+    # the MetricResults stored as a JSON list
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS metric_snapshots (
+            experiment_id INTEGER PRIMARY KEY,
+            data_version INTEGER NOT NULL,
+            alpha REAL NOT NULL,
+            computed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            results TEXT NOT NULL,
+            FOREIGN KEY (experiment_id) REFERENCES experiments(experiment_id)
+        )
+    """)
+    
+    conn.commit()
+
+
+def create_metrics_schema(conn: sqlite3.Connection):
+    """
+    Metric rows and their data versions (one per shard in sharded mode,
+    see core/sharded_data_manager.py)
+    """
+    cursor = conn.cursor()
+    cursor.execute("PRAGMA auto_vacuum = INCREMENTAL")
+    
     # Create experiment metrics table
     cursor.execute("""
         CREATE TABLE IF NOT EXISTS experiment_metrics (
@@ -56,12 +181,133 @@ def init_database():
         )
     """)
     
-    # Commit and close
+    # Dimensions are always added with ALTER TABLE, so databases created
+    # before and after segments were introduced end up with the same columns
+    _add_missing_columns(cursor, 'experiment_metrics', {d: 'TEXT' for d in DIMENSIONS})
+    
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_metrics_variant ON experiment_metrics (variant_id)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_metrics_experiment ON experiment_metrics (experiment_id)")
+    
+    # Weekly/monthly aggregates of daily rows for completed experiments
+    # (written by core/retention.py). days_covered keeps days_running exact.
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS experiment_metrics_rollup (
+            rollup_id INTEGER PRIMARY KEY AUTOINCREMENT,
+            experiment_id INTEGER,
+            variant_id INTEGER,
+            granularity TEXT NOT NULL,
+            period_start DATE NOT NULL,
+            impressions INTEGER DEFAULT 0,
+            conversions INTEGER DEFAULT 0,
+            revenue REAL DEFAULT 0.00,
+            unique_users INTEGER DEFAULT 0,
+            days_covered INTEGER DEFAULT 0,
+            FOREIGN KEY (experiment_id) REFERENCES experiments(experiment_id),
+            FOREIGN KEY (variant_id) REFERENCES variants(variant_id)
+        )
+    """)
+    _add_missing_columns(cursor, 'experiment_metrics_rollup', {d: 'TEXT' for d in DIMENSIONS})
+    # Set on the same row as days_covered; NULL in rollups made before they existed
+    _add_missing_columns(cursor, 'experiment_metrics_rollup', {name: 'REAL' for name in DAY_MOMENTS})
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_rollup_variant ON experiment_metrics_rollup (variant_id)")
+    
+    # Per-experiment data version, bumped by triggers whenever metrics change.
+    # Cached results (snapshots) remember the version they were computed at.
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS experiment_versions (
+            experiment_id INTEGER PRIMARY KEY,
+            data_version INTEGER NOT NULL DEFAULT 0
+        )
+    """)
+    
+    _create_variant_totals(cursor)
+    
+    for event, row in (('INSERT', 'NEW'), ('UPDATE', 'NEW'), ('DELETE', 'OLD')):
+        cursor.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS trg_metrics_version_{event.lower()}
+            AFTER {event} ON experiment_metrics
+            BEGIN
+                INSERT INTO experiment_versions (experiment_id, data_version)
+                VALUES ({row}.experiment_id, 1)
+                ON CONFLICT(experiment_id) DO UPDATE SET data_version = data_version + 1;
+            END
+        """)
+    
     conn.commit()
+
+
+def _create_variant_totals(cursor: sqlite3.Cursor):
+    """
+    Running per-variant totals of raw and rolled-up metric rows, kept by
+    triggers so SRM checks and allocation read a few rows instead of
+    scanning experiment_metrics (filled from existing rows when created)
+    """
+    exists = cursor.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'variant_totals'"
+    ).fetchone()
+    if exists:
+        return
+    
+    cursor.execute("""
+        CREATE TABLE variant_totals (
+            experiment_id INTEGER NOT NULL,
+            variant_id INTEGER PRIMARY KEY,
+            impressions INTEGER NOT NULL DEFAULT 0,
+            conversions INTEGER NOT NULL DEFAULT 0,
+            revenue REAL NOT NULL DEFAULT 0.0
+        )
+    """)
+    cursor.execute("CREATE INDEX idx_variant_totals_experiment ON variant_totals (experiment_id)")
+    cursor.execute("""
+        INSERT INTO variant_totals (experiment_id, variant_id, impressions, conversions, revenue)
+        SELECT experiment_id, variant_id, SUM(impressions), SUM(conversions), SUM(revenue)
+        FROM (
+            SELECT experiment_id, variant_id, impressions, conversions, revenue FROM experiment_metrics
+            UNION ALL
+            SELECT experiment_id, variant_id, impressions, conversions, revenue FROM experiment_metrics_rollup
+        )
+        GROUP BY variant_id
+    """)
+    
+    add = """
+        INSERT INTO variant_totals (experiment_id, variant_id, impressions, conversions, revenue)
+        VALUES (NEW.experiment_id, NEW.variant_id, COALESCE(NEW.impressions, 0),
+                COALESCE(NEW.conversions, 0), COALESCE(NEW.revenue, 0))
+        ON CONFLICT(variant_id) DO UPDATE SET
+            impressions = impressions + excluded.impressions,
+            conversions = conversions + excluded.conversions,
+            revenue = revenue + excluded.revenue;
+    """
+    remove = """
+        UPDATE variant_totals SET
+            impressions = impressions - COALESCE(OLD.impressions, 0),
+            conversions = conversions - COALESCE(OLD.conversions, 0),
+            revenue = revenue - COALESCE(OLD.revenue, 0)
+        WHERE variant_id = OLD.variant_id;
+    """
+    for table, name in (('experiment_metrics', 'metrics'), ('experiment_metrics_rollup', 'rollup')):
+        cursor.execute(f"CREATE TRIGGER trg_{name}_totals_insert AFTER INSERT ON {table} BEGIN {add} END")
+        cursor.execute(f"CREATE TRIGGER trg_{name}_totals_delete AFTER DELETE ON {table} BEGIN {remove} END")
+        cursor.execute(f"""
+            CREATE TRIGGER trg_{name}_totals_update
+            AFTER UPDATE OF variant_id, impressions, conversions, revenue ON {table}
+            BEGIN {remove} {add} END
+        """)
+
+
+def init_database(db_path: str = DB_PATH):
+    """Initialize database with schema"""
+    
+    # Create connection
+    conn = sqlite3.connect(db_path)
+    
+    print("📊 Creating database tables...")
+    
+    create_schema(conn)
     conn.close()
     
     print("✅ Database created successfully!")
-    print(f"📁 Location: {os.path.abspath(DB_PATH)}")
+    print(f"📁 Location: {os.path.abspath(db_path)}")
 
 if __name__ == "__main__":
-    init_database()
\ No newline at end of file
+    init_database()
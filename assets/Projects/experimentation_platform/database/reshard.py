@@ -0,0 +1,135 @@
+"""
+Reshard the experiments database.
+
+Copies experiments into a sharded layout (see core/sharded_data_manager.py)
+with a new shard count. The source can be the single-file database or an
+existing sharded layout; experiments, variants, metric definitions,
+snapshots and bandit allocation history go to the new catalog, and each
+experiment's metric rows, rollups and data version go to shard
+experiment_id % shards. Data versions are copied as-is, so stored
+snapshots stay valid.
+
+The new layout is built next to the output directory and swapped in at
+the end; an existing output directory is kept as <out>.old.
+
+Usage (from the project root, with nothing writing to the database):
+    python -m database.reshard --shards 4
+    python -m database.reshard --source data/shards --shards 8
+"""
+
+import argparse
+import os
+import shutil
+import sqlite3
+import time
+
+from core.data_manager import ExperimentDataManager
+from core.sharded_data_manager import SHARD_DIR, ShardedExperimentDataManager, has_shard_layout
+from database.db_setup import DB_PATH
+
+CATALOG_TABLES = ('experiments', 'variants', 'experiment_metric_definitions', 'experiment_snapshots',
+                  'metric_snapshots', 'allocation_history')
+# Row ids of these tables are only unique within one file and are reassigned
+METRICS_TABLES = ('experiment_metrics', 'experiment_metrics_rollup')
+
+
+def _columns(conn: sqlite3.Connection, schema: str, table: str, skip_id: bool = False) -> str:
+    rows = conn.execute(f"PRAGMA {schema}.table_info({table})").fetchall()
+    return ', '.join(row[1] for row in rows if not (skip_id and row[5]))
+
+
+def open_source(source: str) -> ExperimentDataManager:
+    """Data manager for a single-file database or a sharded layout directory"""
+    if os.path.isdir(source):
+        return ShardedExperimentDataManager(source)
+    if not os.path.exists(source):
+        raise ValueError(f"Source database not found: {source}")
+    return ExperimentDataManager(source)
+
+
+def reshard(source: ExperimentDataManager, out_dir: str, shards: int) -> dict:
+    """
+    Copy everything from `source` into a new layout with `shards` shards
+
+    Returns:
+        {'experiments': n, 'metric_rows': n, 'shards': n}
+    """
+    old_dir = out_dir.rstrip('/\\') + '.old'
+    if os.path.exists(out_dir) and os.path.exists(old_dir):
+        raise ValueError(f"{old_dir} already exists; remove it first")
+
+    tmp_dir = out_dir.rstrip('/\\') + '.tmp'
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    # Migrates an older source first: ATTACH does not run the schema
+    # upgrade, and the copy below expects every current table and column
+    source.get_connection().close()
+
+    try:
+        target = ShardedExperimentDataManager(tmp_dir, shards)
+        conn = target.get_connection()
+        try:
+            conn.execute("ATTACH DATABASE ? AS src", (source.db_path,))
+            for table in CATALOG_TABLES:
+                columns = _columns(conn, 'main', table)
+                conn.execute(f"INSERT INTO main.{table} ({columns}) SELECT {columns} FROM src.{table}")
+            experiments = conn.execute("SELECT COUNT(*) FROM main.experiments").fetchone()[0]
+            conn.commit()
+        finally:
+            conn.close()
+
+        metric_rows = 0
+        for src in source.get_metrics_connections():
+            try:
+                for shard, path in enumerate(target.shard_paths):
+                    src.execute("ATTACH DATABASE ? AS dst", (path,))
+                    where = f"WHERE experiment_id % {shards} = {shard}"
+                    for table in METRICS_TABLES:
+                        columns = _columns(src, 'dst', table, skip_id=True)
+                        cursor = src.execute(f"INSERT INTO dst.{table} ({columns}) SELECT {columns} FROM main.{table} {where}")
+                        if table == 'experiment_metrics':
+                            metric_rows += cursor.rowcount
+                    # The insert triggers bumped the versions; restore the source's
+                    src.execute(f"""
+                        INSERT OR REPLACE INTO dst.experiment_versions (experiment_id, data_version)
+                        SELECT experiment_id, data_version FROM main.experiment_versions {where}
+                    """)
+                    src.commit()
+                    src.execute("DETACH DATABASE dst")
+            finally:
+                src.close()
+
+        if os.path.exists(out_dir):
+            os.replace(out_dir, old_dir)
+        os.replace(tmp_dir, out_dir)
+    finally:
+        # Only left behind when the copy failed; the output is untouched then
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+    return {'experiments': experiments, 'metric_rows': metric_rows, 'shards': shards}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Copy the experiments database into a sharded layout")
+    parser.add_argument('--shards', type=int, required=True, help="Number of shard files")
+    parser.add_argument('--source', help=f"Database file or shard directory (default: {SHARD_DIR} if it exists, else {DB_PATH})")
+    parser.add_argument('--out', default=SHARD_DIR, help="Directory for the new layout")
+    args = parser.parse_args()
+
+    if args.shards < 1:
+        parser.error("--shards must be at least 1")
+    source_path = args.source or (SHARD_DIR if has_shard_layout(SHARD_DIR) else DB_PATH)
+
+    print(f"🔀 Resharding {source_path} into {args.shards} shard(s) at {args.out}...")
+    started = time.perf_counter()
+    summary = reshard(open_source(source_path), args.out, args.shards)
+    elapsed = time.perf_counter() - started
+
+    print(f"✅ {summary['experiments']} experiments, {summary['metric_rows']:,} metric rows "
+          f"in {elapsed:.1f}s")
+    old_dir = args.out.rstrip('/\\') + '.old'
+    if os.path.exists(old_dir):
+        print(f"📁 Previous layout kept in {old_dir}")
+
+
+if __name__ == "__main__":
+    main()
@@ -9,7 +9,12 @@ from email.mime.multipart import MIMEMultipart
 from datetime import datetime
 import os
 
-from core.data_manager import ExperimentDataManager
+from core.data_manager import open_data_manager
+from core.data_quality import srm_alerts
+from core.experiment_summary import get_current_summaries
+from core.metric_evaluation import get_current_metric_results
+from core.reports import build_sections, render_report
+from core.significance_cache import SignificanceCache
 from core.statistical_engine import ABTestCalculator
 
 
@@ -45,45 +50,49 @@ def send_email(subject: str, body_html: str):
         return False
 
 
-def check_and_notify():
-    """Check experiments and send notifications for significant results"""
-    dm = ExperimentDataManager()
-    calc = ABTestCalculator()
+def check_and_notify(dm=None, calc=None):
+    """
+    Check experiments and send notifications for significant results
+    
+    Args:
+        dm, calc: Reused across runs by run_scheduler.py (keeps the
+            significance cache warm); opened fresh when omitted
+    """
+    dm = open_data_manager() if dm is None else dm
+    # In-memory only: stored snapshots already skip unchanged experiments,
+    # and loading the shared cache file costs more than it saves per run
+    calc = ABTestCalculator(cache=SignificanceCache()) if calc is None else calc
     
     print(f"\n🔍 Checking experiments at {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
     
-    active_exps = dm.get_active_experiments()
+    # Plain tuples instead of DataFrames keeps pandas out of this script
+    active_exps = dm.get_active_experiment_rows()
     
     if len(active_exps) == 0:
         print("No active experiments found.")
         return
     
-    notifications = []
+    # Reads the snapshots written by check_results.py; only experiments
+    # with new data since the last check are recomputed here
+    summaries = get_current_summaries(dm, calc, [exp.experiment_id for exp in active_exps])
+    metric_results = get_current_metric_results(dm, calc, [exp.experiment_id for exp in active_exps])
+    
+    if calc.cache is not None:
+        cache = calc.cache.stats()
+        print(f"♻️  Significance cache: {cache['hits']} hits, {cache['misses']} misses")
+    
+    # Traffic split check from the trigger-maintained totals (no metric scan)
+    mismatches = srm_alerts(dm, [exp.experiment_id for exp in active_exps])
     
-    for idx, exp in active_exps.iterrows():
-        results_df = dm.get_experiment_results(exp['experiment_id'])
-        
-        if len(results_df) >= 2 and results_df['total_impressions'].sum() > 0:
-            control = results_df[results_df['variant_name'] == 'control'].iloc[0]
-            variant = results_df[results_df['variant_name'] != 'control'].iloc[0]
-            
-            if control['total_impressions'] > 0 and variant['total_impressions'] > 0:
-                stats = calc.is_significant(
-                    control_conv=int(control['total_conversions']),
-                    control_imp=int(control['total_impressions']),
-                    variant_conv=int(variant['total_conversions']),
-                    variant_imp=int(variant['total_impressions'])
-                )
-                
-                if stats['is_significant']:
-                    notifications.append({
-                        'experiment': exp['experiment_name'],
-                        'exp_id': exp['experiment_id'],
-                        'stats': stats,
-                        'control': control,
-                        'variant': variant
-                    })
-                    print(f"📊 {exp['experiment_name']}: Significant result found!")
+    # The same sections as check_results.py reports
+    notifications = build_sections(active_exps, summaries, metric_results, mismatches)
+    for section in notifications:
+        if section.stats is not None and section.stats.is_significant:
+            print(f"📊 {section.experiment_name}: Significant result found!")
+        if section.regressions:
+            print(f"🚨 {section.experiment_name}: {len(section.regressions)} guardrail regression(s)!")
+        if section.srm is not None:
+            print(f"⚠️  {section.experiment_name}: sample ratio mismatch (p = {section.srm.p_value:.2g})")
     
     if notifications:
         send_results_email(notifications)
@@ -92,74 +101,8 @@ def check_and_notify():
 
 
 def send_results_email(notifications: list):
-    """Format and send results email"""
-    
-    # Build HTML email
-    html = f"""
-    <html>
-    <head>
-        <style>
-            body {{ font-family: Arial, sans-serif; }}
-            .header {{ background-color: #4CAF50; color: white; padding: 20px; text-align: center; }}
-            .experiment {{ border: 1px solid #ddd; margin: 20px; padding: 20px; border-radius: 5px; }}
-            .metric {{ display: inline-block; margin: 10px; padding: 10px; background: #f5f5f5; border-radius: 5px; }}
-            .winner {{ color: #4CAF50; font-weight: bold; font-size: 24px; }}
-            .stats {{ background: #e3f2fd; padding: 15px; margin: 10px 0; border-radius: 5px; }}
-        </style>
-    </head>
-    <body>
-        <div class="header">
-            <h1>🎉 Experiment Results Ready!</h1>
-            <p>Significant results detected at {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}</p>
-        </div>
-    """
-    
-    for notif in notifications:
-        stats = notif['stats']
-        exp_name = notif['experiment']
-        
-        html += f"""
-        <div class="experiment">
-            <h2>{exp_name}</h2>
-            <p class="winner">{'✅ WINNER DETECTED!' if stats['winner'] == 'variant' else '📊 Significant Result'}</p>
-            
-            <div class="stats">
-                <div class="metric">
-                    <strong>Control Rate:</strong><br>
-                    {stats['control_rate']:.2f}%
-                </div>
-                <div class="metric">
-                    <strong>Variant Rate:</strong><br>
-                    {stats['variant_rate']:.2f}%
-                </div>
-                <div class="metric">
-                    <strong>Lift:</strong><br>
-                    {stats['relative_lift']:.1f}%
-                </div>
-                <div class="metric">
-                    <strong>Confidence:</strong><br>
-                    {stats['confidence']:.1f}%
-                </div>
-            </div>
-            
-            <p><strong>Sample Size:</strong></p>
-            <ul>
-                <li>Control: {int(notif['control']['total_impressions']):,} impressions, {int(notif['control']['total_conversions']):,} conversions</li>
-                <li>Variant: {int(notif['variant']['total_impressions']):,} impressions, {int(notif['variant']['total_conversions']):,} conversions</li>
-            </ul>
-            
-            <p><strong>Recommendation:</strong> 
-            {'🚀 Ship the variant immediately!' if stats['winner'] == 'variant' else '⚠️ Keep current version or investigate further.'}
-            </p>
-            
-            <p><a href="http://localhost:8501">View in Dashboard →</a></p>
-        </div>
-        """
-    
-    html += """
-    </body>
-    </html>
-    """
+    """Render the report sections into one HTML email and send it"""
+    html = render_report('html', notifications, datetime.now().strftime('%Y-%m-%d %H:%M:%S'))
     
     subject = f"🎯 {len(notifications)} Experiment{'s' if len(notifications) > 1 else ''} Ready for Review"
     send_email(subject, html)
@@ -0,0 +1,129 @@
+"""
+Runs the periodic jobs in one long-lived process (see core/scheduler.py).
+
+    checker    check_results.py: snapshots, metrics and experiment_results.txt/.json
+    notifier   email_results.py: email about significant results
+    bandit     recomputes bandit traffic splits (core/bandit.py)
+    complete   completes experiments that reached a decision (core/lifecycle.py)
+    retention  rolls up completed experiments (core/retention.py)
+
+`complete` and `retention` change data that cannot be restored from the
+app: completed experiments stop running, and retention replaces their
+daily rows with weekly rollups (the raw rows only survive in the
+archive). They only run when named in --jobs.
+
+The data manager and the significance cache are opened once and shared by
+every job, so each cycle skips interpreter start-up and imports and finds
+the cache warm. Progress goes to the console; each job's last run, result
+and next run are also shown on the app's Dashboard.
+
+    python run_scheduler.py                              # checker, notifier, bandit
+    python run_scheduler.py --jobs notifier              # only the email alerts
+    python run_scheduler.py --jobs checker,complete,retention
+    python run_scheduler.py --jobs checker --interval checker=60
+"""
+
+import argparse
+import asyncio
+
+import check_results
+import email_results
+from core.bandit import update_allocations
+from core.data_manager import open_data_manager
+from core.lifecycle import auto_complete
+from core.retention import RetentionManager
+from core.scheduler import Job, Scheduler
+from core.significance_cache import SignificanceCache
+from core.statistical_engine import ABTestCalculator
+
+# Seconds between runs of each job
+JOB_INTERVALS = {
+    'checker': 300,
+    'notifier': 300,
+    'complete': 3600,
+    'retention': 86400,
+    'bandit': 3600,
+}
+JITTER = 10     # seconds added at random to every wait
+# Jobs run when --jobs is not given; complete and retention must be named
+DEFAULT_JOBS = ('checker', 'notifier', 'bandit')
+DESTRUCTIVE_JOBS = {
+    'complete': "completes running experiments that reached a decision",
+    'retention': "replaces the daily rows of completed experiments with weekly rollups",
+}
+
+
+def build_jobs(names, intervals=None, jitter: float = JITTER):
+    """
+    Jobs sharing one data manager and one calculator
+
+    Args:
+        names: Job names from JOB_INTERVALS
+        intervals: {name: seconds} overriding JOB_INTERVALS
+        jitter: Up to this many seconds added to every wait
+    """
+    intervals = intervals or {}
+    unknown = sorted((set(names) | set(intervals)) - set(JOB_INTERVALS))
+    if unknown:
+        raise ValueError(f"Unknown jobs: {', '.join(unknown)} (choose from {', '.join(JOB_INTERVALS)})")
+    intervals = {**JOB_INTERVALS, **intervals}
+
+    dm = open_data_manager()
+    # Stays warm in memory between runs; no shared cache file needed
+    calc = ABTestCalculator(cache=SignificanceCache())
+
+    def checker():
+        check_results.check_and_save_results(dm, calc)
+
+    def complete():
+        completed = auto_complete(dm, calc)
+        if completed:
+            print(f"🏁 Completed experiments: {', '.join(map(str, completed))}")
+        return f"completed {len(completed)}"
+
+    functions = {
+        'checker': checker,
+        'notifier': lambda: email_results.check_and_notify(dm, calc),
+        'complete': complete,
+        'retention': lambda: RetentionManager(dm).run(),
+        'bandit': lambda: update_allocations(dm),
+    }
+    return [Job(name, functions[name], intervals[name], jitter=jitter) for name in names]
+
+
+def _interval(text: str):
+    name, _, seconds = text.partition('=')
+    try:
+        return name, float(seconds)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected NAME=SECONDS, got {text!r}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run the checker, notifier and maintenance jobs")
+    parser.add_argument('--jobs', default=','.join(DEFAULT_JOBS),
+                        help=f"Comma-separated jobs to run (default: {','.join(DEFAULT_JOBS)}; "
+                             f"{' and '.join(DESTRUCTIVE_JOBS)} change data and only run when named)")
+    parser.add_argument('--interval', type=_interval, action='append', default=[],
+                        metavar='NAME=SECONDS', help="Override a job's interval (repeatable)")
+    parser.add_argument('--jitter', type=float, default=JITTER,
+                        help=f"Up to this many seconds added to every wait (default: {JITTER})")
+    args = parser.parse_args()
+
+    names = [name.strip() for name in args.jobs.split(',') if name.strip()]
+    scheduler = Scheduler(build_jobs(names, dict(args.interval), args.jitter))
+
+    print("⏱️ Experiment Job Scheduler")
+    print("=" * 50)
+    for job in scheduler.jobs.values():
+        print(f"{job.name:<10} every {job.interval:,.0f} s")
+    for name, effect in DESTRUCTIVE_JOBS.items():
+        if name in scheduler.jobs:
+            print(f"⚠️  {name} {effect}")
+    print("Press Ctrl+C to stop\n")
+
+    try:
+        asyncio.run(scheduler.run())
+    except KeyboardInterrupt:
+        pass
+    print("\n✅ Scheduler stopped")
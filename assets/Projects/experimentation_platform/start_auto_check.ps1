@@ -1,22 +1,15 @@
 # Auto-check experiments every 5 minutes and save results to files
 # No email password needed!
+# The checks run in one Python process (run_scheduler.py) instead of a new one per check.
+# Completing experiments and retention are not started here: they change data,
+# so run them explicitly, e.g. run_scheduler.py --jobs checker,complete,retention
 
 $scriptRoot = Split-Path -Parent $MyInvocation.MyCommand.Path
 $pythonExe = Join-Path $scriptRoot 'venv\Scripts\python.exe'
-$checkScript = Join-Path $scriptRoot 'check_results.py'
+$schedulerScript = Join-Path $scriptRoot 'run_scheduler.py'
 
 Write-Host "📊 Starting Experiment Results Auto-Checker" -ForegroundColor Green
 Write-Host "Checking every 5 minutes and saving to experiment_results.txt" -ForegroundColor Cyan
 Write-Host "Press Ctrl+C to stop`n" -ForegroundColor Yellow
 
-# Initial check
-Write-Host "Running initial check..."
-& $pythonExe $checkScript
-
-# Loop every 5 minutes
-while ($true) {
-    Start-Sleep -Seconds 300  # 5 minutes
-    
-    Write-Host "`n--- New Check ($(Get-Date -Format 'HH:mm:ss')) ---" -ForegroundColor Cyan
-    & $pythonExe $checkScript
-}
+& $pythonExe $schedulerScript --jobs checker
@@ -0,0 +1,12 @@
+import pytest
+
+from benchmarks.synthetic_data import SyntheticConfig, generate_database
+from core.data_manager import ExperimentDataManager
+
+
+@pytest.fixture
+def filled_dm(tmp_path):
+    """Three experiments, 30 days of metrics spread over segments"""
+    path = str(tmp_path / 'experiments.db')
+    generate_database(path, SyntheticConfig(experiments=3, days=30, rows_per_day=6, countries=1))
+    return ExperimentDataManager(path)
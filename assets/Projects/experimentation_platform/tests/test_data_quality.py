@@ -0,0 +1,69 @@
+import math
+
+import pytest
+from scipy import stats
+
+from core.data_quality import check_metric_rows, check_metric_values, chi2_sf
+
+
+@pytest.mark.parametrize('df', [1, 2, 3, 4, 7, 20, 51])
+@pytest.mark.parametrize('x', [0.01, 0.5, 1.0, 3.84, 10.0, 60.0, 200.0])
+def test_chi2_sf_matches_scipy(x, df):
+    assert chi2_sf(x, df) == pytest.approx(stats.chi2.sf(x, df), rel=1e-10, abs=1e-300)
+
+
+def test_chi2_sf_edges():
+    assert chi2_sf(0.0, 3) == 1.0
+    with pytest.raises(ValueError):
+        chi2_sf(1.0, 0)
+
+
+# (impressions, conversions, revenue, unique_users)
+VALUES = [
+    (100, 10, 5.0, 80),
+    (100, 10, 5.0, None),
+    (100, 10, 5.0, 0),
+    (0, 0, 0.0, 0),
+    (100, 100, 0.0, 100),
+    (100, 101, 5.0, 80),
+    (-1, 0, 0.0, 0),
+    (100, 10, -5.0, 80),
+    (100, 10.5, 5.0, 80),
+    (100, 10, 5.0, 80.5),
+    (100, 10, 5.5, 80),
+    (None, 10, 5.0, 80),
+    (100, 10, None, 80),
+    (100, 10, math.nan, 80),
+    (100, 10, math.inf, 80),
+    (100, 10, 5.0, math.nan),
+    ('100', 10, 5.0, 80),
+    (True, 0, 0.0, 0),
+]
+
+
+def row_valid(values) -> bool:
+    try:
+        check_metric_values(*values)
+    except ValueError:
+        return False
+    return True
+
+
+def batch_valid(values) -> bool:
+    # Same layout as METRIC_ROW_COLUMNS: impressions ... unique_users at 3..6
+    try:
+        check_metric_rows([(1, 1, '2024-01-01') + values])
+    except ValueError:
+        return False
+    return True
+
+
+@pytest.mark.parametrize('values', VALUES)
+def test_row_and_batch_validation_agree(values):
+    assert batch_valid(values) == row_valid(values)
+
+
+def test_batch_validation_names_first_invalid_row():
+    rows = [(1, 1, '2024-01-01') + values for values in VALUES[:5] + [VALUES[5], VALUES[6]]]
+    with pytest.raises(ValueError, match=r"2 invalid metric row\(s\); first is row 6"):
+        check_metric_rows(rows)
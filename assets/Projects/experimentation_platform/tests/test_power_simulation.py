@@ -0,0 +1,21 @@
+from core.power_simulation import SimulationConfig, simulate_power
+from core.statistical_engine import ABTestCalculator
+
+
+def test_extra_variants_only_dilute_traffic():
+    # The checker tests control against the first other variant only, so
+    # four variants at 12k/day behave exactly like two at 6k/day
+    four = simulate_power(SimulationConfig(variants=4, daily_traffic=12_000, days=14,
+                                           trajectories=2_000, seed=7))
+    two = simulate_power(SimulationConfig(variants=2, daily_traffic=6_000, days=14,
+                                          trajectories=2_000, seed=7))
+    assert four == two
+
+
+def test_aa_false_positive_rate_matches_alpha_with_many_variants():
+    # Testing any of three treatments at one final look would flag about
+    # 1 - (1 - alpha)^3 of A/A runs; the first-variant rule flags alpha
+    calc = ABTestCalculator(alpha=0.05)
+    result = simulate_power(SimulationConfig(variants=4, relative_lift=0.0, peek_every=0,
+                                             trajectories=20_000, seed=3), calc)
+    assert abs(result.fixed_horizon_false_positive_rate - 0.05) < 0.01
@@ -0,0 +1,77 @@
+import json
+from datetime import date, timedelta
+
+from core.data_manager import ExperimentDataManager
+from core.data_quality import SRMResult, srm_alerts
+from core.experiment_summary import get_current_summaries
+from core.metric_evaluation import MetricResult, get_current_metric_results
+from core.reports import ReportSection, build_sections, render_report, significant_entry
+from core.statistical_engine import ABTestCalculator
+
+
+def test_broken_split_without_snapshot_is_reported(tmp_path):
+    # All traffic went to control: no snapshot (the variant has no
+    # impressions), but the mismatch must still reach both reports
+    dm = ExperimentDataManager(str(tmp_path / 'experiments.db'))
+    experiment_id = dm.create_experiment(
+        'Broken split', '', '', date(2024, 1, 1), 'test',
+        [{'name': 'control', 'allocation': 50}, {'name': 'variant_a', 'allocation': 50}]
+    )
+    for day in range(7):
+        dm.log_metrics(experiment_id, 'control', date(2024, 1, 1) + timedelta(days=day), 1000, 100, 500.0)
+
+    calc = ABTestCalculator()
+    experiments = dm.get_active_experiment_rows()
+    ids = [exp.experiment_id for exp in experiments]
+    summaries = get_current_summaries(dm, calc, ids)
+    assert experiment_id not in summaries
+
+    sections = build_sections(experiments, summaries, get_current_metric_results(dm, calc, ids),
+                              srm_alerts(dm, ids))
+    assert [s.experiment_id for s in sections] == [experiment_id]
+    assert sections[0].stats is None and sections[0].srm is not None
+    assert 'Sample Ratio Mismatch' in render_report('html', sections, '2024-01-08 00:00:00')
+
+
+def test_check_without_significance_cache(tmp_path, monkeypatch):
+    # run_scheduler.py may pass a calculator built without a cache
+    from check_results import check_and_save_results
+
+    monkeypatch.chdir(tmp_path)
+    dm = ExperimentDataManager(str(tmp_path / 'experiments.db'))
+    experiment_id = dm.create_experiment(
+        'No cache', '', '', date(2024, 1, 1), 'test',
+        [{'name': 'control', 'allocation': 50}, {'name': 'variant_a', 'allocation': 50}]
+    )
+    for variant, conversions in (('control', 50), ('variant_a', 150)):
+        dm.log_metrics(experiment_id, variant, date(2024, 1, 1), 1000, conversions, 0.0)
+
+    check_and_save_results(dm, ABTestCalculator())
+    assert (tmp_path / 'experiment_results.json').exists()
+
+
+def test_json_report_matches_json_dumps(filled_dm):
+    calc = ABTestCalculator()
+    ids = [1, 2, 3]
+    summaries = get_current_summaries(filled_dm, calc, ids)
+    metrics = get_current_metric_results(filled_dm, calc, ids)
+
+    regression = MetricResult('Revenue "per user"', 'guardrail', 'variant_a', 1.5, 1.25,
+                              -16.666666666666668, 1e-7, True, True)
+    srm = SRMResult(3, ['control', 'variant_a'], [6000, 4000], [0.5, 0.5], [0.6, 0.4], 400.0, 1.5e-88, True)
+    sections = [
+        ReportSection(1, 'Ünïcode <b> & "quotes"', summaries[1], metrics[1], [], None),
+        ReportSection(2, 'Guardrail', summaries[2], metrics[2] + [regression], [regression], None),
+        ReportSection(3, 'Broken split', None, [], [], srm),
+    ]
+    significant = [s for s in sections if s.stats is not None and s.stats.is_significant]
+    assert significant
+    expected = {
+        'timestamp': '2024-01-31 08:00:00',
+        'significant_experiments': [significant_entry(s) for s in significant],
+        'guardrail_alerts': [{'experiment_name': 'Guardrail', 'experiment_id': 2, **regression._asdict()}],
+        'srm_alerts': [{'experiment_name': 'Broken split', **srm._asdict()}],
+    }
+    assert render_report('json', sections, '2024-01-31 08:00:00') == json.dumps(expected, indent=2)
+    assert render_report('json', [], 'now') == json.dumps(
+        {'timestamp': 'now', 'significant_experiments': [], 'guardrail_alerts': [], 'srm_alerts': []}, indent=2)
@@ -0,0 +1,59 @@
+import numpy as np
+import pytest
+from scipy import stats
+
+from core.statistical_engine import RunningStats, norm_ppf, norm_sf
+
+
+@pytest.mark.parametrize('x', [-8.0, -3.0, -1.0, 0.0, 0.5, 1.96, 5.0, 10.0, 30.0])
+def test_norm_sf_matches_scipy(x):
+    assert norm_sf(x) == pytest.approx(stats.norm.sf(x), rel=1e-12)
+
+
+@pytest.mark.parametrize('q', [1e-300, 1e-12, 0.001, 0.025, 0.2, 0.5, 0.8, 0.975, 0.999, 1 - 1e-12])
+def test_norm_ppf_matches_scipy(q):
+    assert norm_ppf(q) == pytest.approx(stats.norm.ppf(q), rel=1e-9, abs=1e-12)
+
+
+def test_norm_ppf_edges():
+    assert norm_ppf(0.0) == -np.inf and norm_ppf(1.0) == np.inf
+    with pytest.raises(ValueError):
+        norm_ppf(1.5)
+
+
+def summary(s: RunningStats):
+    variance = s.m2 / s.count
+    return (s.count, s.mean, variance, s.m3 / s.count / variance ** 1.5,
+            s.m4 / s.count / variance ** 2, s.min, s.max)
+
+
+def expected(x, w=None):
+    w = np.ones_like(x) if w is None else w
+    mean = np.average(x, weights=w)
+    d = x - mean
+    variance = np.average(d ** 2, weights=w)
+    return (w.sum(), mean, variance, np.average(d ** 3, weights=w) / variance ** 1.5,
+            np.average(d ** 4, weights=w) / variance ** 2, x.min(), x.max())
+
+
+def test_running_stats_merge_matches_numpy():
+    rng = np.random.default_rng(7)
+    # Partitions of very different sizes and locations stress the merge terms
+    parts = [rng.lognormal(0, 1, 5), rng.normal(1000, 3, 20_000), rng.exponential(2, 1), rng.normal(-5, 1, 300)]
+
+    merged = RunningStats()
+    for part in parts:
+        merged.merge(RunningStats().update(part))
+    assert summary(merged) == pytest.approx(expected(np.concatenate(parts)), rel=1e-9)
+
+    # Weighted chunks merge like the repeated values
+    x, w = rng.normal(size=50), rng.integers(1, 5, 50).astype(float)
+    chunked = RunningStats().update_array(x[:20], w[:20]).merge(RunningStats().update_array(x[20:], w[20:]))
+    assert summary(chunked) == pytest.approx(expected(x, w), rel=1e-9)
+
+
+def test_running_stats_merge_with_empty():
+    s = RunningStats().update([1.0, 2.0, 4.0])
+    before = summary(s)
+    assert summary(s.merge(RunningStats())) == before
+    assert summary(RunningStats().merge(s)) == before